@@ -1,23 +1,78 @@
 """Outlier Detection - Statistical methods to identify extreme or inconsistent scores."""
 
 import logging
+import warnings
 import numpy as np
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from app.models import Score, User
-from sqlalchemy import func
+from sqlalchemy import func, select
+from app.analysis.streaming_stats import RunningStats, ScoreStatistics, score_statistics
 
 logger = logging.getLogger(__name__)
 
+# Rows streamed per fetch when loading score arrays
+SCORE_CHUNK_SIZE = 10000
+# Ids per IN (...) when fetching outlier details (below SQLite's variable limit)
+DETAIL_BATCH_SIZE = 500
+
 
 class OutlierDetector:
     """Outlier detection using multiple statistical methods."""
     
-    def __init__(self, threshold: float = 2.5):
+    def __init__(self, threshold: float = 2.5, statistics: Optional[ScoreStatistics] = None):
         """Initialize with Z-score threshold (default: 2.5)."""
         self.threshold = threshold
         self.outlier_report = {}
+        self.statistics = statistics or score_statistics
+    
+    # Streaming checks: one value against running statistics, O(1)
+    def check_score(self, value: float, stats: RunningStats, threshold: Optional[float] = None,
+                    iqr_multiplier: float = 1.5, modified_threshold: float = 3.5) -> Dict:
+        """Z-score, IQR and modified Z-score checks of value against stats."""
+        if threshold is None:
+            threshold = self.threshold
+        
+        result = {"value": value, "count": stats.count}
+        if stats.count < 2:
+            return {**result, "is_outlier": False, "checks": {}}
+        
+        std_dev = stats.std_dev
+        z_score = stats.zscore(value)
+        lower_bound = stats.q1 - iqr_multiplier * (stats.q3 - stats.q1)
+        upper_bound = stats.q3 + iqr_multiplier * (stats.q3 - stats.q1)
+        mad = stats.mad
+        modified_z = 0.6745 * abs(value - stats.median) / mad if mad > 0 else 0.0
+        
+        checks = {
+            "zscore": {
+                "z_score": z_score, "mean": stats.mean, "std_dev": std_dev,
+                "threshold": threshold, "is_outlier": std_dev > 0 and z_score > threshold
+            },
+            "iqr": {
+                "lower_bound": lower_bound, "upper_bound": upper_bound,
+                "is_outlier": stats.count >= 4 and not lower_bound <= value <= upper_bound
+            },
+            "modified_zscore": {
+                "modified_z_score": modified_z, "median": stats.median, "mad": mad,
+                "threshold": modified_threshold, "is_outlier": modified_z > modified_threshold
+            }
+        }
+        return {**result, "is_outlier": any(c["is_outlier"] for c in checks.values()), "checks": checks}
+    
+    def check_new_score(self, session: Session, value: float, username: Optional[str] = None,
+                        age_group: Optional[str] = None) -> Dict:
+        """Check a score that is about to be inserted against each scope's history plus itself."""
+        scopes = {"global": self.statistics.global_stats(session)}
+        if age_group:
+            scopes["age_group"] = self.statistics.for_age_group(session, age_group)
+        if username:
+            scopes["user"] = self.statistics.for_user(session, username)
+        return {
+            scope: self.check_score(value, stats.with_value(value))
+            for scope, stats in scopes.items()
+        }
     
     # Z-Score: |Z| > threshold
     def detect_outliers_zscore(self, scores: List[float], threshold: Optional[float] = None) -> Dict:
@@ -129,38 +184,135 @@ class OutlierDetector:
         }
     
     # Ensemble: Consensus voting from all methods
-    def detect_outliers_ensemble(self, scores: List[float], 
-                                consensus_threshold: float = 0.5) -> Dict:
-        """Consensus-based outlier detection."""
-        if len(scores) < 2:
-            return {"outliers": [], "indices": [], "methods_used": [], "method": "ensemble"}
+    def detect_outliers_ensemble(self, scores, consensus_threshold: float = 0.5):
+        """
+        Consensus-based outlier detection.
         
-        results = {
-            "zscore": self.detect_outliers_zscore(scores),
-            "iqr": self.detect_outliers_iqr(scores),
-            "modified_zscore": self.detect_outliers_modified_zscore(scores),
-            "mad": self.detect_outliers_mad(scores)
+        Fused single pass: the scores are sorted once, every statistic the
+        four methods need is derived from that, and the method masks are
+        summed as boolean arrays. Output matches running the four methods
+        separately.
+        
+        scores may also be a 2-D array with one group per row, NaN-padded
+        to equal length; a list with one result per row is returned.
+        """
+        scores_array = np.array(scores, dtype=float)
+        if scores_array.ndim == 2:
+            return [
+                self._format_ensemble(row_stats, consensus_threshold)
+                for row_stats in self._ensemble_stats(scores_array)
+            ]
+        return self._format_ensemble(self._ensemble_stats(scores_array[None, :])[0], consensus_threshold)
+    
+    def _ensemble_stats(self, matrix: np.ndarray, iqr_multiplier: float = 1.5,
+                        modified_threshold: float = 3.5, mad_threshold: float = 2.5) -> List[Dict]:
+        """Per-row statistics and method masks for a NaN-padded score matrix."""
+        valid = ~np.isnan(matrix)
+        counts = valid.sum(axis=1)
+        
+        # One sort per row (NaN padding sorts to the end)
+        ordered = np.sort(matrix, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+            # Rows with fewer than two values are rejected below
+            warnings.simplefilter('ignore', RuntimeWarning)
+            mean = np.nanmean(matrix, axis=1)
+            std = np.nanstd(matrix, axis=1)
+            q1 = self._sorted_percentile(ordered, counts, 25)
+            median = self._sorted_percentile(ordered, counts, 50)
+            q3 = self._sorted_percentile(ordered, counts, 75)
+            deviations = np.abs(matrix - median[:, None])
+            mad = self._sorted_percentile(np.sort(deviations, axis=1), counts, 50)
+            
+            iqr = q3 - q1
+            lower = q1 - iqr_multiplier * iqr
+            upper = q3 + iqr_multiplier * iqr
+            z_scores = np.abs((matrix - mean[:, None]) / std[:, None])
+            modified_z = 0.6745 * np.abs((matrix - median[:, None]) / mad[:, None])
+        
+        # Per-row applicability, as in the individual methods
+        z_ok = (counts >= 2) & (std != 0)
+        iqr_ok = counts >= 4
+        mad_ok = (counts >= 2) & (mad != 0)
+        
+        masks = {
+            "zscore": (z_scores > self.threshold) & z_ok[:, None],
+            "iqr": ((matrix < lower[:, None]) | (matrix > upper[:, None])) & iqr_ok[:, None],
+            "modified_zscore": (modified_z > modified_threshold) & mad_ok[:, None],
+            "mad": (deviations > mad_threshold * mad[:, None]) & mad_ok[:, None]
         }
+        votes = sum(mask.astype(float) for mask in masks.values())
         
-        # Create voting matrix
-        num_scores = len(scores)
-        votes = np.zeros(num_scores)
+        stats = []
+        for i, n in enumerate(counts):
+            row = valid[i]
+            stats.append({
+                "values": matrix[i][row], "count": int(n), "votes": votes[i][row],
+                "masks": {name: mask[i][row] for name, mask in masks.items()},
+                "z_ok": bool(z_ok[i]), "iqr_ok": bool(iqr_ok[i]), "mad_ok": bool(mad_ok[i]),
+                "mean": mean[i], "std": std[i], "q1": q1[i], "q3": q3[i], "iqr": iqr[i],
+                "lower": lower[i], "upper": upper[i], "median": median[i], "mad": mad[i],
+                "z_scores": z_scores[i][row], "modified_z": modified_z[i][row],
+                "deviations": deviations[i][row],
+                "thresholds": (modified_threshold, mad_threshold)
+            })
+        return stats
+    
+    @staticmethod
+    def _sorted_percentile(ordered: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+        """np.percentile (linear) per row of a row-sorted matrix with counts[i] valid values."""
+        position = (counts - 1) * (q / 100.0)
+        lo = np.clip(np.floor(position).astype(int), 0, None)
+        hi = np.minimum(lo + 1, np.maximum(counts - 1, 0))
+        rows = np.arange(len(ordered))
+        if not ordered.shape[1]:
+            return np.full(len(ordered), np.nan)
+        a = ordered[rows, lo]
+        b = ordered[rows, hi]
+        t = position - lo
+        # Same interpolation as numpy's _lerp
+        diff = b - a
+        return np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+    
+    def _format_ensemble(self, stats: Dict, consensus_threshold: float) -> Dict:
+        """Build the ensemble result (with per-method results) for one row."""
+        if stats["count"] < 2:
+            return {"outliers": [], "indices": [], "methods_used": [], "method": "ensemble"}
         
-        for method_name, method_result in results.items():
-            for idx in method_result.get("indices", []):
-                votes[idx] += 1
+        values = stats["values"]
+        masks = stats["masks"]
+        modified_threshold, mad_threshold = stats["thresholds"]
         
-        # Find consensus outliers
-        num_methods = len(results)
-        consensus_votes_needed = int(np.ceil(num_methods * consensus_threshold))
-        consensus_mask = votes >= consensus_votes_needed
+        def picked(mask):
+            return {"outliers": values[mask].tolist(), "indices": np.where(mask)[0].tolist()}
         
-        scores_array = np.array(scores, dtype=float)
+        results = {
+            "zscore": {**picked(masks["zscore"]), "z_scores": stats["z_scores"].tolist(),
+                       "threshold": self.threshold, "mean": float(stats["mean"]),
+                       "std_dev": float(stats["std"]), "method": "zscore"}
+            if stats["z_ok"] else {"outliers": [], "indices": [], "z_scores": [], "method": "zscore"},
+            "iqr": {**picked(masks["iqr"]), "q1": float(stats["q1"]), "q3": float(stats["q3"]),
+                    "iqr": float(stats["iqr"]), "lower_bound": float(stats["lower"]),
+                    "upper_bound": float(stats["upper"]), "method": "iqr"}
+            if stats["iqr_ok"] else {"outliers": [], "indices": [], "method": "iqr"},
+            "modified_zscore": {**picked(masks["modified_zscore"]),
+                                "modified_z_scores": stats["modified_z"].tolist(),
+                                "threshold": modified_threshold, "median": float(stats["median"]),
+                                "mad": float(stats["mad"]), "method": "modified-zscore"}
+            if stats["mad_ok"] else {"outliers": [], "indices": [], "method": "modified-zscore"},
+            "mad": {**picked(masks["mad"]), "deviations": stats["deviations"].tolist(),
+                    "median": float(stats["median"]), "mad": float(stats["mad"]),
+                    "threshold": mad_threshold, "method": "mad"}
+            if stats["mad_ok"] else {"outliers": [], "indices": [], "method": "mad"}
+        }
+        
+        # Find consensus outliers
+        consensus_votes_needed = int(np.ceil(len(results) * consensus_threshold))
+        consensus_mask = stats["votes"] >= consensus_votes_needed
         
         return {
-            "outliers": scores_array[consensus_mask].tolist(),
+            "outliers": values[consensus_mask].tolist(),
             "indices": np.where(consensus_mask)[0].tolist(),
-            "votes": votes.tolist(),
+            "votes": stats["votes"].tolist(),
             "consensus_threshold": consensus_threshold,
             "methods_used": list(results.keys()),
             "individual_results": results,
@@ -228,41 +380,28 @@ class OutlierDetector:
                                     method: str = "ensemble") -> Dict:
         """Age group-level outlier detection."""
         try:
-            scores_query = session.query(Score).filter(
-                Score.detailed_age_group == age_group
-            ).order_by(Score.timestamp).all()
+            score_ids, scores = self._load_score_array(
+                session, Score.detailed_age_group == age_group
+            )
             
-            if not scores_query:
+            if not len(scores):
                 logger.warning(f"No scores found for age group: {age_group}")
                 return {"error": f"No scores found for age group: {age_group}"}
             
-            scores = [score.total_score for score in scores_query]
-            
-            # Detect outliers
-            if method == "zscore":
-                result = self.detect_outliers_zscore(scores)
-            elif method == "iqr":
-                result = self.detect_outliers_iqr(scores)
-            elif method == "modified_zscore":
-                result = self.detect_outliers_modified_zscore(scores)
-            elif method == "mad":
-                result = self.detect_outliers_mad(scores)
-            else:
-                result = self.detect_outliers_ensemble(scores)
+            result = self._detect(scores, method)
             
-            # Map indices to score objects
+            # Fetch details only for the flagged scores
             outlier_indices = result.get("indices", [])
-            outlier_details = []
-            
-            for idx in outlier_indices:
-                score_obj = scores_query[idx]
-                outlier_details.append({
-                    "score_id": score_obj.id,
-                    "username": score_obj.username,
-                    "score_value": score_obj.total_score,
-                    "age": score_obj.age,
-                    "timestamp": score_obj.timestamp
-                })
+            outlier_details = [
+                {
+                    "score_id": row.id,
+                    "username": row.username,
+                    "score_value": row.total_score,
+                    "age": row.age,
+                    "timestamp": row.timestamp
+                }
+                for row in self._fetch_score_details(session, score_ids[outlier_indices])
+            ]
             
             return {
                 "age_group": age_group,
@@ -270,13 +409,7 @@ class OutlierDetector:
                 "outlier_count": len(outlier_indices),
                 "detection_method": method,
                 "outlier_details": outlier_details,
-                "statistics": {
-                    "mean_score": float(np.mean(scores)),
-                    "median_score": float(np.median(scores)),
-                    "std_dev": float(np.std(scores)),
-                    "min_score": float(np.min(scores)),
-                    "max_score": float(np.max(scores))
-                },
+                "statistics": self._array_statistics(scores),
                 **result
             }
             
@@ -287,40 +420,27 @@ class OutlierDetector:
     def detect_outliers_global(self, session: Session, method: str = "ensemble") -> Dict:
         """System-wide outlier detection."""
         try:
-            scores_query = session.query(Score).order_by(Score.timestamp).all()
+            score_ids, scores = self._load_score_array(session)
             
-            if not scores_query:
+            if not len(scores):
                 logger.warning("No scores found in database")
                 return {"error": "No scores found in database"}
             
-            scores = [score.total_score for score in scores_query]
-            
-            # Detect outliers
-            if method == "zscore":
-                result = self.detect_outliers_zscore(scores)
-            elif method == "iqr":
-                result = self.detect_outliers_iqr(scores)
-            elif method == "modified_zscore":
-                result = self.detect_outliers_modified_zscore(scores)
-            elif method == "mad":
-                result = self.detect_outliers_mad(scores)
-            else:
-                result = self.detect_outliers_ensemble(scores)
+            result = self._detect(scores, method)
             
-            # Map indices to score objects
+            # Fetch details only for the flagged scores
             outlier_indices = result.get("indices", [])
-            outlier_details = []
-            
-            for idx in outlier_indices:
-                score_obj = scores_query[idx]
-                outlier_details.append({
-                    "score_id": score_obj.id,
-                    "username": score_obj.username,
-                    "score_value": score_obj.total_score,
-                    "age": score_obj.age,
-                    "age_group": score_obj.detailed_age_group,
-                    "timestamp": score_obj.timestamp
-                })
+            outlier_details = [
+                {
+                    "score_id": row.id,
+                    "username": row.username,
+                    "score_value": row.total_score,
+                    "age": row.age,
+                    "age_group": row.detailed_age_group,
+                    "timestamp": row.timestamp
+                }
+                for row in self._fetch_score_details(session, score_ids[outlier_indices])
+            ]
             
             return {
                 "scope": "global",
@@ -328,13 +448,7 @@ class OutlierDetector:
                 "outlier_count": len(outlier_indices),
                 "detection_method": method,
                 "outlier_details": outlier_details,
-                "statistics": {
-                    "mean_score": float(np.mean(scores)),
-                    "median_score": float(np.median(scores)),
-                    "std_dev": float(np.std(scores)),
-                    "min_score": float(np.min(scores)),
-                    "max_score": float(np.max(scores))
-                },
+                "statistics": self._array_statistics(scores),
                 **result
             }
             
@@ -342,6 +456,100 @@ class OutlierDetector:
             logger.error(f"Error detecting global outliers: {e}")
             return {"error": str(e)}
     
+    def detect_outliers_all_age_groups(self, session: Session,
+                                       consensus_threshold: float = 0.5) -> Dict[str, Dict]:
+        """Ensemble outlier detection for every detailed age group in one vectorized call."""
+        stmt = select(Score.detailed_age_group, Score.id, Score.total_score).where(
+            Score.total_score.is_not(None), Score.detailed_age_group.is_not(None)
+        ).order_by(Score.detailed_age_group, Score.timestamp)
+        
+        groups, score_ids, scores = [], [], []
+        for rows in session.execute(stmt.execution_options(yield_per=SCORE_CHUNK_SIZE)).partitions():
+            for group, score_id, value in rows:
+                groups.append(group)
+                score_ids.append(score_id)
+                scores.append(value)
+        if not scores:
+            return {}
+        
+        # One NaN-padded row per group (rows arrive grouped)
+        names, starts, counts = np.unique(np.array(groups, dtype=object), return_index=True, return_counts=True)
+        matrix = np.full((len(names), counts.max()), np.nan)
+        score_ids = np.array(score_ids, dtype=np.int64)
+        scores = np.array(scores, dtype=float)
+        for row, (start, count) in enumerate(zip(starts, counts)):
+            matrix[row, :count] = scores[start:start + count]
+        
+        report = {}
+        for row, result in enumerate(self.detect_outliers_ensemble(matrix, consensus_threshold)):
+            ids = score_ids[starts[row]:starts[row] + counts[row]]
+            report[names[row]] = {
+                "age_group": names[row],
+                "total_scores": int(counts[row]),
+                "outlier_count": len(result["indices"]),
+                "outlier_score_ids": ids[result["indices"]].tolist(),
+                **result
+            }
+        return report
+    
+    def _detect(self, scores, method: str) -> Dict:
+        """Run the named detection method (unknown names fall back to ensemble)."""
+        if method == "zscore":
+            return self.detect_outliers_zscore(scores)
+        if method == "iqr":
+            return self.detect_outliers_iqr(scores)
+        if method == "modified_zscore":
+            return self.detect_outliers_modified_zscore(scores)
+        if method == "mad":
+            return self.detect_outliers_mad(scores)
+        return self.detect_outliers_ensemble(scores)
+    
+    def _load_score_array(self, session: Session, condition=None,
+                          chunk_size: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Stream (id, total_score) in timestamp order into two NumPy arrays.
+        
+        Only the two columns are read, chunk_size rows per fetch, so memory
+        is two numbers per score rather than one ORM object per score.
+        """
+        stmt = select(Score.id, Score.total_score).where(Score.total_score.is_not(None))
+        if condition is not None:
+            stmt = stmt.where(condition)
+        stmt = stmt.order_by(Score.timestamp)
+        chunk_size = chunk_size or SCORE_CHUNK_SIZE
+        
+        chunks = [
+            np.array(rows, dtype=float).reshape(-1, 2)
+            for rows in session.execute(stmt.execution_options(yield_per=chunk_size)).partitions()
+        ]
+        if not chunks:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        data = np.concatenate(chunks)
+        return data[:, 0].astype(np.int64), data[:, 1]
+    
+    def _fetch_score_details(self, session: Session, score_ids) -> List:
+        """Detail rows for the given score ids, in the order given."""
+        score_ids = [int(i) for i in score_ids]
+        rows = {}
+        for start in range(0, len(score_ids), DETAIL_BATCH_SIZE):
+            batch = score_ids[start:start + DETAIL_BATCH_SIZE]
+            stmt = select(
+                Score.id, Score.username, Score.total_score, Score.age,
+                Score.detailed_age_group, Score.timestamp
+            ).where(Score.id.in_(batch))
+            rows.update((row.id, row) for row in session.execute(stmt))
+        return [rows[i] for i in score_ids if i in rows]
+    
+    def _array_statistics(self, scores: np.ndarray) -> Dict:
+        """Descriptive statistics of a score array."""
+        return {
+            "mean_score": float(np.mean(scores)),
+            "median_score": float(np.median(scores)),
+            "std_dev": float(np.std(scores)),
+            "min_score": float(np.min(scores)),
+            "max_score": float(np.max(scores))
+        }
+    
     def detect_inconsistency_patterns(self, session: Session, username: str,
                                      time_window_days: int = 30) -> Dict:
         """Detect scoring inconsistency over time window."""
@@ -405,27 +613,24 @@ class OutlierDetector:
     def get_statistical_summary(self, session: Session, age_group: Optional[str] = None) -> Dict:
         """Get statistical summary."""
         try:
-            if age_group:
-                query = session.query(Score).filter(Score.detailed_age_group == age_group)
-            else:
-                query = session.query(Score)
-            
-            scores = [score.total_score for score in query.all()]
+            condition = Score.detailed_age_group == age_group if age_group else None
+            _, scores = self._load_score_array(session, condition)
             
-            if not scores:
+            if not len(scores):
                 return {"error": "No scores found"}
             
+            q1, median, q3 = np.percentile(scores, [25, 50, 75])
             return {
                 "scope": f"age_group_{age_group}" if age_group else "global",
                 "count": len(scores),
                 "mean": float(np.mean(scores)),
-                "median": float(np.median(scores)),
+                "median": float(median),
                 "std_dev": float(np.std(scores)),
                 "min": float(np.min(scores)),
                 "max": float(np.max(scores)),
-                "q1": float(np.percentile(scores, 25)),
-                "q3": float(np.percentile(scores, 75)),
-                "iqr": float(np.percentile(scores, 75) - np.percentile(scores, 25))
+                "q1": float(q1),
+                "q3": float(q3),
+                "iqr": float(q3 - q1)
             }
             
         except Exception as e:
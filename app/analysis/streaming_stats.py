@@ -0,0 +1,286 @@
+"""Streaming Statistics - O(1) running statistics for score outlier checks.
+
+RunningStats folds scores in one at a time: Welford mean/variance, P²
+quartile estimates and a running MAD approximation. ScoreStatistics keeps
+one RunningStats per scope (global, detailed age group, user) and brings a
+scope up to date by reading only scores newer than the last one it saw, so
+checking a new score never reloads the whole history.
+"""
+
+import copy
+import logging
+import math
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+from app.models import Score
+
+logger = logging.getLogger(__name__)
+
+# Scores read per round-trip when a scope catches up
+CATCH_UP_BATCH_SIZE = 5000
+
+# Scopes kept per database engine; the least recently used are dropped beyond this
+MAX_SCOPES = 1024
+
+
+class P2Quantile:
+    """P² streaming quantile estimate (Jain & Chlamtac), five markers, O(1) per value."""
+
+    def __init__(self, p: float):
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x: float):
+        """Fold one observation into the estimate."""
+        self.count += 1
+        q = self.heights
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        # Find the cell containing x, extending the extremes if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Nudge the middle markers toward their desired positions
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    @property
+    def value(self) -> float:
+        """Current estimate (exact, numpy-style interpolation, up to five values)."""
+        if self.count == 0:
+            return float("nan")
+        if self.count > 5:
+            return float(self.heights[2])
+        q = self.heights
+        rank = self.p * (len(q) - 1)
+        lo = int(math.floor(rank))
+        hi = min(lo + 1, len(q) - 1)
+        return float(q[lo] + (q[hi] - q[lo]) * (rank - lo))
+
+
+class RunningStats:
+    """Running statistics for one stream of scores."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.last: Optional[float] = None
+        self.sum_abs_change = 0.0
+        self.last_id = 0
+        self._q1 = P2Quantile(0.25)
+        self._median = P2Quantile(0.5)
+        self._q3 = P2Quantile(0.75)
+        self._abs_dev = P2Quantile(0.5)
+
+    def add(self, x: float):
+        """Fold one score into the statistics (Welford update)."""
+        x = float(x)
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        if self.last is not None:
+            self.sum_abs_change += abs(x - self.last)
+        self.last = x
+        self._q1.add(x)
+        self._median.add(x)
+        self._q3.add(x)
+        # MAD approximation: median of deviations from the running median
+        self._abs_dev.add(abs(x - self._median.value))
+
+    def with_value(self, x: float) -> "RunningStats":
+        """Copy of these statistics with x folded in (self is unchanged)."""
+        stats = copy.deepcopy(self)
+        stats.add(x)
+        return stats
+
+    @property
+    def variance(self) -> float:
+        """Population variance (same as np.var)."""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std_dev(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def average_change(self) -> float:
+        """Mean absolute change between consecutive scores."""
+        return self.sum_abs_change / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def q1(self) -> float:
+        return self._q1.value
+
+    @property
+    def median(self) -> float:
+        return self._median.value
+
+    @property
+    def q3(self) -> float:
+        return self._q3.value
+
+    @property
+    def mad(self) -> float:
+        return self._abs_dev.value
+
+    def zscore(self, x: float) -> float:
+        """|x - mean| / std (0 when the spread is 0)."""
+        std = self.std_dev
+        return abs(x - self.mean) / std if std > 0 else 0.0
+
+    def summary(self) -> Dict:
+        """Statistics in the shape of OutlierDetector.get_statistical_summary."""
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "median": self.median,
+            "std_dev": self.std_dev,
+            "min": self.min,
+            "max": self.max,
+            "q1": self.q1,
+            "q3": self.q3,
+            "iqr": self.q3 - self.q1,
+            "mad": self.mad
+        }
+
+
+class ScoreStatistics:
+    """
+    RunningStats per scope, kept in step with the scores table.
+
+    Scopes are ("global", None), ("age_group", <detailed_age_group>) and
+    ("user", <username>). State is per process and per database engine; a
+    scope is loaded on first use and afterwards only reads rows with an id
+    above the last one it folded in. At most max_scopes scopes are kept per
+    engine (least recently used dropped first, then reloaded if asked for).
+
+    The statistics are append-only: inserted scores are picked up, but an
+    updated or deleted score is not. Code that changes existing scores in
+    this process must call invalidate() for the affected scopes.
+    """
+
+    def __init__(self, max_scopes: int = MAX_SCOPES):
+        self.max_scopes = max_scopes
+        self._engines = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, session: Session, scope: str = "global", key: Optional[str] = None) -> RunningStats:
+        """Up-to-date statistics for one scope."""
+        if scope == "global":
+            condition = None
+        elif scope == "age_group":
+            condition = Score.detailed_age_group == key
+        elif scope == "user":
+            condition = Score.username == key
+        else:
+            raise ValueError(f"Unknown statistics scope: {scope}")
+
+        with self._lock:
+            scopes = self._scopes_for(session)
+            stats = scopes.get((scope, key))
+            if stats is None:
+                stats = scopes[(scope, key)] = RunningStats()
+                while len(scopes) > self.max_scopes:
+                    scopes.popitem(last=False)
+            else:
+                scopes.move_to_end((scope, key))
+            self._catch_up(session, stats, condition)
+            return stats
+
+    def for_user(self, session: Session, username: str) -> RunningStats:
+        return self.get(session, "user", username)
+
+    def for_age_group(self, session: Session, age_group: str) -> RunningStats:
+        return self.get(session, "age_group", age_group)
+
+    def global_stats(self, session: Session) -> RunningStats:
+        return self.get(session, "global")
+
+    def invalidate(self, scope: Optional[str] = None, key: Optional[str] = None):
+        """
+        Forget matching scopes so they reload from the database on next use.
+
+        Args:
+            scope: "global", "age_group" or "user" (None = every scope)
+            key: Age group or username within scope (None = every key)
+        """
+        with self._lock:
+            for scopes in self._engines.values():
+                stale = [(s, k) for s, k in scopes
+                         if (scope is None or s == scope) and (key is None or k == key)]
+                for name in stale:
+                    del scopes[name]
+
+    def reset(self):
+        """Forget all scopes (they reload from the database on next use)."""
+        with self._lock:
+            self._engines = weakref.WeakKeyDictionary()
+
+    def _scopes_for(self, session: Session) -> "OrderedDict[Tuple[str, Optional[str]], RunningStats]":
+        engine = session.get_bind()
+        engine = getattr(engine, "engine", engine)
+        scopes = self._engines.get(engine)
+        if scopes is None:
+            scopes = self._engines[engine] = OrderedDict()
+        return scopes
+
+    def _catch_up(self, session: Session, stats: RunningStats, condition):
+        """Fold in scores inserted since stats.last_id, in id (insertion) order."""
+        while True:
+            query = session.query(Score.id, Score.total_score).filter(Score.id > stats.last_id)
+            if condition is not None:
+                query = query.filter(condition)
+            rows = query.order_by(Score.id).limit(CATCH_UP_BATCH_SIZE).all()
+            for score_id, value in rows:
+                if value is not None:
+                    stats.add(value)
+                stats.last_id = score_id
+            if len(rows) < CATCH_UP_BATCH_SIZE:
+                return
+
+
+# Create singleton instance
+score_statistics = ScoreStatistics()
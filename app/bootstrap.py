@@ -0,0 +1,59 @@
+"""
+Application bootstrap.
+
+Importing app modules does no database work and starts no threads. The GUI,
+the CLI and the maintenance scripts call bootstrap() once at startup
+instead: it creates/verifies the schema and can warm the question bank
+cache so the first exam does not wait on the database. Processes that never
+touch the database (tests, --help, one-off imports) skip all of it.
+"""
+import logging
+import threading
+
+from app.db import check_db_state
+from app.exceptions import SoulSenseError
+from app.questions import get_question_bank, preload_all_question_sets
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_database_ready = False
+
+
+def ensure_database() -> bool:
+    """Create/verify the database schema (once per process)."""
+    global _database_ready
+    with _lock:
+        if not _database_ready:
+            _database_ready = check_db_state()
+        return _database_ready
+
+
+def warm_question_cache(background: bool = True):
+    """Load the question bank into the memory and snapshot caches."""
+    if background:
+        # Errors are logged by the worker thread
+        preload_all_question_sets()
+        return
+    try:
+        bank = get_question_bank()
+        logger.debug(f"Question cache warmed with {len(bank)} questions")
+    except SoulSenseError as e:
+        logger.warning(f"Could not warm question cache: {e}")
+
+
+def bootstrap(warm_cache: bool = True, background: bool = True) -> bool:
+    """
+    Prepare the application for database use.
+
+    Args:
+        warm_cache: Also load the question bank into the caches
+        background: Warm the cache in a background thread
+
+    Returns:
+        True if the database schema is ready
+    """
+    ready = ensure_database()
+    if warm_cache:
+        warm_question_cache(background)
+    return ready
@@ -9,20 +9,16 @@ from typing import Optional
 # Ensure app is in path
 sys.path.append(os.getcwd())
 
+from app.startup_profile import startup_profiler
+# Must run before the app imports below so --profile-startup can time them
+startup_profiler.enable_from_argv()
+
 from app.services.exam_service import ExamSession
-from app.questions import load_questions, get_random_questions_by_age
+from app.bootstrap import bootstrap
+from app.questions import get_question_bank, get_random_questions_by_age
 from app.utils import compute_age_group
 from app.logger import setup_logging
 
-# Optional NLTK
-try:
-    import nltk
-    from nltk.sentiment import SentimentIntensityAnalyzer
-    SENTIMENT_AVAILABLE = True
-except ImportError:
-    SENTIMENT_AVAILABLE = False
-    SentimentIntensityAnalyzer = None
-
 # Simple logging config for CLI (avoid file spam if just testing)
 # But respect main logger if needed.
 logging.basicConfig(level=logging.ERROR) 
@@ -78,16 +74,7 @@ class SoulSenseCLI:
         from app.utils import load_settings, save_settings
         self.settings = load_settings()
         self.num_questions = self.settings.get("question_count", 10)
-        
-        # Download NLTK if needed (quietly)
-        if SENTIMENT_AVAILABLE:
-            try:
-                nltk.data.find('sentiment/vader_lexicon.zip')
-            except LookupError:
-                try:
-                    nltk.download('vader_lexicon', quiet=True)
-                except Exception:
-                    pass
+        # Sentiment (VADER) is loaded on first reflection by app.services.sentiment_service
 
     def clear_screen(self):
         os.system('cls' if os.name == 'nt' else 'clear')
@@ -101,6 +88,7 @@ class SoulSenseCLI:
         print("="*60 + "\n")
 
     def get_input(self, prompt: str) -> str:
+        startup_profiler.mark("first_prompt")
         try:
             return input(prompt).strip()
         except EOFError:
@@ -179,10 +167,12 @@ class SoulSenseCLI:
     def initialize_session(self):
         """Load questions and start session"""
         try:
-            all_questions = load_questions(age=self.age)
+            question_bank = get_question_bank()
             # Use configured number of questions
-            num_q = min(self.num_questions, len(all_questions))
-            selected_questions = get_random_questions_by_age(all_questions, self.age, num_q)
+            num_q = min(self.num_questions, question_bank.count(self.age))
+            if num_q == 0:
+                raise ValueError("Not enough questions for this age")
+            selected_questions = get_random_questions_by_age(question_bank, self.age, num_q)
             
             self.session = ExamSession(self.username, self.age, self.age_group, selected_questions)
             self.session.start_exam()
@@ -836,11 +826,35 @@ class SoulSenseCLI:
                 print(f"   Sentiment:   {avg_sentiment:.1f}")
                 print(f"   Exams Taken: {count}")
                 
+                self._print_cohort_profiles(cursor)
+                
         except Exception as e:
             print(f"Error: {e}")
         
         self.get_input("\nPress Enter to continue...")
 
+    def _print_cohort_profiles(self, cursor):
+        """Print the clustering profile of this user and of the whole cohort"""
+        try:
+            from app.ml.clustering import EMOTIONAL_PROFILES, get_cohort_profiles
+        except ImportError:
+            return
+        
+        cursor.execute("SELECT DISTINCT username FROM scores WHERE username IS NOT NULL")
+        usernames = [row[0] for row in cursor.fetchall()]
+        cohort = get_cohort_profiles(usernames)
+        if cohort.empty:
+            return
+        
+        print("")
+        print(colorize("Cohort Profiles:", Colors.BOLD))
+        mine = cohort[cohort['username'] == self.username]
+        counts = cohort['cluster_id'].value_counts()
+        for cluster_id, profile in EMOTIONAL_PROFILES.items():
+            share = 100.0 * counts.get(cluster_id, 0) / len(cohort)
+            marker = " <- you" if (mine['cluster_id'] == cluster_id).any() else ""
+            print(f"   {profile['emoji']} {profile['name']:<24} {share:5.1f}%{marker}")
+
     def show_ai_insights(self):
         """Display AI-generated insights"""
         self.clear_screen()
@@ -992,8 +1006,10 @@ class SoulSenseCLI:
 
 if __name__ == "__main__":
     if '--help' in sys.argv:
-        print("Soul Sense CLI - Run with 'python -m app.cli'")
+        print("Soul Sense CLI - Run with 'python -m app.cli [--profile-startup]'")
         sys.exit(0)
         
+    # Schema check now; the question bank loads while the user signs in
+    bootstrap()
     cli = SoulSenseCLI()
     cli.run()
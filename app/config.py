@@ -11,7 +11,8 @@ CONFIG_PATH = os.path.join(BASE_DIR, "config.json")
 DEFAULT_CONFIG = {
     "database": {
         "filename": "soulsense.db",
-        "path": "db"
+        "path": "db",
+        "pool_size": 5
     },
     "ui": {
         "theme": "light",
@@ -20,6 +21,12 @@ DEFAULT_CONFIG = {
     "features": {
         "enable_journal": True,
         "enable_analytics": True
+    },
+    "exam": {
+        "buffer_responses": False,
+        "response_buffer_size": 50,
+        "response_flush_interval": 0,
+        "response_journal_dir": None
     }
 }
 
@@ -34,7 +41,7 @@ def load_config():
             config = json.load(f)
             # Use deepcopy to avoid mutating the global DEFAULT_CONFIG
             merged = copy.deepcopy(DEFAULT_CONFIG)
-            for section in ["database", "ui", "features"]:
+            for section in ["database", "ui", "features", "exam"]:
                 if section in config:
                     merged[section].update(config[section])
             return merged
@@ -63,6 +70,7 @@ _config = load_config()
 # Expose Settings
 DB_DIR_NAME = _config["database"]["path"]
 DB_FILENAME = _config["database"]["filename"]
+DB_POOL_SIZE = _config["database"]["pool_size"]
 
 # Directory Definitions
 DATA_DIR = os.path.join(BASE_DIR, "data")
@@ -106,4 +114,7 @@ THEME = _config["ui"]["theme"]
 ENABLE_JOURNAL = _config["features"]["enable_journal"]
 ENABLE_ANALYTICS = _config["features"]["enable_analytics"]
 
+# Exam persistence (write-behind response buffer)
+EXAM_CONFIG = _config["exam"]
+
 APP_CONFIG = _config
@@ -3,18 +3,25 @@ import os
 import sqlite3
 import logging
 from contextlib import contextmanager
-from sqlalchemy import create_engine, inspect, text
+from sqlalchemy import create_engine, inspect, text, event
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.config import DATABASE_URL, DB_PATH
+from app.config import DATABASE_URL, DB_PATH, DB_POOL_SIZE
 from app.exceptions import DatabaseError
+from app.db_pool import UI_ACQUIRE_TIMEOUT, apply_sqlite_pragmas, get_pool
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
 # Create engine and session
 engine = create_engine(DATABASE_URL, echo=False)
+
+@event.listens_for(engine, "connect")
+def _configure_sqlite_connection(dbapi_connection, connection_record):
+    """Apply the standard PRAGMA set to every new engine connection"""
+    apply_sqlite_pragmas(dbapi_connection)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_engine():
@@ -43,7 +50,10 @@ def safe_db_context():
         session.close()
 
 def check_db_state():
-    """Check and create database tables if needed"""
+    """
+    Check and create database tables if needed.
+    Not run on import; entry points call it through app.bootstrap.
+    """
     logger.info("Checking database state...")
     
     try:
@@ -130,16 +140,26 @@ def create_tables_directly():
         logger.error(f"Failed to create tables: {e}")
         raise DatabaseError("Failed to initialize database", original_exception=e)
 
-# Initialize database
-check_db_state()
-
 # Backward compatibility
-def get_connection(db_path=None):
-    try:
-        return sqlite3.connect(db_path or DB_PATH)
-    except sqlite3.Error as e:
-        logger.error(f"Failed to connect to raw database: {e}", exc_info=True)
-        raise DatabaseError("Failed to connect to raw database.", original_exception=e)
+def get_connection(db_path=None, timeout=None):
+    """
+    Check out a dedicated, pre-configured raw connection from the pool.
+    close() rolls back uncommitted work and returns the handle for reuse;
+    a handle dropped without close() is reclaimed when garbage-collected.
+    timeout bounds the wait for a free connection (UI code passes
+    UI_ACQUIRE_TIMEOUT). Prefer pooled_connection() in new code.
+    """
+    return get_pool(db_path or DB_PATH, DB_POOL_SIZE).acquire(timeout)
+
+@contextmanager
+def pooled_connection(db_path=None):
+    """Context manager for raw sqlite3 work on a pooled connection (commit/rollback/release)"""
+    with get_pool(db_path or DB_PATH, DB_POOL_SIZE).connection() as conn:
+        yield conn
+
+def get_pool_stats(db_path=None):
+    """Return counters for the raw connection pool"""
+    return get_pool(db_path or DB_PATH, DB_POOL_SIZE).stats()
 
 def get_user_settings(user_id):
     """
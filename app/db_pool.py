@@ -0,0 +1,286 @@
+"""
+Pooled SQLite connection layer.
+
+Every connection handed out by this module is configured with the same
+PRAGMA set (WAL, synchronous, cache, mmap, busy timeout, foreign keys),
+so raw sqlite3 callers and the SQLAlchemy engine behave identically.
+Connections are kept in a bounded per-thread pool because sqlite3
+connections may not cross threads. At most max_size connections are
+checked out at once; a handle that is dropped without close() gives its
+slot back when it is garbage-collected.
+"""
+
+import gc
+import sqlite3
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from app.exceptions import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+# Applied to every new connection (raw sqlite3 and SQLAlchemy engine alike)
+SQLITE_PRAGMAS = (
+    ("journal_mode", "WAL"),          # Write-Ahead Logging for better concurrency
+    ("synchronous", "NORMAL"),        # Good balance of safety and performance
+    ("cache_size", -2000),            # 2MB cache
+    ("temp_store", "MEMORY"),         # Store temp tables in memory
+    ("mmap_size", 268435456),         # 256MB memory map
+    ("busy_timeout", 5000),           # Wait up to 5s on a locked database
+    ("foreign_keys", "ON"),           # Enable foreign key constraints
+)
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_ACQUIRE_TIMEOUT = 30.0  # Seconds to wait for a free connection
+UI_ACQUIRE_TIMEOUT = 2.0        # Shorter wait for callers on the Tk thread
+RECLAIM_WAIT = 0.05             # Wait for a release before collecting dropped handles
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas=SQLITE_PRAGMAS):
+    """Apply the standard PRAGMA set to a DB-API sqlite3 connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas:
+            try:
+                cursor.execute(f"PRAGMA {name} = {value}")
+            except sqlite3.Error as e:
+                # e.g. WAL is not available for some VFS / read-only files
+                logger.warning(f"Could not apply PRAGMA {name}={value}: {e}")
+    finally:
+        cursor.close()
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that returns itself to its pool on close().
+    Legacy callers that call conn.close() therefore recycle the handle
+    instead of destroying it.
+    """
+    _pool = None
+    _checkout = None  # weakref.finalize holding the pool slot while checked out
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.release(self)
+        else:
+            super().close()
+
+    def close_underlying(self):
+        """Really close the sqlite3 handle."""
+        self._pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """
+    Bounded pool of pre-configured sqlite3 connections.
+
+    - acquire()/release() hand out and recycle connections; each caller
+      gets its own handle, and at most max_size are checked out at once
+    - connection() is the context-manager form (commit/rollback + release)
+    - idle handles are kept per thread (at most max_size per thread)
+    """
+
+    def __init__(self, db_path, max_size=DEFAULT_POOL_SIZE, pragmas=SQLITE_PRAGMAS,
+                 timeout=DEFAULT_ACQUIRE_TIMEOUT):
+        self.db_path = db_path
+        self.max_size = max(1, int(max_size))
+        self.pragmas = pragmas
+        self.timeout = timeout
+        self._local = threading.local()
+        # Reentrant: a checkout finalizer may run (via gc) while it is held
+        self._lock = threading.RLock()
+        self._available = threading.Condition(self._lock)
+        self._closed = False
+        self._collecting = False  # A thread is running gc.collect() for this pool
+        self._all = weakref.WeakSet()  # Every live handle, across threads, for close_all()
+        self._stats = {
+            "created": 0,
+            "reused": 0,
+            "released": 0,
+            "discarded": 0,
+            "reclaimed": 0,
+            "in_use": 0,
+        }
+
+    # ---------------- internals ----------------
+
+    def _idle(self):
+        idle = getattr(self._local, "idle", None)
+        if idle is None:
+            idle = self._local.idle = []
+        return idle
+
+    def _bump(self, key, delta=1):
+        with self._lock:
+            self._stats[key] += delta
+
+    def _create(self):
+        try:
+            conn = sqlite3.connect(self.db_path, factory=PooledConnection)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to connect to raw database: {e}", exc_info=True)
+            raise DatabaseError("Failed to connect to raw database.", original_exception=e)
+        apply_sqlite_pragmas(conn, self.pragmas)
+        conn._pool = self
+        with self._lock:
+            self._stats["created"] += 1
+            self._all.add(conn)
+        return conn
+
+    def _free_slot(self, reclaimed=False):
+        with self._available:
+            self._stats["in_use"] -= 1
+            if reclaimed:
+                self._stats["reclaimed"] += 1
+            self._available.notify()
+
+    def _collect_dropped(self):
+        """Run the cycle collector with the pool lock released (caller holds it once)."""
+        if self._collecting:
+            return  # Another waiter is already collecting; its finalizers notify us
+        self._collecting = True
+        self._available.release()
+        try:
+            gc.collect()
+        finally:
+            self._available.acquire()
+            self._collecting = False
+
+    def _destroy(self, conn):
+        with self._lock:
+            self._all.discard(conn)
+        try:
+            conn.close_underlying()
+        except sqlite3.Error:
+            pass
+
+    # ---------------- public API ----------------
+
+    def acquire(self, timeout=None):
+        """
+        Check out a connection for the calling thread.
+        Waits up to timeout seconds (default: self.timeout) while max_size
+        connections are in use, then raises DatabaseError.
+
+        Handles dropped without close() give their slot back from their
+        checkout finalizer. sqlite3 handles sit in reference cycles, so if
+        no slot frees up shortly one cycle collection is run, outside the
+        pool lock and by one waiting thread at a time.
+        """
+        if self._closed:
+            raise DatabaseError("Connection pool has been closed.")
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        has_slot = lambda: self._stats["in_use"] < self.max_size
+        with self._available:
+            if not self._available.wait_for(has_slot, min(RECLAIM_WAIT, timeout)):
+                self._collect_dropped()
+                if not self._available.wait_for(has_slot, max(0.0, deadline - time.monotonic())):
+                    raise DatabaseError(
+                        f"Connection pool exhausted: {self.max_size} connections in use for {self.db_path}"
+                    )
+            self._stats["in_use"] += 1
+
+        try:
+            idle = self._idle()
+            if idle:
+                conn = idle.pop()
+                self._bump("reused")
+            else:
+                conn = self._create()
+        except Exception:
+            self._free_slot()
+            raise
+        conn._checkout = weakref.finalize(conn, self._free_slot, True)
+        conn._checkout.atexit = False
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the calling thread's idle list."""
+        checkout = conn._checkout
+        if checkout is None or not checkout.detach():
+            return  # Not checked out (already released)
+        conn._checkout = None
+        self._free_slot()
+
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._bump("discarded")
+            self._destroy(conn)
+            return
+
+        idle = self._idle()
+        if self._closed or len(idle) >= self.max_size:
+            self._bump("discarded")
+            self._destroy(conn)
+        else:
+            idle.append(conn)
+            self._bump("released")
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager yielding a pooled connection.
+        Commits on success, rolls back on error, always returns the handle.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Database error: {e}", exc_info=True)
+            raise DatabaseError("A database error occurred.", original_exception=e)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        """Snapshot of pool counters."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["open"] = len(self._all)
+        snapshot["idle_this_thread"] = len(self._idle())
+        snapshot["max_size"] = self.max_size
+        snapshot["db_path"] = self.db_path
+        return snapshot
+
+    def close_all(self):
+        """Close every connection owned by this pool (all threads)."""
+        self._closed = True
+        with self._lock:
+            conns = list(self._all)
+        for conn in conns:
+            self._destroy(conn)
+        self._local = threading.local()
+        logger.info(f"Connection pool for {self.db_path} closed ({len(conns)} connections)")
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path, max_size=DEFAULT_POOL_SIZE):
+    """Return the process-wide pool for db_path, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None or pool._closed:
+            pool = _pools[db_path] = ConnectionPool(db_path, max_size=max_size)
+        return pool
+
+
+def close_all_pools():
+    """Close every pool created by get_pool()."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
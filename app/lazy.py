@@ -0,0 +1,78 @@
+"""
+Lightweight stand-ins for heavy optional components.
+
+The GUI used to import matplotlib, reportlab and sklearn (through the
+dashboard, the PDF report and the ML predictor) before the splash screen
+was drawn. A LazyObject is created instead and the real object is built
+on first use. As with the old `try: import ... except ImportError: X = None`
+blocks, a component that fails to load is falsy.
+"""
+import importlib
+import logging
+import threading
+from typing import Any, Callable, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LazyObject:
+    """Build an object with factory() on first use and forward to it."""
+
+    def __init__(self, factory: Callable[[], Any], description: str,
+                 errors: Tuple[Type[BaseException], ...] = (Exception,)):
+        self._factory = factory
+        self._description = description
+        self._errors = errors
+        self._value = _MISSING
+        self._lock = threading.Lock()
+
+    def resolve(self) -> Optional[Any]:
+        """The real object, or None if it could not be loaded (logged once)."""
+        if self._value is _MISSING:
+            with self._lock:
+                if self._value is _MISSING:
+                    try:
+                        self._value = self._factory()
+                    except self._errors as e:
+                        logger.warning(f"Could not load {self._description}: {e}")
+                        self._value = None
+        return self._value
+
+    @property
+    def loaded(self) -> bool:
+        """True once the factory has run (successfully or not)."""
+        return self._value is not _MISSING
+
+    def __bool__(self) -> bool:
+        return self.resolve() is not None
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            # Private names are never forwarded (also guards copy/pickle before __init__)
+            raise AttributeError(name)
+        value = self.resolve()
+        if value is None:
+            raise AttributeError(f"{self._description} is not available")
+        return getattr(value, name)
+
+    def __call__(self, *args, **kwargs):
+        value = self.resolve()
+        if value is None:
+            raise RuntimeError(f"{self._description} is not available")
+        return value(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyObject {self._description} ({state})>"
+
+
+def lazy_import(module: str, attribute: Optional[str] = None) -> LazyObject:
+    """A module (or one of its attributes) imported on first use; falsy on ImportError."""
+    def load():
+        loaded = importlib.import_module(module)
+        return getattr(loaded, attribute) if attribute else loaded
+
+    description = f"{module}.{attribute}" if attribute else module
+    return LazyObject(load, description, errors=(ImportError,))
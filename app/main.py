@@ -1,4 +1,9 @@
-﻿import tkinter as tk
+﻿import sys
+from app.startup_profile import startup_profiler
+# Must run before the imports below so --profile-startup can time them
+startup_profiler.enable_from_argv()
+
+import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 import logging
 import threading
@@ -7,7 +12,6 @@ from datetime import datetime
 import json
 import webbrowser
 import os
-import sys
 import random # For random tips
 from app.ui.styles import UIStyles, ColorSchemes
 from app.ui.auth import AuthManager
@@ -16,31 +20,20 @@ from app.ui.results import ResultsManager
 from app.ui.settings import SettingsManager
 from app.i18n_manager import get_i18n
 
-# NLTK (optional) - import defensively so app can run without it
-try:
-    import nltk
-    from nltk.sentiment import SentimentIntensityAnalyzer
-    SENTIMENT_AVAILABLE = True
-except Exception:
-    SENTIMENT_AVAILABLE = False
-    SentimentIntensityAnalyzer = None
 import traceback # Keep this, it was in the original and not explicitly removed
 
-from app.db import get_session, get_connection
+from app.bootstrap import bootstrap
+from app.db import get_session
+from app.db_pool import close_all_pools
 from app.config import APP_CONFIG
 from app.constants import BENCHMARK_DATA
 from app.models import User, Score, Response, Question
 from app.exceptions import DatabaseError, ValidationError, AuthenticationError, APIConnectionError, SoulSenseError, ResourceError
 from app.logger import setup_logging
-from app.analysis.data_cleaning import DataCleaner
 from app.utils import load_settings, save_settings, compute_age_group
 from app.questions import load_questions
 
-# Try importing bias checker (optional)
-try:
-    from scripts.check_gender_bias import SimpleBiasChecker
-except ImportError:
-    SimpleBiasChecker = None
+from app.lazy import LazyObject, lazy_import
 
 # Try importing optional features
 try:
@@ -49,28 +42,9 @@ except ImportError:
     logging.warning("Could not import JournalFeature")
     JournalFeature = None
 
-try:
-    from app.ml.predictor import SoulSenseMLPredictor
-except ImportError:
-    logging.warning("Could not import SoulSenseMLPredictor")
-    SoulSenseMLPredictor = None
-
-try:
-    from app.ui.dashboard import AnalyticsDashboard
-except ImportError:
-    logging.warning("Could not import AnalyticsDashboard")
-    AnalyticsDashboard = None
-
-# Ensure VADER lexicon is downloaded when NLTK is available
-if SENTIMENT_AVAILABLE:
-    try:
-        nltk.data.find('sentiment/vader_lexicon.zip')
-    except LookupError:
-        try:
-            nltk.download('vader_lexicon', quiet=True)
-        except Exception:
-            # If download fails, continue without sentiment functionality
-            SENTIMENT_AVAILABLE = False
+# Heavy optional features (matplotlib, sklearn) load on first use; falsy if unavailable
+SimpleBiasChecker = lazy_import("scripts.check_gender_bias", "SimpleBiasChecker")
+AnalyticsDashboard = lazy_import("app.ui.dashboard", "AnalyticsDashboard")
 
 # ---------------- LOGGING SETUP ----------------
 setup_logging()
@@ -130,38 +104,35 @@ logging.basicConfig(
 
 logging.info("Application started")
 
-# ---------------- DB INIT ----------------
-conn = get_connection()
-cursor = conn.cursor()
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS scores (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    username TEXT,
-    total_score INTEGER,
-    age INTEGER,
-    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-)
-""")
-
-conn.commit()
-
 # ---------------- LOAD QUESTIONS FROM DB ----------------
-try:
-    rows = load_questions()  # [(id, text, tooltip, min_age, max_age)]
-    # Store (text, tooltip) tuple
-    all_questions = [(q[1], q[2]) for q in rows]
-    
-    if not all_questions:
-        raise ResourceError("Question bank empty: No questions found in database.")
+# (text, tooltip) of every active question, filled in by load_all_questions()
+all_questions = []
 
-    logging.info("Loaded %s total questions from DB", len(all_questions))
+def load_all_questions():
+    """Load the question bank for the GUI (exits if it cannot be loaded)"""
+    global all_questions
+    try:
+        rows = load_questions()  # [(id, text, tooltip, min_age, max_age)]
+        # Store (text, tooltip) tuple
+        all_questions = [(q[1], q[2]) for q in rows]
+        
+        if not all_questions:
+            raise ResourceError("Question bank empty: No questions found in database.")
+
+        logging.info("Loaded %s total questions from DB", len(all_questions))
 
-except Exception as e:
-    show_error("Fatal Error", "Question bank could not be loaded.\nThe application cannot start.", e)
-    sys.exit(1)
+    except Exception as e:
+        show_error("Fatal Error", "Question bank could not be loaded.\nThe application cannot start.", e)
+        sys.exit(1)
 
 # ---------------- GUI ----------------
+def _create_ml_predictor():
+    from app.ml.risk_predictor import RiskPredictor
+    # The model file itself is read on the first prediction
+    predictor = RiskPredictor(lazy=True)
+    logging.info("ML Predictor initialized successfully")
+    return predictor
+
 class SoulSenseApp:
     def __init__(self, root):
         self.root = root
@@ -178,15 +149,8 @@ class SoulSenseApp:
         self.results = ResultsManager(self)
         self.settings_manager = SettingsManager(self)
         
-        # Initialize ML Predictor
-
-        try:
-            from app.ml.risk_predictor import RiskPredictor
-            self.ml_predictor = RiskPredictor()
-            logging.info("ML Predictor initialized successfully")
-        except Exception as e:
-            logging.error(f"Failed to initialize ML Predictor: {e}")
-            self.ml_predictor = None
+        # ML Predictor (joblib/sklearn) is loaded when AI insights are first needed
+        self.ml_predictor = LazyObject(_create_ml_predictor, "ML Predictor")
 
         # Initialize Journal Feature
         if JournalFeature:
@@ -247,14 +211,7 @@ class SoulSenseApp:
         # Initialize Sentiment Variables
         self.sentiment_score = 0.0 
         self.reflection_text = ""
-        
-        # Initialize Sentiment Analyzer
-        try:
-            self.sia = SentimentIntensityAnalyzer()
-            logging.info("SentimentIntensityAnalyzer initialized successfully")
-        except Exception as e:
-            logging.error(f"Failed to initialize SentimentIntensityAnalyzer: {e}")
-            self.sia = None
+        # Sentiment analysis is loaded lazily by app.services.sentiment_service
 
         logging.error("\n\n>>> APP INITIALIZED V2.1 <<<\n")
         self.current_question = 0
@@ -663,8 +620,9 @@ class SoulSenseApp:
         self.results.reset_test()
 
     def force_exit(self):
+        # Close pooled connections directly; checking one out could block on a busy pool
         try:
-            conn.close()
+            close_all_pools()
         except Exception:
             pass
         self.root.destroy()
@@ -699,13 +657,21 @@ class SplashScreen:
     def close_after_delay(self, delay, callback):
         self.root.after(delay, callback)
 
+def startup():
+    """Schema check and question loading, run while the splash is showing"""
+    bootstrap(warm_cache=False)
+    load_all_questions()
+
 if __name__ == "__main__":
     splash_root = tk.Tk()
     splash = SplashScreen(splash_root)
+    splash_root.bind("<Map>", lambda event: startup_profiler.mark("first_frame"), add="+")
+    splash_root.after_idle(startup)
 
     def launch_main_app():
         splash_root.destroy()
         root = tk.Tk()
+        root.bind("<Map>", lambda event: startup_profiler.mark("main_window"), add="+")
         app = SoulSenseApp(root)
         root.protocol("WM_DELETE_WINDOW", app.force_exit)
         root.mainloop()
@@ -1,5 +1,26 @@
-from .predictor import SoulSenseMLPredictor
-from .bias_checker import SimpleBiasChecker
-from .versioning import ModelVersioningManager
-from .clustering import EmotionalProfileClusterer
-from .score_analyzer import ScoreAnalyzer
+# Submodules are imported on first attribute access (PEP 562) so that
+# importing one of them, e.g. app.ml.risk_predictor, does not pull in
+# sklearn through all the others.
+import importlib
+
+_EXPORTS = {
+    "SoulSenseMLPredictor": ".predictor",
+    "SimpleBiasChecker": ".bias_checker",
+    "ModelVersioningManager": ".versioning",
+    "EmotionalProfileClusterer": ".clustering",
+    "ScoreAnalyzer": ".score_analyzer",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -4,15 +4,21 @@ import logging
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
 from pathlib import Path
+import copy
 import json
+import os
 import pickle
+import time
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
 
 # ML imports
-from sklearn.cluster import KMeans, DBSCAN, AgglomerativeClustering
+from sklearn.cluster import KMeans, MiniBatchKMeans, DBSCAN, AgglomerativeClustering
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from sklearn.decomposition import PCA
 from sklearn.metrics import silhouette_score, calinski_harabasz_score, davies_bouldin_score
 from sklearn.manifold import TSNE
+from threadpoolctl import threadpool_limits
 
 # Optional visualization imports
 try:
@@ -25,6 +31,7 @@ except ImportError:
 # Database imports
 from app.db import get_session, safe_db_context
 from app.models import Score, Response, User
+from sqlalchemy import func, select
 
 logger = logging.getLogger(__name__)
 
@@ -129,72 +136,182 @@ class EmotionalFeatureExtractor:
             'response_variance'
         ]
     
+    # Rows fetched per round-trip while streaming the scores scan
+    SCAN_BATCH_SIZE = 50000
+    
     def extract_user_features(self, username: str) -> Optional[Dict[str, float]]:
         """Extract emotional features for a single user."""
         try:
             with safe_db_context() as session:
-                # Get all scores for the user
-                scores = session.query(Score).filter_by(username=username).order_by(Score.timestamp).all()
-                
-                if not scores or len(scores) < 1:
-                    return None
-                
-                # Get all responses for the user
-                responses = session.query(Response).filter_by(username=username).all()
-                
-                # Extract score-based features
-                score_values = [s.total_score for s in scores if s.total_score is not None]
-                sentiment_values = [s.sentiment_score for s in scores if s.sentiment_score is not None]
-                
-                if not score_values:
-                    return None
-                
-                features = {
-                    'username': username,
-                    'avg_total_score': np.mean(score_values),
-                    'score_std': np.std(score_values) if len(score_values) > 1 else 0,
-                    'avg_sentiment': np.mean(sentiment_values) if sentiment_values else 0,
-                    'sentiment_std': np.std(sentiment_values) if len(sentiment_values) > 1 else 0,
-                    'score_trend': self._calculate_trend(score_values),
-                    'response_consistency': self._calculate_consistency(responses),
-                    'emotional_range': max(score_values) - min(score_values) if len(score_values) > 1 else 0,
-                    'assessment_frequency': len(scores),
-                    'avg_response_value': self._avg_response_value(responses),
-                    'response_variance': self._response_variance(responses)
-                }
-                
-                return features
-                
+                df = self._extract_features_frame(session, usernames=[username])
         except Exception as e:
             logger.error(f"Error extracting features for {username}: {e}")
             return None
+        
+        if df.empty:
+            return None
+        return df.iloc[0].to_dict()
     
     def extract_all_users_features(self) -> pd.DataFrame:
         """Extract features for all users in the database."""
-        features_list = []
-        
         try:
             with safe_db_context() as session:
-                # Get all unique usernames
-                usernames = session.query(Score.username).distinct().all()
-                usernames = [u[0] for u in usernames if u[0]]
-                
+                df = self._extract_features_frame(session)
         except Exception as e:
-            logger.error(f"Error getting usernames: {e}")
+            logger.error(f"Error extracting user features: {e}")
             return pd.DataFrame()
         
-        for username in usernames:
-            features = self.extract_user_features(username)
-            if features:
-                features_list.append(features)
-        
-        if not features_list:
+        if df.empty:
             return pd.DataFrame()
         
-        df = pd.DataFrame(features_list)
         logger.info(f"Extracted features for {len(df)} users")
         return df
     
+    def extract_users_features(self, usernames: List[str], batch_size: int = 500) -> pd.DataFrame:
+        """Extract features for a specific set of users (e.g. those with new exams)."""
+        usernames = list(dict.fromkeys(u for u in usernames if u))
+        frames = []
+        try:
+            with safe_db_context() as session:
+                for start in range(0, len(usernames), batch_size):
+                    frames.append(self._extract_features_frame(
+                        session, usernames=usernames[start:start + batch_size]
+                    ))
+        except Exception as e:
+            logger.error(f"Error extracting user features: {e}")
+            return pd.DataFrame()
+        
+        frames = [f for f in frames if not f.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    
+    def _extract_features_frame(self, session, usernames: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Set-based feature extraction: one GROUP BY over responses plus one
+        streamed scan of scores (ordered by the username/timestamp index).
+        Each fetched chunk is folded into per-user running sums, so memory
+        grows with the number of users, not the number of score rows.
+        
+        Produces the same features as the per-user helpers below.
+        """
+        # Response aggregates per user
+        value = Response.response_value
+        stmt = select(
+            Response.username,
+            func.count(),
+            func.count(value),
+            func.sum(value),
+            func.sum(value * value),
+        ).group_by(Response.username)
+        if usernames is not None:
+            stmt = stmt.where(Response.username.in_(usernames))
+        responses = pd.DataFrame(
+            session.execute(stmt).all(),
+            columns=['username', 'n_rows', 'n_values', 'value_sum', 'value_sq_sum'],
+        ).set_index('username')
+        
+        # Stream score rows in timestamp order per user
+        stmt = select(Score.username, Score.total_score, Score.sentiment_score).where(
+            Score.username.isnot(None), Score.username != ''
+        ).order_by(Score.username, Score.timestamp)
+        if usernames is not None:
+            stmt = stmt.where(Score.username.in_(usernames))
+        result = session.execute(stmt)
+        partials = []
+        # Rows are ordered by user, so only the last user of a chunk can
+        # continue into the next one: carry its score count for positions
+        carry_user, carry_n = None, 0
+        while True:
+            rows = result.fetchmany(self.SCAN_BATCH_SIZE)
+            if not rows:
+                break
+            chunk = pd.DataFrame(rows, columns=['username', 'total_score', 'sentiment_score'])
+            partials.append(self._fold_score_chunk(chunk, carry_user, carry_n))
+            last = chunk['username'].iat[-1]
+            carry_n = int(partials[-1].at[last, 'n']) + (carry_n if last == carry_user else 0)
+            carry_user = last
+        if not partials:
+            return pd.DataFrame()
+        sums = pd.concat(partials)
+        if len(partials) > 1:
+            sums = sums.groupby(level=0, sort=True).agg(
+                {col: ('min' if col.endswith('_min') else 'max' if col.endswith('_max') else 'sum')
+                 for col in sums.columns}
+            )
+        
+        # All score rows count towards frequency; numeric features use non-null values
+        sums = sums[sums['n'] > 0]
+        if sums.empty:
+            return pd.DataFrame()
+        n = sums['n'].astype(float)
+        varies = (n > 1) & (sums['y_max'] > sums['y_min'])
+        features = pd.DataFrame(index=sums.index)
+        features['avg_total_score'] = sums['y'] / n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ss_y = (sums['yy'] - sums['y'] * sums['y'] / n).clip(lower=0.0)
+            features['score_std'] = np.sqrt(ss_y / n).where(varies, 0.0)
+            
+            ns = sums['ns'].astype(float)
+            avg_sentiment = sums['s'] / ns
+            ss_s = (sums['ss'] - sums['s'] * avg_sentiment).clip(lower=0.0)
+            features['avg_sentiment'] = avg_sentiment.where(ns > 0, 0.0)
+            features['sentiment_std'] = np.sqrt(ss_s / ns).where(
+                (ns > 1) & (sums['s_max'] > sums['s_min']), 0.0
+            )
+            
+            # Trend: correlation of score with its position 0..n-1 in the user's history
+            sum_x = n * (n - 1) / 2
+            ss_x = (n - 1) * n * (2 * n - 1) / 6 - sum_x * sum_x / n
+            cov = sums['xy'] - sum_x * sums['y'] / n
+            trend = cov / np.sqrt(ss_x * ss_y)
+        features['score_trend'] = trend.where(varies, 0.0).fillna(0.0)
+        g_min, g_max = sums['y_min'], sums['y_max']
+        n = sums['n']
+        
+        # Response features (population variance from running sums)
+        r = responses.reindex(n.index)
+        n_values = r['n_values'].fillna(0)
+        has_responses = r['n_rows'].fillna(0) > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = r['value_sum'] / n_values
+            variance = (r['value_sq_sum'] / n_values - mean * mean).clip(lower=0.0)
+        consistency = (1 - variance / 4.0).clip(0.0, 1.0)  # 4.0 = max variance for 1-5 scale
+        features['response_consistency'] = np.where(
+            ~has_responses, 0.0, np.where(n_values < 2, 1.0, consistency)
+        )
+        features['emotional_range'] = (g_max - g_min).where(n > 1, 0)
+        features['assessment_frequency'] = sums['rows']
+        features['avg_response_value'] = mean.where(n_values > 0, 2.5)
+        features['response_variance'] = variance.where(n_values > 1, 0.0)
+        
+        features = features.reset_index()
+        return features[['username'] + self.feature_names]
+    
+    @staticmethod
+    def _fold_score_chunk(chunk: pd.DataFrame, carry_user: Optional[str], carry_n: int) -> pd.DataFrame:
+        """
+        Per-user sums for one chunk of the ordered scores scan: row count,
+        non-null score count/sum/sum of squares/min/max, the position-weighted
+        score sum for the trend, and the same moments for sentiment.
+        """
+        y = pd.to_numeric(chunk['total_score'], errors='coerce')
+        s = pd.to_numeric(chunk['sentiment_score'], errors='coerce')
+        has_y = y.notna()
+        position = has_y.groupby(chunk['username']).cumsum() - 1
+        position = position + np.where(chunk['username'] == carry_user, carry_n, 0)
+        parts = pd.DataFrame({
+            'username': chunk['username'],
+            'rows': 1,
+            'n': has_y.astype(int),
+            'y': y, 'yy': y * y, 'xy': position * y,
+            'ns': s.notna().astype(int),
+            's': s, 'ss': s * s,
+        })
+        g = parts.groupby('username', sort=True)
+        sums = g[['rows', 'n', 'y', 'yy', 'xy', 'ns', 's', 'ss']].sum()
+        sums['y_min'], sums['y_max'] = g['y'].min(), g['y'].max()
+        sums['s_min'], sums['s_max'] = g['s'].min(), g['s'].max()
+        return sums
+    
     def _calculate_trend(self, scores: List[float]) -> float:
         """Calculate score trend (positive = improving, negative = declining)."""
         if len(scores) < 2:
@@ -240,23 +357,291 @@ class EmotionalFeatureExtractor:
         return np.var(values) if len(values) > 1 else 0.0
 
 
+# ==============================================================================
+# USER PROFILE STORE
+# ==============================================================================
+
+class UserProfileStore(MutableMapping):
+    """
+    Compact username -> cluster assignment store.
+    
+    Assignments live in parallel arrays (cluster_id int8, confidence float32,
+    assigned_at datetime64) indexed through a username -> row dict, and are
+    persisted as those arrays inside the model pickle (or as a standalone
+    .npz with save()). Profile descriptors are not
+    copied per user: items are materialized from EMOTIONAL_PROFILES by id
+    on access. Per-cluster membership comes from a sorted index that is
+    rebuilt lazily after writes.
+    """
+    
+    FILENAME = "user_profiles.npz"
+    
+    def __init__(self):
+        self._rows: Dict[str, int] = {}
+        self._usernames: List[str] = []
+        self._cluster_ids = np.empty(0, dtype=np.int8)
+        self._confidences = np.empty(0, dtype=np.float32)
+        self._assigned_at = np.empty(0, dtype='datetime64[us]')
+        self._cluster_index: Optional[Dict[int, np.ndarray]] = None
+    
+    def __len__(self) -> int:
+        return len(self._usernames)
+    
+    def __iter__(self):
+        return iter(list(self._usernames))
+    
+    def __contains__(self, username) -> bool:
+        return username in self._rows
+    
+    def __getitem__(self, username: str) -> Dict[str, Any]:
+        row = self._rows[username]
+        cluster_id = int(self._cluster_ids[row])
+        profile = EMOTIONAL_PROFILES.get(cluster_id, EMOTIONAL_PROFILES[0])
+        return {
+            'username': username,
+            'cluster_id': cluster_id,
+            'profile_name': profile['name'],
+            'profile': profile,
+            'confidence': float(self._confidences[row]),
+            'assigned_at': str(self._assigned_at[row])
+        }
+    
+    def __setitem__(self, username: str, value: Dict[str, Any]):
+        self.assign_many(
+            [username],
+            [value.get('cluster_id', 0)],
+            [value.get('confidence', 1.0)],
+            value.get('assigned_at') or value.get('predicted_at')
+        )
+    
+    def __delitem__(self, username: str):
+        row = self._rows.pop(username)
+        last = len(self._usernames) - 1
+        if row != last:
+            # Move the last row into the hole
+            moved = self._usernames[last]
+            self._usernames[row] = moved
+            self._rows[moved] = row
+            self._cluster_ids[row] = self._cluster_ids[last]
+            self._confidences[row] = self._confidences[last]
+            self._assigned_at[row] = self._assigned_at[last]
+        self._usernames.pop()
+        self._cluster_index = None
+    
+    def clear(self):
+        self.__init__()
+    
+    def assign_many(self, usernames: List[str], cluster_ids, confidences=None,
+                    assigned_at: Optional[str] = None):
+        """
+        Insert or update assignments for a batch of users.
+        
+        Args:
+            usernames: Users to assign
+            cluster_ids: Cluster id per user
+            confidences: Confidence per user (default 1.0)
+            assigned_at: ISO timestamp shared by the batch (default now)
+        """
+        if confidences is None:
+            confidences = np.ones(len(usernames))
+        rows = np.empty(len(usernames), dtype=np.intp)
+        new_users = []
+        n = len(self._usernames)
+        for i, username in enumerate(usernames):
+            row = self._rows.get(username)
+            if row is None:
+                row = n + len(new_users)
+                self._rows[username] = row
+                new_users.append(username)
+            rows[i] = row
+        
+        if new_users:
+            self._usernames.extend(new_users)
+            self._reserve(len(self._usernames))
+        
+        self._cluster_ids[rows] = np.asarray(cluster_ids, dtype=np.int8)
+        self._confidences[rows] = np.asarray(confidences, dtype=np.float32)
+        self._assigned_at[rows] = np.datetime64(assigned_at or datetime.utcnow().isoformat(), 'us')
+        self._cluster_index = None
+    
+    def _reserve(self, size: int):
+        """Grow the backing arrays geometrically to hold at least size rows."""
+        capacity = len(self._cluster_ids)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 64)
+        for attr in ('_cluster_ids', '_confidences', '_assigned_at'):
+            old = getattr(self, attr)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, attr, new)
+    
+    def users_in_cluster(self, cluster_id: int) -> List[str]:
+        """Usernames assigned to cluster_id, in unspecified order (deletes reorder rows)."""
+        if self._cluster_index is None:
+            ids = self._cluster_ids[:len(self._usernames)]
+            order = np.argsort(ids, kind='stable')
+            values, starts = np.unique(ids[order], return_index=True)
+            bounds = np.append(starts, len(order))
+            self._cluster_index = {
+                int(value): order[bounds[i]:bounds[i + 1]] for i, value in enumerate(values)
+            }
+        rows = self._cluster_index.get(int(cluster_id), ())
+        return [self._usernames[row] for row in rows]
+    
+    def lookup(self, usernames: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Cluster ids and confidences for stored usernames (KeyError if missing)."""
+        rows = np.fromiter((self._rows[u] for u in usernames), dtype=np.intp, count=len(usernames))
+        return self._cluster_ids[rows].astype(int), self._confidences[rows].astype(float)
+    
+    def cluster_sizes(self, n_clusters: int) -> np.ndarray:
+        """Number of users per cluster id (0..n_clusters-1)."""
+        ids = self._cluster_ids[:len(self._usernames)].astype(np.intp)
+        return np.bincount(ids, minlength=n_clusters)
+    
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """The store as plain arrays (what save() and the model pickle hold)."""
+        n = len(self._usernames)
+        return {
+            'usernames': np.array(self._usernames, dtype=str),
+            'cluster_ids': self._cluster_ids[:n],
+            'confidences': self._confidences[:n],
+            'assigned_at': self._assigned_at[:n],
+        }
+    
+    @classmethod
+    def from_arrays(cls, data) -> 'UserProfileStore':
+        """Rebuild a store from to_arrays() output (or an opened .npz)."""
+        store = cls()
+        store._usernames = data['usernames'].tolist()
+        store._cluster_ids = data['cluster_ids'].astype(np.int8)
+        store._confidences = data['confidences'].astype(np.float32)
+        store._assigned_at = data['assigned_at'].astype('datetime64[us]')
+        store._rows = {username: row for row, username in enumerate(store._usernames)}
+        return store
+    
+    def save(self, path: Path):
+        """Atomically write the store to an .npz file."""
+        tmp_path = Path(f"{path}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **self.to_arrays())
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: Path) -> 'UserProfileStore':
+        """Read a store written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls.from_arrays(data)
+    
+    @classmethod
+    def from_dict(cls, profiles: Dict[str, Dict[str, Any]]) -> 'UserProfileStore':
+        """Build a store from the legacy {username: profile dict} format."""
+        store = cls()
+        for username, profile in profiles.items():
+            store[username] = profile
+        return store
+
+
 # ==============================================================================
 # CLUSTERING ENGINE
 # ==============================================================================
 
+def _limit_worker_threads(threads: int) -> None:
+    """Process pool initializer: cap BLAS/OpenMP threads so workers x threads <= CPUs."""
+    global _worker_thread_limits
+    _worker_thread_limits = threadpool_limits(limits=threads)
+
+
+_worker_thread_limits = None
+
+
+def _evaluate_k(X: np.ndarray, k: int, random_state: int, silhouette_sample: Optional[int],
+                with_silhouette: bool = True, n_init: int = 10) -> Dict[str, Any]:
+    """
+    Fit KMeans for one candidate k and score it. Module-level so it can run
+    in a worker process. Returns metrics, labels and timings.
+    """
+    started = time.perf_counter()
+    kmeans = KMeans(n_clusters=k, random_state=random_state, n_init=n_init)
+    labels = kmeans.fit_predict(X)
+    fit_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    try:
+        calinski = float(calinski_harabasz_score(X, labels))
+    except ValueError:
+        calinski = 0.0
+    silhouette = None
+    if with_silhouette:
+        silhouette = _silhouette(X, labels, silhouette_sample, random_state)
+    
+    return {
+        'k': k,
+        'n_init': n_init,
+        'inertia': float(kmeans.inertia_),
+        'calinski_harabasz': calinski,
+        'silhouette': silhouette,
+        'labels': labels,
+        'fit_seconds': fit_seconds,
+        'score_seconds': time.perf_counter() - started,
+    }
+
+
+def _silhouette(X: np.ndarray, labels: np.ndarray, sample_size: Optional[int], random_state: int) -> float:
+    """Silhouette score, on a fixed-seed sample when sample_size is set."""
+    try:
+        return float(silhouette_score(X, labels, sample_size=sample_size, random_state=random_state))
+    except ValueError:
+        return -1.0  # Invalid for single cluster
+
+
+def _elbow_k(ks: List[int], inertias: List[float]) -> int:
+    """k at the largest bend (second difference) of the inertia curve."""
+    if len(ks) < 3:
+        return ks[0]
+    bends = np.diff(inertias, 2)
+    return ks[int(np.argmax(bends)) + 1]
+
+
 class EmotionalProfileClusterer:
     """Main clustering engine for emotional profile categorization."""
     
-    def __init__(self, n_clusters: int = 4, random_state: int = 42):
+    # Above this many users, Agglomerative (ward, O(n^2) memory) runs on a sample
+    HIERARCHICAL_MAX_USERS = 2000
+    # partial_fit triggers a full refit when either drift metric exceeds its threshold
+    CENTROID_SHIFT_THRESHOLD = 0.5   # max centroid move, in scaled feature units
+    INERTIA_INCREASE_THRESHOLD = 0.5  # relative increase of mean squared distance
+    # Model selection: silhouette is O(n^2), so score a fixed-seed sample above this size
+    SILHOUETTE_SAMPLE_SIZE = 2000
+    MODEL_DIR = Path(__file__).parent / "models" / "clustering"
+    MODEL_FILENAME = "emotional_profile_model.pkl"
+    
+    def __init__(self, n_clusters: int = 4, random_state: int = 42,
+                 hierarchical_max_users: Optional[int] = None,
+                 centroid_shift_threshold: Optional[float] = None,
+                 inertia_increase_threshold: Optional[float] = None):
         """
         Initialize the clusterer.
         
         Args:
             n_clusters: Number of emotional profile clusters
             random_state: Random seed for reproducibility
+            hierarchical_max_users: Sample size cap for Agglomerative clustering
+                (0 = skip it entirely)
+            centroid_shift_threshold: Drift threshold for partial_fit refits
+            inertia_increase_threshold: Drift threshold for partial_fit refits
         """
         self.n_clusters = n_clusters
         self.random_state = random_state
+        self.hierarchical_max_users = (
+            self.HIERARCHICAL_MAX_USERS if hierarchical_max_users is None else hierarchical_max_users
+        )
+        self.centroid_shift_threshold = (
+            self.CENTROID_SHIFT_THRESHOLD if centroid_shift_threshold is None else centroid_shift_threshold
+        )
+        self.inertia_increase_threshold = (
+            self.INERTIA_INCREASE_THRESHOLD if inertia_increase_threshold is None else inertia_increase_threshold
+        )
         
         self.scaler = StandardScaler()
         self.pca = PCA(n_components=2)
@@ -268,18 +653,28 @@ class EmotionalProfileClusterer:
         self.is_fitted = False
         self.cluster_centers_ = None
         self.labels_ = None
-        self.user_profiles = {}
+        self.user_profiles = UserProfileStore()
+        
+        # Incremental state (reset by every full fit)
+        self.minibatch = None
+        self.reference_centers_ = None   # centroids of the last full fit, raw feature space
+        self.baseline_inertia_ = None    # mean squared distance at the last full fit
+        self.model_selection_ = []       # per-k report from the last _find_optimal_clusters
         
         # Model save path
-        self.model_path = Path(__file__).parent / "models" / "clustering"
+        self.model_path = Path(self.MODEL_DIR)
         self.model_path.mkdir(parents=True, exist_ok=True)
     
-    def fit(self, data: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    def fit(self, data: Optional[pd.DataFrame] = None, n_jobs: int = 1,
+            prune: bool = False) -> Dict[str, Any]:
         """
         Fit the clustering model on user emotional data.
         
         Args:
             data: Optional DataFrame with user features. If None, extracts from database.
+            n_jobs: Worker processes for model selection (see _find_optimal_clusters).
+                Serial by default; batch jobs can opt in, the GUI should not.
+            prune: Screen candidate k values cheaply before the full fits
             
         Returns:
             Dictionary containing clustering results and metrics
@@ -304,8 +699,9 @@ class EmotionalProfileClusterer:
         X_scaled = self.scaler.fit_transform(X)
         
         # Determine optimal number of clusters if we have enough data
+        self.model_selection_ = []
         if len(X_scaled) >= 10:
-            optimal_k = self._find_optimal_clusters(X_scaled)
+            optimal_k = self._find_optimal_clusters(X_scaled, n_jobs=n_jobs, prune=prune)
             if optimal_k != self.n_clusters:
                 logger.info(f"Optimal clusters: {optimal_k}, using configured: {self.n_clusters}")
         
@@ -319,14 +715,20 @@ class EmotionalProfileClusterer:
         self.labels_ = self.kmeans.fit_predict(X_scaled)
         self.cluster_centers_ = self.kmeans.cluster_centers_
         
-        # Fit Hierarchical Clustering (secondary)
-        if len(X_scaled) >= self.n_clusters:
+        # Fit Hierarchical Clustering (secondary); ward needs O(n^2) memory,
+        # so large populations are sampled or skipped
+        X_hier = X_scaled
+        if self.hierarchical_max_users and len(X_scaled) > self.hierarchical_max_users:
+            rng = np.random.default_rng(self.random_state)
+            X_hier = X_scaled[rng.choice(len(X_scaled), self.hierarchical_max_users, replace=False)]
+        if self.hierarchical_max_users and len(X_hier) >= self.n_clusters:
             self.hierarchical = AgglomerativeClustering(
                 n_clusters=self.n_clusters,
                 linkage='ward'
             )
-            hierarchical_labels = self.hierarchical.fit_predict(X_scaled)
+            hierarchical_labels = self.hierarchical.fit_predict(X_hier)
         else:
+            self.hierarchical = None
             hierarchical_labels = self.labels_
         
         # Fit DBSCAN for anomaly detection
@@ -336,15 +738,11 @@ class EmotionalProfileClusterer:
         # Calculate metrics
         metrics = self._calculate_clustering_metrics(X_scaled, self.labels_)
         
+        # Seed the incremental model from this fit
+        self._reset_incremental_state(np.bincount(self.labels_, minlength=self.n_clusters))
+        
         # Store user profiles
-        for username, label in zip(usernames, self.labels_):
-            profile_data = EMOTIONAL_PROFILES.get(label, EMOTIONAL_PROFILES[0])
-            self.user_profiles[username] = {
-                'cluster_id': int(label),
-                'profile': profile_data,
-                'profile_name': profile_data['name'],
-                'assigned_at': datetime.utcnow().isoformat()
-            }
+        self.user_profiles.assign_many(usernames, self.labels_)
         
         # PCA for visualization
         if len(X_scaled) >= 2:
@@ -365,7 +763,8 @@ class EmotionalProfileClusterer:
             'metrics': metrics,
             'cluster_distribution': self._get_cluster_distribution(),
             'cluster_profiles': self._get_cluster_profiles(X, feature_cols),
-            'pca_coordinates': X_pca.tolist() if isinstance(X_pca, np.ndarray) else X_pca
+            'pca_coordinates': X_pca.tolist() if isinstance(X_pca, np.ndarray) else X_pca,
+            'model_selection': self.model_selection_
         }
         
         logger.info(f"Clustering complete: {len(usernames)} users into {self.n_clusters} profiles")
@@ -390,21 +789,7 @@ class EmotionalProfileClusterer:
         # Check if user already has a cached profile (from fit)
         if username in self.user_profiles:
             cached = self.user_profiles[username]
-            # Ensure it has all needed fields
-            if 'profile_name' in cached:
-                return cached
-            # Convert old format to new format
-            cluster_id = cached.get('cluster_id', 0)
-            profile = EMOTIONAL_PROFILES.get(cluster_id, EMOTIONAL_PROFILES[0])
-            return {
-                'username': username,
-                'cluster_id': int(cluster_id),
-                'profile_name': profile['name'],
-                'profile': profile,
-                'confidence': 1.0,  # Already assigned during fit
-                'features': {},
-                'predicted_at': cached.get('assigned_at', datetime.utcnow().isoformat())
-            }
+            return {**cached, 'features': {}, 'predicted_at': cached['assigned_at']}
         
         # Extract features for the user from database
         features = self.feature_extractor.extract_user_features(username)
@@ -416,13 +801,9 @@ class EmotionalProfileClusterer:
         X = np.array([[features.get(col, 0) for col in feature_cols]])
         X = np.nan_to_num(X, nan=0.0)
         
-        # Scale and predict
-        X_scaled = self.scaler.transform(X)
-        cluster_id = self.kmeans.predict(X_scaled)[0]
-        
-        # Calculate confidence based on distance to cluster center
-        distances = np.linalg.norm(X_scaled - self.cluster_centers_, axis=1)
-        confidence = 1 - (distances[cluster_id] / np.sum(distances))
+        # Scale and assign to the nearest centroid
+        cluster_ids, confidences = self._assign(self.scaler.transform(X))
+        cluster_id, confidence = int(cluster_ids[0]), confidences[0]
         
         profile = EMOTIONAL_PROFILES.get(cluster_id, EMOTIONAL_PROFILES[0])
         
@@ -462,13 +843,9 @@ class EmotionalProfileClusterer:
         X = np.array([[features.get(col, 0) for col in feature_cols]])
         X = np.nan_to_num(X, nan=0.0)
         
-        # Scale and predict
-        X_scaled = self.scaler.transform(X)
-        cluster_id = self.kmeans.predict(X_scaled)[0]
-        
-        # Calculate confidence based on distance to cluster center
-        distances = np.linalg.norm(X_scaled - self.cluster_centers_, axis=1)
-        confidence = 1 - (distances[cluster_id] / np.sum(distances))
+        # Scale and assign to the nearest centroid
+        cluster_ids, confidences = self._assign(self.scaler.transform(X))
+        cluster_id, confidence = int(cluster_ids[0]), confidences[0]
         
         profile = EMOTIONAL_PROFILES.get(cluster_id, EMOTIONAL_PROFILES[0])
         
@@ -484,6 +861,214 @@ class EmotionalProfileClusterer:
         
         return result
     
+    def predict_many(self, data, refresh: bool = False, store: bool = False) -> pd.DataFrame:
+        """
+        Assign many users (or feature rows) to profiles in one pass.
+        
+        Args:
+            data: List of usernames, or a feature frame with the extractor's
+                feature columns (and optionally 'username')
+            refresh: Re-extract features for usernames that already have a
+                stored assignment
+            store: Keep the assignments of extracted usernames in
+                self.user_profiles (in memory; _save_model persists them)
+            
+        Returns:
+            DataFrame with username, cluster_id, profile_name and confidence
+            per row, in input order. Usernames without any data are omitted.
+        """
+        columns = ['username', 'cluster_id', 'profile_name', 'confidence']
+        if not self.is_fitted and not self._load_model():
+            logger.warning("Model not fitted. Call fit() first.")
+            return pd.DataFrame(columns=columns)
+        
+        if isinstance(data, pd.DataFrame):
+            order, cached, features = None, [], data
+        else:
+            order = list(dict.fromkeys(u for u in data if u))
+            cached = [] if refresh else [u for u in order if u in self.user_profiles]
+            cached_set = set(cached)
+            missing = [u for u in order if u not in cached_set]
+            features = self.feature_extractor.extract_users_features(missing) if missing else pd.DataFrame()
+        
+        frames = []
+        if cached:
+            cluster_ids, confidences = self.user_profiles.lookup(cached)
+            frames.append(pd.DataFrame({
+                'username': cached, 'cluster_id': cluster_ids, 'confidence': confidences
+            }))
+        
+        if not features.empty:
+            feature_cols = self.feature_extractor.feature_names
+            X = features.reindex(columns=feature_cols, fill_value=0).to_numpy(dtype=float)
+            cluster_ids, confidences = self._assign(self.scaler.transform(np.nan_to_num(X, nan=0.0)))
+            usernames = features['username'].tolist() if 'username' in features else [None] * len(X)
+            if store and order is not None:
+                self.user_profiles.assign_many(usernames, cluster_ids, confidences)
+            frames.append(pd.DataFrame({
+                'username': usernames, 'cluster_id': cluster_ids, 'confidence': confidences
+            }))
+        
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        
+        result = pd.concat(frames, ignore_index=True)
+        if order is not None:
+            rank = {u: i for i, u in enumerate(order)}
+            result = result.iloc[np.argsort(result['username'].map(rank).to_numpy(), kind='stable')]
+        names = {cid: p['name'] for cid, p in EMOTIONAL_PROFILES.items()}
+        result['profile_name'] = result['cluster_id'].map(names).fillna(EMOTIONAL_PROFILES[0]['name'])
+        return result[columns].reset_index(drop=True)
+    
+    def partial_fit(self, data: Optional[pd.DataFrame] = None,
+                    usernames: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Incrementally update the model with new or changed users.
+        
+        Scaler statistics and centroids are updated with partial_fit and
+        the given users are (re)assigned in O(k) each. A full refit on the
+        stored users' features plus the batch is run instead when there is no
+        model yet, or when drift since the last full fit (centroid shift or
+        inertia increase) exceeds the configured thresholds.
+        
+        Args:
+            data: Feature rows for the new users (same layout as fit())
+            usernames: Alternatively, users whose features are read from the database
+            
+        Returns:
+            Dictionary with assigned labels, drift metrics and whether a refit ran
+        """
+        if data is None:
+            data = self.feature_extractor.extract_users_features(usernames or [])
+        
+        if not self.is_fitted and not self._load_model():
+            logger.info("No fitted model yet; running a full fit")
+            return self._refit(data, drift={})
+        
+        if data.empty:
+            return {'n_users': 0, 'refit': False, 'drift': {}}
+        
+        if self.minibatch is None:
+            self._reset_incremental_state(self.user_profiles.cluster_sizes(self.n_clusters))
+        
+        batch_users = data['username'].tolist()
+        X = np.nan_to_num(data[self.feature_extractor.feature_names].values.astype(float), nan=0.0)
+        
+        # Work on copies so a refit (or a failed one) starts from the model as it was
+        scaler = copy.deepcopy(self.scaler)
+        minibatch = copy.deepcopy(self.minibatch)
+        
+        # Update scaler statistics, keeping centroids fixed in raw feature space
+        centers_raw = scaler.inverse_transform(minibatch.cluster_centers_)
+        scaler.partial_fit(X)
+        minibatch.cluster_centers_ = scaler.transform(centers_raw)
+        
+        X_scaled = scaler.transform(X)
+        minibatch.partial_fit(X_scaled)
+        centers = minibatch.cluster_centers_
+        
+        # Drift since the last full fit, measured in the current scaled space
+        reference = scaler.transform(self.reference_centers_)
+        centroid_shift = float(np.max(np.linalg.norm(centers - reference, axis=1)))
+        sq_dist = ((X_scaled[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        batch_inertia = float(sq_dist.min(axis=1).mean())
+        inertia_increase = (
+            batch_inertia / self.baseline_inertia_ - 1.0 if self.baseline_inertia_ else 0.0
+        )
+        drift = {'centroid_shift': centroid_shift, 'inertia_increase': inertia_increase}
+        
+        if (centroid_shift > self.centroid_shift_threshold
+                or inertia_increase > self.inertia_increase_threshold):
+            logger.info(f"Cluster drift exceeds thresholds {drift}; running a full refit")
+            return self._refit(data, drift)
+        
+        self.scaler, self.minibatch = scaler, minibatch
+        self.cluster_centers_ = centers
+        labels, confidences = self._assign(X_scaled)
+        self.user_profiles.assign_many(batch_users, labels, confidences)
+        
+        self._save_model()
+        
+        return {
+            'n_users': len(batch_users),
+            'usernames': batch_users,
+            'labels': [int(label) for label in labels],
+            'refit': False,
+            'drift': drift
+        }
+    
+    def _refit(self, data: pd.DataFrame, drift: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Full fit on the stored users' feature rows with the batch merged in
+        (batch rows replace stored rows of the same user), so batches that
+        are not in the database yet are not dropped. Labels and usernames
+        in the result cover the batch users.
+        """
+        stored = self.feature_extractor.extract_all_users_features()
+        if data.empty:
+            merged = stored
+        elif stored.empty:
+            merged = data
+        else:
+            merged = pd.concat([stored[~stored['username'].isin(data['username'])], data],
+                               ignore_index=True)
+        if not merged.empty:
+            merged = merged[['username'] + self.feature_extractor.feature_names]
+        
+        results = self.fit(data=merged)
+        if 'error' in results:
+            return {**results, 'refit': True, 'drift': drift}
+        
+        batch_users = data['username'].tolist() if not data.empty else []
+        labels, _ = self.user_profiles.lookup(batch_users)
+        return {
+            **results,
+            'n_users': len(batch_users),
+            'usernames': batch_users,
+            'labels': [int(label) for label in labels],
+            'refit': True,
+            'drift': drift
+        }
+    
+    def _reset_incremental_state(self, cluster_sizes: np.ndarray):
+        """
+        Seed the MiniBatchKMeans model and drift baselines from the current
+        centroids. Each centroid is fed once, weighted by its cluster size,
+        so later batches move it at the rate its population implies.
+        """
+        centers = np.array(self.cluster_centers_, dtype=float)
+        sizes = np.maximum(np.asarray(cluster_sizes, dtype=float), 1.0)
+        self.minibatch = MiniBatchKMeans(
+            n_clusters=self.n_clusters,
+            init=centers,
+            n_init=1,
+            reassignment_ratio=0.0,  # never jump a centroid to a random point
+            random_state=self.random_state
+        )
+        self.minibatch.partial_fit(centers, sample_weight=sizes)
+        self.minibatch.cluster_centers_ = centers.copy()
+        self.reference_centers_ = self.scaler.inverse_transform(centers)
+        inertia = getattr(self.kmeans, 'inertia_', None)
+        if inertia is not None:
+            self.baseline_inertia_ = float(inertia) / float(sizes.sum())
+    
+    def _assign(self, X_scaled: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest-centroid labels and distance-based confidences, O(k) per row."""
+        # Full row x centroid distance matrix from one matrix product
+        centers = self.cluster_centers_
+        sq = (
+            np.einsum('ij,ij->i', X_scaled, X_scaled)[:, None]
+            - 2.0 * X_scaled @ centers.T
+            + np.einsum('ij,ij->i', centers, centers)[None, :]
+        )
+        distances = np.sqrt(np.maximum(sq, 0.0))
+        labels = distances.argmin(axis=1)
+        nearest = distances[np.arange(len(labels)), labels]
+        totals = distances.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            confidences = np.where(totals > 0, 1 - nearest / totals, 1.0)
+        return labels, confidences
+    
     def get_user_profile(self, username: str) -> Optional[Dict[str, Any]]:
         """Get the cached emotional profile for a user."""
         if username in self.user_profiles:
@@ -492,31 +1077,67 @@ class EmotionalProfileClusterer:
     
     def get_cluster_users(self, cluster_id: int) -> List[str]:
         """Get all users in a specific cluster."""
-        return [
-            username for username, profile in self.user_profiles.items()
-            if profile.get('cluster_id') == cluster_id
-        ]
+        return self.user_profiles.users_in_cluster(cluster_id)
     
-    def _find_optimal_clusters(self, X: np.ndarray, max_k: int = 8) -> int:
-        """Find optimal number of clusters using silhouette score."""
+    def _find_optimal_clusters(self, X: np.ndarray, max_k: int = 8, n_jobs: int = 1,
+                               prune: bool = False, max_candidates: int = 3) -> int:
+        """
+        Find optimal number of clusters using silhouette score.
+        
+        Args:
+            X: Scaled feature matrix
+            max_k: Largest k to consider
+            n_jobs: Worker processes for the candidate fits (1 = serial,
+                None = CPU count). Each worker's KMeans threads are capped
+                so the pool does not oversubscribe the CPUs.
+            prune: Screen every k with a single-init fit ranked by the cheap
+                Calinski-Harabasz score and the inertia elbow; only the best
+                max_candidates of them get the full n_init=10 fit and a
+                silhouette score
+            max_candidates: Candidates kept when pruning
+        
+        Per-k metrics and timings are stored in self.model_selection_.
+        """
         max_k = min(max_k, len(X) - 1)
         if max_k < 2:
             return 2
         
-        silhouette_scores = []
-        k_range = range(2, max_k + 1)
+        k_range = list(range(2, max_k + 1))
+        sample = self.SILHOUETTE_SAMPLE_SIZE if len(X) > self.SILHOUETTE_SAMPLE_SIZE else None
+        
+        cpus = os.cpu_count() or 1
+        n_jobs = max(1, min(cpus if n_jobs is None else n_jobs, len(k_range)))
+        
+        def evaluate(ks: List[int], with_silhouette: bool, n_init: int) -> List[Dict[str, Any]]:
+            args = [(X, k, self.random_state, sample, with_silhouette, n_init) for k in ks]
+            workers = min(n_jobs, len(args))
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_limit_worker_threads,
+                                         initargs=(max(1, cpus // workers),)) as executor:
+                    return list(executor.map(_evaluate_k, *zip(*args)))
+            return [_evaluate_k(*a) for a in args]
+        
+        if prune:
+            # Screen with one init per k: best Calinski-Harabasz scores plus the elbow
+            reports = evaluate(k_range, with_silhouette=False, n_init=1)
+            ranked = sorted(reports, key=lambda r: r['calinski_harabasz'], reverse=True)
+            keep = {r['k'] for r in ranked[:max_candidates]}
+            keep.add(_elbow_k(k_range, [r['inertia'] for r in reports]))
+            full = {r['k']: r for r in evaluate(sorted(keep), with_silhouette=True, n_init=10)}
+            reports = [full.get(r['k'], r) for r in reports]
+        else:
+            reports = evaluate(k_range, with_silhouette=True, n_init=10)
         
-        for k in k_range:
-            kmeans = KMeans(n_clusters=k, random_state=self.random_state, n_init=10)
-            labels = kmeans.fit_predict(X)
-            try:
-                score = silhouette_score(X, labels)
-            except ValueError:
-                score = -1.0 # Invalid for single cluster
-            silhouette_scores.append(score)
+        for report in reports:
+            report.pop('labels')
+            logger.info(
+                f"k={report['k']}: fit {report['fit_seconds']:.3f}s, score {report['score_seconds']:.3f}s, "
+                f"silhouette={report['silhouette']}, CH={report['calinski_harabasz']:.1f}"
+            )
+        self.model_selection_ = reports
         
-        optimal_k = k_range[np.argmax(silhouette_scores)]
-        return optimal_k
+        scored = [r for r in reports if r['silhouette'] is not None]
+        return max(scored, key=lambda r: r['silhouette'])['k']
     
     def _calculate_clustering_metrics(self, X: np.ndarray, labels: np.ndarray) -> Dict[str, float]:
         """Calculate clustering quality metrics."""
@@ -581,15 +1202,27 @@ class EmotionalProfileClusterer:
                 'scaler': self.scaler,
                 'pca': self.pca,
                 'cluster_centers': self.cluster_centers_,
-                'user_profiles': self.user_profiles,
+                'minibatch': self.minibatch,
+                'reference_centers': self.reference_centers_,
+                'baseline_inertia': self.baseline_inertia_,
                 'n_clusters': self.n_clusters,
                 'feature_names': self.feature_extractor.feature_names,
+                # Compact arrays rather than per-user dicts; kept in the same
+                # file so the model and its assignments are replaced together
+                'user_profile_arrays': self.user_profiles.to_arrays(),
                 'saved_at': datetime.utcnow().isoformat()
             }
             
-            model_file = self.model_path / "emotional_profile_model.pkl"
-            with open(model_file, 'wb') as f:
-                pickle.dump(model_data, f)
+            model_file = self.model_path / self.MODEL_FILENAME
+            tmp_file = Path(f"{model_file}.tmp")
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(model_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, model_file)
+            
+            # A side file from the previous layout would now be stale
+            legacy_profiles = self.model_path / UserProfileStore.FILENAME
+            if legacy_profiles.exists():
+                legacy_profiles.unlink()
             
             logger.info(f"Model saved to {model_file}")
             
@@ -599,7 +1232,7 @@ class EmotionalProfileClusterer:
     def _load_model(self) -> bool:
         """Load a previously fitted model from disk."""
         try:
-            model_file = self.model_path / "emotional_profile_model.pkl"
+            model_file = self.model_path / self.MODEL_FILENAME
             if not model_file.exists():
                 return False
             
@@ -610,7 +1243,20 @@ class EmotionalProfileClusterer:
             self.scaler = model_data['scaler']
             self.pca = model_data['pca']
             self.cluster_centers_ = model_data['cluster_centers']
-            self.user_profiles = model_data['user_profiles']
+            self.minibatch = model_data.get('minibatch')
+            self.reference_centers_ = model_data.get('reference_centers')
+            self.baseline_inertia_ = model_data.get('baseline_inertia')
+            profiles_file = self.model_path / UserProfileStore.FILENAME
+            if 'user_profile_arrays' in model_data:
+                self.user_profiles = UserProfileStore.from_arrays(model_data['user_profile_arrays'])
+            elif 'user_profiles' in model_data:
+                # Model saved before assignments moved out of the pickle
+                self.user_profiles = UserProfileStore.from_dict(model_data['user_profiles'])
+            elif profiles_file.exists():
+                # Assignments saved in a side .npz by earlier versions
+                self.user_profiles = UserProfileStore.load(profiles_file)
+            else:
+                self.user_profiles = UserProfileStore()
             self.n_clusters = model_data['n_clusters']
             self.is_fitted = True
             
@@ -822,10 +1468,10 @@ def create_profile_clusterer(n_clusters: int = 4) -> EmotionalProfileClusterer:
     return EmotionalProfileClusterer(n_clusters=n_clusters)
 
 
-def cluster_all_users(n_clusters: int = 4) -> Dict[str, Any]:
-    """Convenience function to cluster all users in the database."""
+def cluster_all_users(n_clusters: int = 4, n_jobs: int = 1, prune: bool = False) -> Dict[str, Any]:
+    """Convenience function to cluster all users in the database (batch jobs may raise n_jobs)."""
     clusterer = create_profile_clusterer(n_clusters)
-    return clusterer.fit()
+    return clusterer.fit(n_jobs=n_jobs, prune=prune)
 
 
 def get_user_emotional_profile(username: str) -> Optional[Dict[str, Any]]:
@@ -834,6 +1480,45 @@ def get_user_emotional_profile(username: str) -> Optional[Dict[str, Any]]:
     return clusterer.predict(username)
 
 
+# get_cohort_profiles results for the saved model files they were computed
+# from: (model file stamp, usernames or None) -> frame
+_cohort_cache: Dict[Tuple, pd.DataFrame] = {}
+
+
+def _saved_model_stamp(model_path: Path) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of the saved model file (which holds the assignments); changes on every save."""
+    try:
+        stat = (model_path / EmotionalProfileClusterer.MODEL_FILENAME).stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def get_cohort_profiles(usernames: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Profile assignments for a cohort of users (default: every assigned user).
+    
+    Results are cached until the saved model changes, so dashboards and
+    reports can call this on every render.
+    
+    Returns the predict_many frame: username, cluster_id, profile_name, confidence.
+    """
+    clusterer = create_profile_clusterer()
+    key = (_saved_model_stamp(clusterer.model_path), None if usernames is None else tuple(usernames))
+    cached = _cohort_cache.get(key)
+    if cached is not None:
+        return cached.copy()
+    
+    if not clusterer._load_model():
+        return pd.DataFrame(columns=['username', 'cluster_id', 'profile_name', 'confidence'])
+    cohort = clusterer.predict_many(list(clusterer.user_profiles) if usernames is None else usernames)
+    # Only the current model version is worth keeping
+    for stale in [k for k in _cohort_cache if k[0] != key[0]]:
+        del _cohort_cache[stale]
+    _cohort_cache[key] = cohort
+    return cohort.copy()
+
+
 def get_profile_summary() -> Dict[str, Any]:
     """Get summary of all emotional profiles."""
     clusterer = create_profile_clusterer()
@@ -23,17 +23,30 @@ except ImportError:
 import warnings
 warnings.filterwarnings('ignore')
 from app.analysis.data_cleaning import DataCleaner
-from .versioning import ModelVersioningManager, create_versioning_manager
+from .versioning import ModelVersioningManager, create_versioning_manager, compile_tree_ensemble
+from .synthetic_data import generate_synthetic_data
 import logging
 from app.config import MODELS_DIR, DATA_DIR
+from app.exceptions import ResourceError
 import os
+import threading
 
 logger = logging.getLogger(__name__)
 
 class SoulSenseMLPredictor:
     MODEL_NAME = "soulsense_predictor"
+    BUILD_HINT = "python scripts/build_ml_model.py"
     
-    def __init__(self, use_versioning: bool = True):
+    def __init__(self, use_versioning: bool = True, lazy: bool = False):
+        """
+        Args:
+            use_versioning: Load from / register with the model registry
+            lazy: Do no work here (not even opening the model registry);
+                load the existing artifact on the first
+                predict_* call and never train implicitly (raises
+                ResourceError if no artifact exists). Build artifacts
+                explicitly with SoulSenseMLPredictor.build().
+        """
         self.model = None
         self.scaler = StandardScaler()
         self.feature_names = [
@@ -49,12 +62,16 @@ class SoulSenseMLPredictor:
         ]
         self.class_names = ['Low Risk', 'Moderate Risk', 'High Risk']
         self.use_versioning = use_versioning
-        self.versioning_manager = None
+        self._versioning_manager = None
         self.current_version = None
         self.model_metadata = None
+        self.lazy = lazy
+        self._load_lock = threading.Lock()
+        self._compiled = None
+        self._compiled_source = None
         
-        if use_versioning:
-            self.versioning_manager = create_versioning_manager()
+        if lazy:
+            return
         
         # Try to load existing model, otherwise train new one
         try:
@@ -84,6 +101,46 @@ class SoulSenseMLPredictor:
             self.train_sample_model()
             self.save_model()
     
+    @classmethod
+    def build(cls, use_versioning: bool = True, bump_type: str = "patch",
+              experiment_name: str = None):
+        """
+        Explicit build step: train the model and write/register the artifact
+        that lazy predictors load. Returns the trained predictor.
+        """
+        predictor = cls(use_versioning=use_versioning, lazy=True)
+        predictor.train_sample_model(bump_type=bump_type, experiment_name=experiment_name)
+        predictor.save_model(bump_type=bump_type)
+        return predictor
+    
+    @property
+    def versioning_manager(self):
+        """Registry/experiment manager, created on first use (None without versioning)"""
+        if self._versioning_manager is None and self.use_versioning:
+            self._versioning_manager = create_versioning_manager()
+        return self._versioning_manager
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self.model is not None
+    
+    def ensure_loaded(self):
+        """Load the existing artifact on first use (never trains)."""
+        if self.model is not None:
+            return
+        with self._load_lock:
+            if self.model is not None:
+                return
+            try:
+                self.load_model()
+            except Exception as e:
+                logger.error(f"No ML model artifact available: {e}")
+                raise ResourceError(
+                    f"No trained '{self.MODEL_NAME}' model artifact found. "
+                    f"Build one with: {self.BUILD_HINT}",
+                    original_exception=e
+                )
+    
     def prepare_features(self, q_scores, age, total_score, sentiment_score=0.0):
         """Prepare features for ML prediction"""
         q_scores = np.array(q_scores)
@@ -129,58 +186,15 @@ class SoulSenseMLPredictor:
         
         try:
             # Generate synthetic training data
-            np.random.seed(42)
-            n_samples = 1000
-            
-            # Generate realistic scores
-            X = np.zeros((n_samples, len(self.feature_names)))
-            
-            for i in range(n_samples):
-                # Generate individual question scores (1-5)
-                q_scores = np.random.randint(1, 6, 5)
-                
-                # Calculate derived features
-                total_score = q_scores.sum()
-                age = np.random.randint(12, 50)
-                avg_score = total_score / 5
-                
-                # Generate synthetic sentiment correlated with score
-                # Lower score -> more likely to have negative sentiment, but with noise
-                base_sentiment = (total_score / 25.0) * 100 # 0 to 100
-                sentiment_noise = np.random.normal(0, 30)
-                sentiment_score = max(-100, min(100, (base_sentiment - 50) * 2 + sentiment_noise))
-                
-                # Create feature vector
-                X[i] = [
-                    q_scores[0], q_scores[1], q_scores[2], q_scores[3], q_scores[4],
-                    total_score, age, avg_score, sentiment_score
-                ]
-            
-            # Generate labels based on rules
-            y = []
-            for i in range(n_samples):
-                total_score = X[i, 5]
-                avg_score = X[i, 7]
-                sentiment_score = X[i, 8]
-                
-                # Risk classification rules (Enhanced with Sentiment)
-                # High Risk: Low EQ OR (Moderate EQ + Very Negative Sentiment)
-                if total_score <= 10 or (total_score <= 15 and sentiment_score < -50):
-                    y.append(2)  # High risk
-                # Moderate Risk: Moderate EQ OR (High EQ + Negative Sentiment)
-                elif total_score <= 15 or (total_score <= 20 and sentiment_score < -20):
-                    y.append(1)  # Moderate risk
-                else:
-                    y.append(0)  # Low risk
-            
-            y = np.array(y)
+            X, y = generate_synthetic_data(n_samples=1000, seed=42, age_range=(12, 50))
             
             # Split data
             X_train, X_test, y_train, y_test = train_test_split(
                 X, y, test_size=0.2, random_state=42, stratify=y
             )
             
-            # Scale features
+            # Scale features (a fresh scaler: a loaded one is shared via the model cache)
+            self.scaler = StandardScaler()
             X_train_scaled = self.scaler.fit_transform(X_train)
             X_test_scaled = self.scaler.transform(X_test)
             
@@ -269,21 +283,25 @@ class SoulSenseMLPredictor:
     
     def predict_with_explanation(self, q_scores, age, total_score, sentiment_score=0.0):
         """Make prediction with XAI explanations"""
+        self.ensure_loaded()
+        
         # Clean inputs first
         q_scores, age, total_score = DataCleaner.clean_inputs(q_scores, age, total_score)
         
         # Prepare features
-        X_scaled, feature_dict = self.prepare_features(q_scores, age, total_score, sentiment_score)
-        
-        # Scale features
-        X_scaled = self.scaler.transform(X_scaled)
+        X, feature_dict = self.prepare_features(q_scores, age, total_score, sentiment_score)
         
-        # Make prediction
-        prediction = self.model.predict(X_scaled)[0]
-        probabilities = self.model.predict_proba(X_scaled)[0]
+        # Shared vectorized path (one row)
+        row = self._predict_matrix(X)[0]
+        prediction = int(row['prediction'])
+        probabilities = row['probabilities']
         
-        # Get feature importance
-        feature_importance = self.get_feature_importance(X_scaled[0])
+        # Get feature importance (sorted, most influential first)
+        feature_importance = dict(sorted(
+            zip(self.feature_names, row['feature_importance'].tolist()),
+            key=lambda x: x[1],
+            reverse=True
+        ))
         
         # Generate explanation
         explanation = self.generate_ml_explanation(
@@ -294,16 +312,118 @@ class SoulSenseMLPredictor:
         recommendations = self.get_recommendations(prediction, feature_dict)
         
         return {
-            'prediction': int(prediction),
+            'prediction': prediction,
             'prediction_label': self.class_names[prediction],
             'probabilities': probabilities.tolist(),
-            'confidence': float(probabilities[prediction]),
+            'confidence': float(row['confidence']),
             'features': feature_dict,
             'feature_importance': feature_importance,
             'explanation': explanation,
             'recommendations': recommendations
         }
     
+    def prepare_features_batch(self, q_scores_matrix, ages, totals, sentiments=None):
+        """
+        Vectorized clean + feature build for many users.
+        
+        Args:
+            q_scores_matrix: (n, m) per-question scores; NaN marks unanswered
+                padding for ragged rows (excluded from the answer count)
+            ages, totals: length-n arrays
+            sentiments: length-n array (None/NaN -> 0.0)
+        
+        Returns:
+            (n, len(feature_names)) float array, columns in feature_names order
+        """
+        Q = np.asarray(q_scores_matrix, dtype=float)
+        if Q.ndim == 1:
+            Q = Q.reshape(1, -1)
+        n = Q.shape[0]
+        
+        # Same rules as DataCleaner.clean_inputs, applied column-wise
+        ages = np.asarray(ages, dtype=float).reshape(n)
+        ages = np.where(np.isnan(ages), 25, np.clip(np.trunc(ages), 5, 120))
+        totals = np.asarray(totals, dtype=float).reshape(n)
+        totals = np.clip(np.trunc(np.nan_to_num(totals, nan=0.0)), 0, 125)
+        if sentiments is None:
+            sentiments = np.zeros(n)
+        sentiments = np.nan_to_num(np.asarray(sentiments, dtype=float).reshape(n), nan=0.0)
+        
+        answered = ~np.isnan(Q)
+        n_answered = answered.sum(axis=1)
+        Q = np.clip(np.trunc(np.where(answered, Q, 0.0)), 0, 5)
+        
+        # First five questions, defaulting to 3 when not answered
+        first5 = np.full((n, 5), 3.0)
+        k = min(5, Q.shape[1])
+        first5[:, :k] = np.where(answered[:, :k], Q[:, :k], 3.0)
+        
+        columns = {
+            'emotional_recognition': first5[:, 0],
+            'emotional_understanding': first5[:, 1],
+            'emotional_regulation': first5[:, 2],
+            'emotional_reflection': first5[:, 3],
+            'social_awareness': first5[:, 4],
+            'total_score': totals,
+            'age': ages,
+            'average_score': totals / np.maximum(n_answered, 1),
+            'sentiment_score': sentiments
+        }
+        return np.column_stack([columns[name] for name in self.feature_names])
+    
+    def predict_batch(self, q_scores_matrix, ages, totals, sentiments=None):
+        """
+        Vectorized prediction for many users: one scaler call, one
+        predict_proba call and array-based personalized importance.
+        
+        Returns:
+            NumPy structured array with fields 'prediction', 'confidence',
+            'probabilities' (per class), 'features' and 'feature_importance'
+            (both in feature_names order).
+        """
+        self.ensure_loaded()
+        X = self.prepare_features_batch(q_scores_matrix, ages, totals, sentiments)
+        return self._predict_matrix(X)
+    
+    def _predict_matrix(self, X):
+        """Core vectorized path on an unscaled (n, n_features) matrix."""
+        X = np.asarray(X, dtype=float)
+        X_scaled = self.scaler.transform(X)
+        compiled = self._get_compiled_model()
+        if compiled is not None:
+            probabilities = compiled.predict_proba(X_scaled)
+        else:
+            probabilities = np.asarray(self.model.predict_proba(X_scaled), dtype=float)
+        n, n_features = X.shape
+        # Same as model.predict(): the class is classes_[argmax]. A model
+        # trained without some class has fewer columns than class_names, so
+        # probabilities are spread into label order (absent classes get 0).
+        columns = probabilities.argmax(axis=1)
+        confidence = probabilities[np.arange(n), columns]
+        classes = np.asarray(getattr(self.model, 'classes_', ()))
+        if (classes.shape == (probabilities.shape[1],) and np.issubdtype(classes.dtype, np.integer)
+                and classes.min() >= 0):
+            predictions = classes.take(columns)
+            by_class = np.zeros((n, max(len(self.class_names), int(classes.max()) + 1)))
+            by_class[:, classes] = probabilities
+            probabilities = by_class
+        else:
+            predictions = columns
+        
+        result = np.empty(n, dtype=[
+            ('prediction', 'i8'),
+            ('confidence', 'f8'),
+            ('probabilities', 'f8', (probabilities.shape[1],)),
+            ('features', 'f8', (n_features,)),
+            ('feature_importance', 'f8', (n_features,)),
+        ])
+        result['prediction'] = predictions
+        result['confidence'] = confidence
+        result['probabilities'] = probabilities
+        result['features'] = X
+        result['feature_importance'] = self.get_feature_importance_batch(X_scaled)
+        return result
+    
     def get_recommendations(self, prediction, features):
         """Generate actionable advice based on specific feature deficits"""
         advice = []
@@ -351,40 +471,50 @@ class SoulSenseMLPredictor:
             
         return advice[:6] # Limit to top 6 tips
     
+    def _get_compiled_model(self):
+        """NumPy evaluator for the current forest (None if unsupported), rebuilt when the model changes."""
+        if self._compiled_source is not self.model:
+            self._compiled = compile_tree_ensemble(self.model)
+            self._compiled_source = self.model
+        return self._compiled
+    
     def get_feature_importance(self, features):
         """Get feature importance for this specific prediction"""
+        importance = self.get_feature_importance_batch(np.asarray(features, dtype=float).reshape(1, -1))[0]
+        
+        # Sort by importance
+        return dict(sorted(
+            zip(self.feature_names, importance.tolist()),
+            key=lambda x: x[1], 
+            reverse=True
+        ))
+    
+    def get_feature_importance_batch(self, X_scaled):
+        """
+        Personalized feature importance for every row of X_scaled, shape (n, n_features).
+        Rows are normalized to sum to 1, columns follow feature_names.
+        """
+        X_scaled = np.asarray(X_scaled, dtype=float)
         if hasattr(self.model, 'feature_importances_'):
             # Global feature importance
-            global_imp = dict(zip(self.feature_names, self.model.feature_importances_))
+            global_imp = np.asarray(self.model.feature_importances_, dtype=float)
         else:
             # Default importance
-            global_imp = {name: 1.0 for name in self.feature_names}
-        
-        # Adjust importance based on feature values
-        personalized_imp = {}
-        for i, (name, value) in enumerate(zip(self.feature_names, features)):
-            # Higher importance for extreme values
-            if name in ['emotional_regulation', 'social_awareness']:
-                if value < 2 or value > 4:  # Extreme values
-                    personalized_imp[name] = global_imp[name] * 1.5
-                else:
-                    personalized_imp[name] = global_imp[name] * 0.8
-            else:
-                personalized_imp[name] = global_imp[name]
+            global_imp = np.ones(len(self.feature_names))
         
-        # Normalize to sum to 1
-        total = sum(personalized_imp.values())
-        if total > 0:
-            personalized_imp = {k: v/total for k, v in personalized_imp.items()}
+        importance = np.tile(global_imp, (X_scaled.shape[0], 1))
         
-        # Sort by importance
-        sorted_imp = dict(sorted(
-            personalized_imp.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        ))
+        # Higher importance for extreme values
+        for name in ('emotional_regulation', 'social_awareness'):
+            if name in self.feature_names:
+                col = self.feature_names.index(name)
+                values = X_scaled[:, col]
+                extreme = (values < 2) | (values > 4)
+                importance[:, col] *= np.where(extreme, 1.5, 0.8)
         
-        return sorted_imp
+        # Normalize to sum to 1
+        totals = importance.sum(axis=1, keepdims=True)
+        return np.divide(importance, totals, out=importance, where=totals > 0)
     
     def generate_ml_explanation(self, prediction, probabilities, features, importance):
         """Generate ML-based explanation"""
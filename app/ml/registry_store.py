@@ -0,0 +1,483 @@
+"""
+SQLite-backed stores for the model registry and experiment tracker.
+
+Replaces the registry.json / experiments.json files that were rewritten in
+full on every change. Lookups by model name, version, tag, production flag,
+status and metric are index queries. Writers serialize through SQLite's
+own file lock (BEGIN IMMEDIATE), so concurrent training processes cannot
+clobber each other, and multi-row changes such as promote are atomic.
+A registration reserves its version number up front, so artifact files
+are written without holding the write lock.
+"""
+import json
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.db_pool import get_pool
+
+logger = logging.getLogger(__name__)
+
+MODEL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS registry_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS models (
+    name TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS model_versions (
+    name TEXT NOT NULL REFERENCES models(name),
+    version TEXT NOT NULL,
+    major INTEGER NOT NULL,
+    minor INTEGER NOT NULL,
+    patch INTEGER NOT NULL,
+    is_production INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    PRIMARY KEY (name, version)
+);
+CREATE INDEX IF NOT EXISTS idx_model_versions_semver
+    ON model_versions (name, major DESC, minor DESC, patch DESC);
+CREATE INDEX IF NOT EXISTS idx_model_versions_production
+    ON model_versions (name) WHERE is_production = 1;
+CREATE TABLE IF NOT EXISTS model_tags (
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (name, version, tag)
+);
+CREATE INDEX IF NOT EXISTS idx_model_tags_tag ON model_tags (tag);
+CREATE TABLE IF NOT EXISTS version_reservations (
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    major INTEGER NOT NULL,
+    minor INTEGER NOT NULL,
+    patch INTEGER NOT NULL,
+    reserved_at TEXT NOT NULL,
+    PRIMARY KEY (name, version)
+);
+"""
+
+EXPERIMENT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiment_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS experiments (
+    experiment_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    model_version TEXT,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_experiments_timestamp ON experiments (timestamp);
+CREATE INDEX IF NOT EXISTS idx_experiments_status ON experiments (status, timestamp);
+CREATE TABLE IF NOT EXISTS experiment_tags (
+    experiment_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (experiment_id, tag)
+);
+CREATE INDEX IF NOT EXISTS idx_experiment_tags_tag ON experiment_tags (tag);
+CREATE TABLE IF NOT EXISTS experiment_metrics (
+    experiment_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (experiment_id, metric)
+);
+CREATE INDEX IF NOT EXISTS idx_experiment_metrics_value ON experiment_metrics (metric, value);
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _semver(version: str) -> Tuple[int, int, int]:
+    """(major, minor, patch) with the same defaults as SemanticVersion."""
+    parts = version.split(".")
+    return (
+        int(parts[0]) if len(parts) > 0 else 1,
+        int(parts[1]) if len(parts) > 1 else 0,
+        int(parts[2]) if len(parts) > 2 else 0,
+    )
+
+
+class _SQLiteStore:
+    """Shared connection handling: pooled reads, BEGIN IMMEDIATE writes."""
+
+    # Key/value table holding the revision counter that every write bumps
+    META_TABLE = ""
+
+    def __init__(self, db_path: Path, schema: str):
+        self.db_path = str(db_path)
+        self._pool = get_pool(self.db_path)
+        self._snapshot_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+        with self._pool.connection() as conn:
+            conn.executescript(schema)
+
+    def revision(self, conn=None) -> int:
+        """Counter bumped by every write, from any process."""
+        with self.read(conn) as c:
+            row = c.execute(f"SELECT value FROM {self.META_TABLE} WHERE key = 'revision'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _bump_revision(self, conn):
+        conn.execute(
+            f"INSERT INTO {self.META_TABLE} (key, value) VALUES ('revision', '1') "
+            "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Legacy JSON-layout snapshot, rebuilt only after a write.
+
+        The returned dict is shared between callers until the next write and
+        must not be mutated.
+        """
+        revision = self.revision()
+        cached = self._snapshot_cache
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+        snapshot = self._build_snapshot()
+        self._snapshot_cache = (revision, snapshot)
+        return snapshot
+
+    def _build_snapshot(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    @contextmanager
+    def read(self, conn=None):
+        if conn is not None:
+            yield conn
+            return
+        with self._pool.connection() as own:
+            yield own
+
+    @contextmanager
+    def write_transaction(self):
+        """Exclusive write transaction across threads and processes."""
+        with self._pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+
+    @contextmanager
+    def _write(self, conn=None):
+        if conn is not None:
+            yield conn
+            return
+        with self.write_transaction() as own:
+            yield own
+
+
+class ModelStore(_SQLiteStore):
+    """Model versions and their metadata (one JSON blob per version)."""
+
+    META_TABLE = "registry_meta"
+
+    def __init__(self, db_path: Path):
+        super().__init__(db_path, MODEL_SCHEMA)
+        with self._write() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO registry_meta (key, value) VALUES ('created_at', ?)", (_now(),)
+            )
+
+    def is_empty(self) -> bool:
+        with self.read() as conn:
+            return conn.execute("SELECT 1 FROM models LIMIT 1").fetchone() is None
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self.read() as conn:
+            row = conn.execute("SELECT value FROM registry_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _touch(self, conn, **values):
+        values["updated_at"] = _now()
+        conn.executemany(
+            "INSERT OR REPLACE INTO registry_meta (key, value) VALUES (?, ?)", list(values.items())
+        )
+        self._bump_revision(conn)
+
+    def has_model(self, name: str, conn=None) -> bool:
+        with self.read(conn) as c:
+            return c.execute("SELECT 1 FROM models WHERE name = ?", (name,)).fetchone() is not None
+
+    def latest_version(self, name: str, conn=None) -> Optional[str]:
+        with self.read(conn) as c:
+            row = c.execute(
+                "SELECT version FROM model_versions WHERE name = ? "
+                "ORDER BY major DESC, minor DESC, patch DESC LIMIT 1",
+                (name,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def latest_allocated_version(self, name: str, conn=None) -> Optional[str]:
+        """Highest version that is registered or reserved by an in-progress registration."""
+        with self.read(conn) as c:
+            row = c.execute(
+                "SELECT version, major, minor, patch FROM model_versions WHERE name = ? "
+                "UNION ALL SELECT version, major, minor, patch FROM version_reservations WHERE name = ? "
+                "ORDER BY major DESC, minor DESC, patch DESC LIMIT 1",
+                (name, name),
+            ).fetchone()
+        return row[0] if row else None
+
+    def reserve_version(self, name: str, version: str, conn=None):
+        """Claim a version number before its artifact is written (see add_version)."""
+        with self._write(conn) as c:
+            c.execute(
+                "INSERT INTO version_reservations (name, version, major, minor, patch, reserved_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (name, version, *_semver(version), _now()),
+            )
+
+    def release_version(self, name: str, version: str, conn=None):
+        """Drop a reservation whose registration failed."""
+        with self._write(conn) as c:
+            c.execute("DELETE FROM version_reservations WHERE name = ? AND version = ?", (name, version))
+
+    def production_version(self, name: str, conn=None) -> Optional[str]:
+        with self.read(conn) as c:
+            row = c.execute(
+                "SELECT version FROM model_versions WHERE name = ? AND is_production = 1 LIMIT 1",
+                (name,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_version(self, name: str, version: str, conn=None) -> Optional[Dict[str, Any]]:
+        with self.read(conn) as c:
+            row = c.execute(
+                "SELECT metadata, is_production FROM model_versions WHERE name = ? AND version = ?",
+                (name, version),
+            ).fetchone()
+        if row is None:
+            return None
+        metadata = json.loads(row[0])
+        metadata["is_production"] = bool(row[1])
+        return metadata
+
+    def list_models(self) -> List[Dict[str, Any]]:
+        with self.read() as conn:
+            rows = conn.execute(
+                "SELECT m.name, m.created_at, COUNT(v.version) FROM models m "
+                "LEFT JOIN model_versions v ON v.name = m.name GROUP BY m.name ORDER BY m.created_at"
+            ).fetchall()
+            return [
+                {
+                    "name": name,
+                    "latest_version": self.latest_version(name, conn),
+                    "version_count": count,
+                    "created_at": created_at,
+                }
+                for name, created_at, count in rows
+            ]
+
+    def list_versions(self, name: str) -> List[Dict[str, Any]]:
+        """Versions of one model, newest first."""
+        with self.read() as conn:
+            rows = conn.execute(
+                "SELECT metadata, is_production FROM model_versions WHERE name = ? "
+                "ORDER BY major DESC, minor DESC, patch DESC",
+                (name,),
+            ).fetchall()
+        versions = []
+        for metadata_json, is_production in rows:
+            metadata = json.loads(metadata_json)
+            metadata["is_production"] = bool(is_production)
+            versions.append(metadata)
+        return versions
+
+    def versions_with_tag(self, tag: str) -> List[Tuple[str, str]]:
+        with self.read() as conn:
+            return conn.execute(
+                "SELECT name, version FROM model_tags WHERE tag = ? ORDER BY name, version", (tag,)
+            ).fetchall()
+
+    def add_version(self, metadata: Dict[str, Any], conn=None):
+        name, version = metadata["name"], metadata["version"]
+        with self._write(conn) as c:
+            c.execute(
+                "INSERT OR IGNORE INTO models (name, created_at) VALUES (?, ?)",
+                (name, metadata.get("created_at") or _now()),
+            )
+            c.execute(
+                "INSERT INTO model_versions "
+                "(name, version, major, minor, patch, is_production, created_at, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (name, version) DO UPDATE SET is_production = excluded.is_production, "
+                "metadata = excluded.metadata",
+                (name, version, *_semver(version), int(bool(metadata.get("is_production"))),
+                 metadata.get("created_at") or _now(), json.dumps(metadata, default=str)),
+            )
+            c.execute("DELETE FROM model_tags WHERE name = ? AND version = ?", (name, version))
+            c.executemany(
+                "INSERT OR IGNORE INTO model_tags (name, version, tag) VALUES (?, ?, ?)",
+                [(name, version, tag) for tag in metadata.get("tags") or []],
+            )
+            c.execute("DELETE FROM version_reservations WHERE name = ? AND version = ?", (name, version))
+            if metadata.get("is_production"):
+                self._touch(c, production_model=f"{name}:{version}")
+            else:
+                self._touch(c)
+
+    def set_production(self, name: str, version: str) -> bool:
+        """Atomically make `version` the only production version of `name`."""
+        with self.write_transaction() as conn:
+            if self.get_version(name, version, conn) is None:
+                return False
+            conn.execute(
+                "UPDATE model_versions SET is_production = (version = ?) WHERE name = ?",
+                (version, name),
+            )
+            self._touch(conn, production_model=f"{name}:{version}")
+        return True
+
+    def delete_version(self, name: str, version: str, conn=None):
+        with self._write(conn) as c:
+            c.execute("DELETE FROM model_tags WHERE name = ? AND version = ?", (name, version))
+            c.execute("DELETE FROM model_versions WHERE name = ? AND version = ?", (name, version))
+            self._touch(c)
+
+    def _build_snapshot(self) -> Dict[str, Any]:
+        """The whole registry in the legacy registry.json layout."""
+        snapshot = {
+            "models": {},
+            "production_model": self.get_meta("production_model"),
+            "staging_model": self.get_meta("staging_model"),
+            "created_at": self.get_meta("created_at"),
+            "updated_at": self.get_meta("updated_at"),
+        }
+        for model in self.list_models():
+            snapshot["models"][model["name"]] = {
+                "created_at": model["created_at"],
+                "versions": {v["version"]: v for v in reversed(self.list_versions(model["name"]))},
+            }
+        return snapshot
+
+    def import_snapshot(self, data: Dict[str, Any]):
+        """One-time migration from a legacy registry.json."""
+        with self.write_transaction() as conn:
+            for name, info in data.get("models", {}).items():
+                conn.execute("INSERT OR IGNORE INTO models (name, created_at) VALUES (?, ?)",
+                             (name, info.get("created_at") or _now()))
+                for metadata in info.get("versions", {}).values():
+                    self.add_version(metadata, conn)
+            self._touch(conn, production_model=data.get("production_model"),
+                        staging_model=data.get("staging_model"))
+
+
+class ExperimentStore(_SQLiteStore):
+    """Experiment records (one JSON blob each) with tag and metric indexes."""
+
+    META_TABLE = "experiment_meta"
+
+    def __init__(self, db_path: Path):
+        super().__init__(db_path, EXPERIMENT_SCHEMA)
+
+    def is_empty(self) -> bool:
+        with self.read() as conn:
+            return conn.execute("SELECT 1 FROM experiments LIMIT 1").fetchone() is None
+
+    def get(self, experiment_id: str, conn=None) -> Optional[Dict[str, Any]]:
+        with self.read(conn) as c:
+            row = c.execute(
+                "SELECT record FROM experiments WHERE experiment_id = ?", (experiment_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, record: Dict[str, Any], conn=None):
+        """Insert or update a record and refresh its tag/metric index rows.
+
+        Updates keep the row (and its rowid), so insertion order survives them.
+        """
+        exp_id = record["experiment_id"]
+        with self._write(conn) as c:
+            c.execute(
+                "INSERT INTO experiments "
+                "(experiment_id, name, status, timestamp, model_version, record) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (experiment_id) DO UPDATE SET name = excluded.name, status = excluded.status, "
+                "model_version = excluded.model_version, record = excluded.record",
+                (exp_id, record["name"], record["status"], record["timestamp"],
+                 record.get("model_version", ""), json.dumps(record, default=str)),
+            )
+            c.execute("DELETE FROM experiment_tags WHERE experiment_id = ?", (exp_id,))
+            c.executemany(
+                "INSERT OR IGNORE INTO experiment_tags (experiment_id, tag) VALUES (?, ?)",
+                [(exp_id, tag) for tag in record.get("tags") or []],
+            )
+            c.execute("DELETE FROM experiment_metrics WHERE experiment_id = ?", (exp_id,))
+            c.executemany(
+                "INSERT INTO experiment_metrics (experiment_id, metric, value) VALUES (?, ?, ?)",
+                [(exp_id, metric, float(value)) for metric, value in (record.get("metrics") or {}).items()
+                 if isinstance(value, (int, float)) and not isinstance(value, bool)],
+            )
+            self._bump_revision(c)
+
+    def update(self, experiment_id: str, mutate) -> Optional[Dict[str, Any]]:
+        """Read-modify-write one record under the write lock. Returns None if missing."""
+        with self.write_transaction() as conn:
+            record = self.get(experiment_id, conn)
+            if record is None:
+                return None
+            mutate(record)
+            self.put(record, conn)
+        return record
+
+    def get_many(self, experiment_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        ids = list(experiment_ids)
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self.read() as conn:
+            rows = conn.execute(
+                f"SELECT experiment_id, record FROM experiments WHERE experiment_id IN ({placeholders})", ids
+            ).fetchall()
+        return {exp_id: json.loads(record) for exp_id, record in rows}
+
+    def list(self, status: Optional[str] = None, tags: Optional[List[str]] = None,
+             limit: int = 50) -> List[Dict[str, Any]]:
+        """Records newest first, optionally filtered by status and any of `tags`."""
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if tags:
+            clauses.append(
+                "experiment_id IN (SELECT experiment_id FROM experiment_tags "
+                f"WHERE tag IN ({','.join('?' * len(tags))}))"
+            )
+            params.extend(tags)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+        with self.read() as conn:
+            rows = conn.execute(
+                f"SELECT record FROM experiments {where} ORDER BY timestamp DESC LIMIT ?", params
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def best(self, metric: str, maximize: bool = True, status: str = "completed") -> Optional[Dict[str, Any]]:
+        """Record with the best value of `metric` (earliest wins ties)."""
+        order = "DESC" if maximize else "ASC"
+        with self.read() as conn:
+            row = conn.execute(
+                "SELECT e.record FROM experiment_metrics m "
+                "JOIN experiments e ON e.experiment_id = m.experiment_id "
+                f"WHERE m.metric = ? AND e.status = ? ORDER BY m.value {order}, e.timestamp ASC, e.rowid ASC LIMIT 1",
+                (metric, status),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _build_snapshot(self) -> Dict[str, Any]:
+        """All experiments in the legacy experiments.json layout."""
+        with self.read() as conn:
+            rows = conn.execute("SELECT experiment_id, record FROM experiments ORDER BY timestamp, rowid").fetchall()
+        return {"experiments": {exp_id: json.loads(record) for exp_id, record in rows}}
+
+    def import_snapshot(self, data: Dict[str, Any]):
+        """One-time migration from a legacy experiments.json."""
+        with self.write_transaction() as conn:
+            for exp_id, record in data.get("experiments", {}).items():
+                self.put({"experiment_id": exp_id, **record}, conn)
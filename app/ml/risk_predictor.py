@@ -3,15 +3,34 @@ import joblib
 import pandas as pd
 import glob
 import logging
+import threading
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO)
 
 class RiskPredictor:
-    def __init__(self, models_dir="models"):
+    def __init__(self, models_dir="models", lazy=False):
+        """
+        Args:
+            models_dir: Directory holding risk_model_v*.pkl files
+            lazy: Don't touch the disk here; load the latest model on the
+                first prediction
+        """
         self.models_dir = models_dir
         self.model = None
-        self.load_latest_model()
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        if not lazy:
+            self.ensure_loaded()
+
+    def ensure_loaded(self):
+        """Load the latest model once (a missing model means rule-based fallback)."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self.load_latest_model()
+                self._loaded = True
         
     def load_latest_model(self):
         """Finds and loads the most recent model file."""
@@ -40,6 +59,7 @@ class RiskPredictor:
         Predicts risk level.
         Returns: 'High Risk', 'Medium Risk', 'Low Risk', or 'Unknown'
         """
+        self.ensure_loaded()
         # Fallback if no model
         if self.model is None:
             logging.info("ML Model not loaded. Using Rule-Based Fallback.")
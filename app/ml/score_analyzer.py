@@ -20,27 +20,22 @@ class ScoreAnalyzer:
         """Validate new score against user history."""
         session = get_session()
         try:
-            # Get user's historical scores
-            historical_scores = session.query(Score).filter(
-                Score.username == username
-            ).all()
+            # Running statistics of the user's historical scores
+            history = self.detector.statistics.for_user(session, username)
             
-            if not historical_scores:
+            if history.count == 0:
                 return {
                     "valid": True,
                     "warnings": [],
                     "message": "First score - no historical comparison available"
                 }
             
-            historical_values = [s.total_score for s in historical_scores]
-            
             warnings = []
             
             # Check if new score would be statistical outlier
-            all_scores = historical_values + [score_value]
-            result = self.detector.detect_outliers_zscore(all_scores)
+            check = self.detector.check_score(score_value, history.with_value(score_value))
             
-            if score_value in result["outliers"]:
+            if check["checks"]["zscore"]["is_outlier"]:
                 warnings.append({
                     "type": "statistical_outlier",
                     "severity": "medium",
@@ -48,9 +43,9 @@ class ScoreAnalyzer:
                 })
             
             # Check for extreme change from last score
-            last_score = historical_values[-1]
+            last_score = history.last
             change = abs(score_value - last_score)
-            avg_change = self._calculate_average_change(historical_values)
+            avg_change = history.average_change
             
             if change > 3 * avg_change:
                 warnings.append({
@@ -63,9 +58,9 @@ class ScoreAnalyzer:
                 "valid": len(warnings) == 0 or all(w["severity"] != "critical" for w in warnings),
                 "warnings": warnings,
                 "validation_details": {
-                    "user_history_count": len(historical_values),
-                    "historical_mean": sum(historical_values) / len(historical_values),
-                    "historical_std": self._calculate_std(historical_values),
+                    "user_history_count": history.count,
+                    "historical_mean": history.mean,
+                    "historical_std": history.std_dev,
                     "change_from_last": score_value - last_score
                 }
             }
@@ -192,14 +187,6 @@ class ScoreAnalyzer:
     
     # Helper methods
     
-    def _calculate_average_change(self, values: List[int]) -> float:
-        """Calculate average absolute change between consecutive values"""
-        if len(values) < 2:
-            return 0
-        
-        changes = [abs(values[i+1] - values[i]) for i in range(len(values)-1)]
-        return sum(changes) / len(changes)
-    
     def _calculate_std(self, values: List[int]) -> float:
         """Calculate standard deviation"""
         if len(values) < 2:
@@ -0,0 +1,103 @@
+"""
+Vectorized synthetic training data for the depression-risk model.
+
+Shared by SoulSenseMLPredictor.train_sample_model and the training
+pipeline (scripts/ml_training_pipeline.py). Columns follow the predictor's
+feature order; labels use the app's risk rules (0 = low, 1 = moderate,
+2 = high). Everything is array arithmetic on a seeded numpy Generator, so
+millions of rows are cheap and a fixed seed is reproducible.
+"""
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+FEATURE_NAMES = [
+    'emotional_recognition',
+    'emotional_understanding',
+    'emotional_regulation',
+    'emotional_reflection',
+    'social_awareness',
+    'total_score',
+    'age',
+    'average_score',
+    'sentiment_score'
+]
+
+N_QUESTIONS = 5
+
+
+def _generate_block(rng: np.random.Generator, n_samples: int, age_range: Tuple[int, int],
+                    sentiment_std: float, threshold_std: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Generate one (X, y) block from rng."""
+    # Individual question scores (1-5)
+    q_scores = rng.integers(1, 6, size=(n_samples, N_QUESTIONS))
+
+    # Derived features
+    total_score = q_scores.sum(axis=1)
+    age = rng.integers(age_range[0], age_range[1], size=n_samples)
+    avg_score = total_score / N_QUESTIONS
+
+    # Sentiment correlated with EQ score + noise
+    base_sentiment = (total_score / 25.0) * 100
+    sentiment_noise = rng.normal(0, sentiment_std, size=n_samples)
+    sentiment_score = np.clip((base_sentiment - 50) * 2 + sentiment_noise, -100, 100)
+
+    X = np.empty((n_samples, len(FEATURE_NAMES)))
+    X[:, :N_QUESTIONS] = q_scores
+    X[:, 5] = total_score
+    X[:, 6] = age
+    X[:, 7] = avg_score
+    X[:, 8] = sentiment_score
+
+    # Optional per-sample jitter on the rule thresholds
+    if threshold_std > 0:
+        noise = rng.normal(0, threshold_std, size=n_samples)
+    else:
+        noise = 0.0
+
+    # Risk classification rules
+    # High Risk: Low EQ OR (Moderate EQ + Very Negative Sentiment)
+    # Moderate Risk: Moderate EQ OR (High EQ + Negative Sentiment)
+    high = (total_score <= 10 + noise) | ((total_score <= 15 + noise) & (sentiment_score < -50))
+    moderate = (total_score <= 15 + noise) | ((total_score <= 20 + noise) & (sentiment_score < -20))
+    y = np.select([high, moderate], [2, 1], default=0)
+
+    return X, y
+
+
+def iter_synthetic_chunks(n_samples: int, chunk_size: int = 100_000, seed: Optional[int] = 42,
+                          age_range: Tuple[int, int] = (12, 50), sentiment_std: float = 30.0,
+                          threshold_std: float = 0.0) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yield (X, y) chunks of at most chunk_size rows, n_samples in total.
+
+    For out-of-core training (e.g. partial_fit): only one chunk is held in
+    memory. The same seed and chunk_size always give the same data.
+    """
+    rng = np.random.default_rng(seed)
+    chunk_size = max(1, int(chunk_size))
+    remaining = int(n_samples)
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        yield _generate_block(rng, size, age_range, sentiment_std, threshold_std)
+        remaining -= size
+
+
+def generate_synthetic_data(n_samples: int = 1000, seed: Optional[int] = 42,
+                            age_range: Tuple[int, int] = (12, 50), sentiment_std: float = 30.0,
+                            threshold_std: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generate n_samples rows of synthetic features and risk labels.
+
+    Args:
+        n_samples: Number of samples
+        seed: Seed for numpy's default_rng (None = fresh entropy)
+        age_range: [low, high) range for the age column
+        sentiment_std: Std-dev of the noise added to the derived sentiment
+        threshold_std: Std-dev of per-sample noise on the risk thresholds
+
+    Returns:
+        Tuple of (X, y): X is (n_samples, len(FEATURE_NAMES)) float, y is int
+    """
+    rng = np.random.default_rng(seed)
+    return _generate_block(rng, int(n_samples), age_range, sentiment_std, threshold_std)
@@ -21,12 +21,38 @@ from typing import Dict, Any, Optional, List, Tuple
 from dataclasses import dataclass, asdict, field
 import uuid
 import logging
+import threading
+from collections import OrderedDict
+import joblib
+import numpy as np
 from app.config import MODELS_DIR, DATA_DIR
+from .registry_store import ExperimentStore, ModelStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Read size for artifact hashing
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# In-process cache of loaded artifacts, shared by all ModelRegistry
+# instances: (name, version, file_hash, mmap_mode) -> (model_data, verified).
+# verified records whether the artifact's hash was checked when it was loaded.
+# Every caller gets the same model/scaler objects, which must be treated as
+# read-only. The cache saves repeated unpickling within one process only:
+# sklearn trees copy their node arrays in __setstate__, so mmap_mode gives
+# no cross-process page sharing for model.pkl. Only CompiledTreeEnsemble
+# arrays stay memory-mapped.
+MODEL_CACHE_SIZE = 4
+_model_cache: "OrderedDict[Tuple[str, str, str, Optional[str]], Tuple[Dict[str, Any], bool]]" = OrderedDict()
+_model_cache_lock = threading.Lock()
+
+
+def clear_model_cache():
+    """Drop all cached model artifacts."""
+    with _model_cache_lock:
+        _model_cache.clear()
+
 
 @dataclass
 class ModelMetadata:
@@ -69,6 +95,134 @@ class ExperimentRecord:
     tags: List[str] = field(default_factory=list)
 
 
+class CompiledTreeEnsemble:
+    """
+    Flattened tree ensemble evaluated with pure NumPy.
+    
+    All trees of a fitted forest are concatenated into contiguous node
+    arrays (feature, threshold, left, right, value). Leaves point to
+    themselves, so a batch walks every tree at once with one vectorized
+    step per depth level. Results match sklearn's predict_proba
+    bit-for-bit: X is cast to float32 like sklearn does, trees are
+    accumulated in estimator order, then divided by the tree count.
+    """
+    
+    ARRAYS = ("feature", "threshold", "left", "right", "value", "roots", "classes")
+    
+    def __init__(self, feature, threshold, left, right, value, roots, classes, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes = classes
+        self.max_depth = int(max_depth)
+    
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+    
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node index per (row, tree), shape (n_samples, n_trees)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+    
+    def predict_proba(self, X: np.ndarray, chunk_size: int = 10000) -> np.ndarray:
+        """Class probabilities, shape (n_samples, n_classes)."""
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        proba = np.zeros((X.shape[0], self.value.shape[1]))
+        for start in range(0, X.shape[0], chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            out = proba[start:start + chunk_size]
+            for t in range(self.n_trees):
+                out += self.value[leaves[:, t]]
+        proba /= self.n_trees
+        return proba
+    
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1))
+    
+    def save(self, path) -> None:
+        data = {name: getattr(self, name) for name in self.ARRAYS}
+        data["max_depth"] = self.max_depth
+        joblib.dump(data, path)
+    
+    @classmethod
+    def load(cls, path, mmap_mode: Optional[str] = "r") -> "CompiledTreeEnsemble":
+        """Load a saved ensemble; with mmap_mode the node arrays are shared page-cache mappings."""
+        data = joblib.load(path, mmap_mode=mmap_mode)
+        return cls(*(data[name] for name in cls.ARRAYS), max_depth=data["max_depth"])
+
+
+def compile_tree_ensemble(model: Any) -> Optional[CompiledTreeEnsemble]:
+    """
+    Export a fitted single-output forest / decision tree classifier to a
+    CompiledTreeEnsemble. Returns None for unsupported models.
+    """
+    try:
+        from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+        from sklearn.tree import DecisionTreeClassifier
+    except ImportError:
+        return None
+    
+    if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        if not hasattr(model, "estimators_"):
+            return None
+        trees = model.estimators_
+    elif isinstance(model, DecisionTreeClassifier) and hasattr(model, "tree_"):
+        trees = [model]
+    else:
+        return None
+    if getattr(model, "n_outputs_", 1) != 1:
+        return None
+    
+    n_classes = int(model.n_classes_)
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in trees:
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+        node_ids = np.arange(offset, offset + n_nodes, dtype=np.int32)
+        is_leaf = tree.children_left == -1
+        
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.int32))
+        rights.append(np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.int32))
+        
+        # Same normalization as DecisionTreeClassifier.predict_proba
+        value = tree.value[:, 0, :n_classes].astype(np.float64)
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+        
+        roots.append(offset)
+        max_depth = max(max_depth, tree.max_depth)
+        offset += n_nodes
+    
+    return CompiledTreeEnsemble(
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds),
+        left=np.concatenate(lefts),
+        right=np.concatenate(rights),
+        value=np.concatenate(values),
+        roots=np.asarray(roots, dtype=np.int32),
+        classes=np.asarray(model.classes_),
+        max_depth=max_depth,
+    )
+
+
 class SemanticVersion:
     """Handles semantic versioning (major.minor.patch)."""
     
@@ -113,55 +267,53 @@ class ModelRegistry:
     - Model comparison and rollback
     """
     
-    def __init__(self, registry_path: str = None):
+    COMPILED_FILE = "compiled.joblib"
+    
+    def __init__(self, registry_path: str = None, mmap_mode: Optional[str] = "r",
+                 verify_hash: bool = False):
+        """
+        Args:
+            registry_path: Registry root directory
+            mmap_mode: joblib mmap_mode for artifact arrays (None = load into memory)
+            verify_hash: Check an artifact's SHA256 against the registry the
+                first time it is loaded in this process
+        """
         self.registry_path = Path(registry_path or os.path.join(MODELS_DIR, "registry"))
+        self.mmap_mode = mmap_mode
+        self.verify_hash = verify_hash
         self.models_path = self.registry_path / "models"
         self.metadata_file = self.registry_path / "registry.json"
+        self.db_file = self.registry_path / "registry.db"
         
         # Create directories
         self.models_path.mkdir(parents=True, exist_ok=True)
         
-        # Load or initialize registry
-        self.registry = self._load_registry()
-    
-    def _load_registry(self) -> Dict[str, Any]:
-        """Load registry from disk."""
-        if self.metadata_file.exists():
+        # Indexed, multi-process safe store (migrates a legacy registry.json once)
+        self.store = ModelStore(self.db_file)
+        if self.store.is_empty() and self.metadata_file.exists():
             with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {
-            "models": {},
-            "production_model": None,
-            "staging_model": None,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }
+                self.store.import_snapshot(json.load(f))
+            logger.info(f"Migrated {self.metadata_file} into {self.db_file}")
     
-    def _save_registry(self):
-        """Save registry to disk."""
-        self.registry["updated_at"] = datetime.now(timezone.utc).isoformat()
-        with open(self.metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(self.registry, f, indent=2, default=str)
+    @property
+    def registry(self) -> Dict[str, Any]:
+        """Read-only snapshot in the legacy registry.json layout."""
+        return self.store.snapshot()
     
     def _compute_file_hash(self, filepath: Path) -> str:
         """Compute SHA256 hash of a file."""
         sha256_hash = hashlib.sha256()
         with open(filepath, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
+            for byte_block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
                 sha256_hash.update(byte_block)
         return sha256_hash.hexdigest()
     
-    def _get_next_version(self, model_name: str, bump_type: str = "patch") -> str:
-        """Get the next version for a model."""
-        if model_name not in self.registry["models"]:
-            return "1.0.0"
-        
-        versions = self.registry["models"][model_name]["versions"]
-        if not versions:
+    def _get_next_version(self, model_name: str, bump_type: str = "patch", conn=None) -> str:
+        """Get the next version for a model (after any reserved, not yet registered one)."""
+        latest = self.store.latest_allocated_version(model_name, conn)
+        if latest is None:
             return "1.0.0"
         
-        # Get latest version
-        latest = max(versions.keys(), key=lambda v: SemanticVersion(v))
         current = SemanticVersion(latest)
         
         if bump_type == "major":
@@ -210,19 +362,37 @@ class ModelRegistry:
         Returns:
             ModelMetadata for the registered model
         """
-        # Initialize model entry if needed
-        if name not in self.registry["models"]:
-            self.registry["models"][name] = {
-                "created_at": datetime.now(timezone.utc).isoformat(),
-                "versions": {}
-            }
-        
-        # Generate version
-        version = self._get_next_version(name, bump_type)
-        model_id = f"{name}_v{version}_{uuid.uuid4().hex[:8]}"
+        # Reserve the version number in a short write transaction; the
+        # artifact is written and hashed outside any transaction, then the
+        # version row is added in a second one. A crashed registration only
+        # leaves a skipped version number behind.
+        with self.store.write_transaction() as conn:
+            version = self._get_next_version(name, bump_type, conn)
+            parent_version = self.store.latest_version(name, conn)
+            self.store.reserve_version(name, version, conn)
         
-        # Create model directory
         model_dir = self.models_path / name / version
+        try:
+            metadata = self._write_version(
+                model_dir, model, name, version, parent_version, description, model_type,
+                framework, metrics, parameters, feature_names, class_names, tags, scaler,
+                additional_artifacts, notes
+            )
+            # Also clears the reservation
+            self.store.add_version(asdict(metadata))
+        except BaseException:
+            shutil.rmtree(model_dir, ignore_errors=True)
+            self.store.release_version(name, version)
+            raise
+        
+        logger.info(f"✅ Registered model: {name} v{version} (ID: {metadata.model_id})")
+        return metadata
+    
+    def _write_version(self, model_dir, model, name, version, parent_version, description,
+                       model_type, framework, metrics, parameters, feature_names, class_names,
+                       tags, scaler, additional_artifacts, notes) -> ModelMetadata:
+        """Write a reserved version's artifacts and metadata.json."""
+        model_id = f"{name}_v{version}_{uuid.uuid4().hex[:8]}"
         model_dir.mkdir(parents=True, exist_ok=True)
         
         # Save model artifacts
@@ -234,18 +404,19 @@ class ModelRegistry:
             **(additional_artifacts or {})
         }
         
+        # joblib keeps numpy arrays as raw buffers so loads can memory-map them
         model_file = model_dir / "model.pkl"
-        with open(model_file, 'wb') as f:
-            pickle.dump(model_data, f)
+        joblib.dump(model_data, model_file)
+        
+        # Export tree ensembles for low-latency NumPy inference
+        compiled = compile_tree_ensemble(model)
+        if compiled is not None:
+            compiled.save(model_dir / self.COMPILED_FILE)
         
         # Compute file hash and size
         file_hash = self._compute_file_hash(model_file)
         file_size = model_file.stat().st_size
         
-        # Get parent version
-        versions = list(self.registry["models"][name]["versions"].keys())
-        parent_version = max(versions, key=lambda v: SemanticVersion(v)) if versions else None
-        
         # Create metadata
         metadata = ModelMetadata(
             model_id=model_id,
@@ -271,11 +442,6 @@ class ModelRegistry:
         with open(metadata_file, 'w', encoding='utf-8') as f:
             json.dump(asdict(metadata), f, indent=2)
         
-        # Update registry
-        self.registry["models"][name]["versions"][version] = asdict(metadata)
-        self._save_registry()
-        
-        logger.info(f"✅ Registered model: {name} v{version} (ID: {model_id})")
         return metadata
     
     def get_model(
@@ -286,6 +452,10 @@ class ModelRegistry:
         """
         Load a model by name and version.
         
+        The returned dict is a fresh copy, but the estimator and scaler in it
+        are shared with every other caller in the process: don't fit or
+        otherwise mutate them (build new objects to retrain).
+        
         Args:
             name: Model name
             version: Version string (default: latest)
@@ -293,33 +463,85 @@ class ModelRegistry:
         Returns:
             Tuple of (model_data, metadata)
         """
-        if name not in self.registry["models"]:
+        if not self.store.has_model(name):
             raise ValueError(f"Model '{name}' not found in registry")
         
-        versions = self.registry["models"][name]["versions"]
-        if not versions:
-            raise ValueError(f"No versions found for model '{name}'")
-        
         # Get version
         if version is None:
-            version = max(versions.keys(), key=lambda v: SemanticVersion(v))
+            version = self.store.latest_version(name)
+            if version is None:
+                raise ValueError(f"No versions found for model '{name}'")
         
-        if version not in versions:
+        metadata_dict = self.store.get_version(name, version)
+        if metadata_dict is None:
             raise ValueError(f"Version '{version}' not found for model '{name}'")
         
+        # Load metadata
+        metadata = ModelMetadata(**metadata_dict)
+        
+        needs_verification = bool(self.verify_hash and metadata.file_hash)
+        cache_key = (name, version, metadata.file_hash, self.mmap_mode)
+        with _model_cache_lock:
+            entry = _model_cache.get(cache_key)
+            if entry is not None:
+                _model_cache.move_to_end(cache_key)
+        # An entry loaded without verification is reloaded (and verified) for
+        # registries that require it
+        if entry is not None and (entry[1] or not needs_verification):
+            logger.debug(f"Model cache hit: {name} v{version}")
+            return dict(entry[0]), metadata
+        
         # Load model
         model_dir = self.models_path / name / version
         model_file = model_dir / "model.pkl"
         
-        with open(model_file, 'rb') as f:
-            model_data = pickle.load(f)
+        if needs_verification:
+            actual_hash = self._compute_file_hash(model_file)
+            if actual_hash != metadata.file_hash:
+                raise ValueError(
+                    f"Hash mismatch for model '{name}' v{version}: artifact may be corrupted"
+                )
         
-        # Load metadata
-        metadata_dict = versions[version]
-        metadata = ModelMetadata(**metadata_dict)
+        # Reads joblib and legacy pickle artifacts alike
+        model_data = joblib.load(model_file, mmap_mode=self.mmap_mode)
+        
+        with _model_cache_lock:
+            _model_cache[cache_key] = (model_data, needs_verification)
+            _model_cache.move_to_end(cache_key)
+            while len(_model_cache) > MODEL_CACHE_SIZE:
+                _model_cache.popitem(last=False)
         
         logger.info(f"✅ Loaded model: {name} v{version}")
-        return model_data, metadata
+        return dict(model_data), metadata
+
+    def get_compiled_model(
+        self,
+        name: str,
+        version: Optional[str] = None
+    ) -> Optional[CompiledTreeEnsemble]:
+        """
+        Load the flattened NumPy evaluator for a registered tree ensemble.
+        
+        Versions registered before the export step existed are compiled
+        from model.pkl on first request and the result is saved.
+        
+        Returns:
+            CompiledTreeEnsemble, or None if the model is not a supported forest
+        """
+        if version is None:
+            version = self.store.latest_version(name)
+            if version is None:
+                raise ValueError(f"Model '{name}' not found in registry")
+        
+        compiled_file = self.models_path / name / version / self.COMPILED_FILE
+        if compiled_file.exists():
+            return CompiledTreeEnsemble.load(compiled_file, mmap_mode=self.mmap_mode)
+        
+        model_data, _ = self.get_model(name, version)
+        compiled = compile_tree_ensemble(model_data["model"])
+        if compiled is not None:
+            compiled.save(compiled_file)
+        return compiled
 
     # Backwards-compatible alias for older callers
     def load_model(self, name: str, version: Optional[str] = None) -> Tuple[Any, ModelMetadata]:
@@ -328,15 +550,10 @@ class ModelRegistry:
     
     def get_production_model(self, name: str) -> Optional[Tuple[Any, ModelMetadata]]:
         """Get the production model for a given name."""
-        if name not in self.registry["models"]:
+        version = self.store.production_version(name)
+        if version is None:
             return None
-        
-        versions = self.registry["models"][name]["versions"]
-        for version, metadata in versions.items():
-            if metadata.get("is_production", False):
-                return self.get_model(name, version)
-        
-        return None
+        return self.get_model(name, version)
 
     def has_active_run(self) -> bool:
         """Return True if there is an active experiment run."""
@@ -344,55 +561,35 @@ class ModelRegistry:
     
     def promote_to_production(self, name: str, version: str) -> bool:
         """Promote a model version to production."""
-        if name not in self.registry["models"]:
+        if not self.store.has_model(name):
             raise ValueError(f"Model '{name}' not found")
         
-        versions = self.registry["models"][name]["versions"]
-        if version not in versions:
+        # Demote the current production model and promote the new one atomically
+        if not self.store.set_production(name, version):
             raise ValueError(f"Version '{version}' not found")
         
-        # Demote current production model
-        for v, meta in versions.items():
-            meta["is_production"] = False
-        
-        # Promote new version
-        versions[version]["is_production"] = True
-        self.registry["production_model"] = f"{name}:{version}"
-        self._save_registry()
-        
         logger.info(f"🚀 Promoted {name} v{version} to production")
         return True
     
     def list_models(self) -> List[Dict[str, Any]]:
         """List all registered models."""
-        models_list = []
-        for name, info in self.registry["models"].items():
-            latest_version = max(info["versions"].keys(), key=lambda v: SemanticVersion(v)) if info["versions"] else None
-            models_list.append({
-                "name": name,
-                "latest_version": latest_version,
-                "version_count": len(info["versions"]),
-                "created_at": info["created_at"]
-            })
-        return models_list
+        return self.store.list_models()
     
     def list_versions(self, name: str) -> List[Dict[str, Any]]:
-        """List all versions of a model."""
-        if name not in self.registry["models"]:
-            return []
-        
-        versions = []
-        for version, metadata in self.registry["models"][name]["versions"].items():
-            versions.append({
-                "version": version,
+        """List all versions of a model (newest first)."""
+        return [
+            {
+                "version": metadata["version"],
                 "created_at": metadata["created_at"],
                 "is_production": metadata.get("is_production", False),
                 "metrics": metadata.get("metrics", {})
-            })
-        
-        # Sort by version
-        versions.sort(key=lambda x: SemanticVersion(x["version"]), reverse=True)
-        return versions
+            }
+            for metadata in self.store.list_versions(name)
+        ]
+    
+    def find_by_tag(self, tag: str) -> List[Tuple[str, str]]:
+        """(name, version) pairs of all model versions carrying `tag`."""
+        return self.store.versions_with_tag(tag)
     
     def compare_versions(
         self,
@@ -401,17 +598,15 @@ class ModelRegistry:
         version2: str
     ) -> Dict[str, Any]:
         """Compare two versions of a model."""
-        if name not in self.registry["models"]:
+        if not self.store.has_model(name):
             raise ValueError(f"Model '{name}' not found")
         
-        versions = self.registry["models"][name]["versions"]
+        meta1 = self.store.get_version(name, version1)
+        meta2 = self.store.get_version(name, version2)
         
-        if version1 not in versions or version2 not in versions:
+        if meta1 is None or meta2 is None:
             raise ValueError("One or both versions not found")
         
-        meta1 = versions[version1]
-        meta2 = versions[version2]
-        
         # Compare metrics
         metrics_comparison = {}
         all_metrics = set(meta1.get("metrics", {}).keys()) | set(meta2.get("metrics", {}).keys())
@@ -445,25 +640,28 @@ class ModelRegistry:
     
     def delete_version(self, name: str, version: str, force: bool = False) -> bool:
         """Delete a specific version."""
-        if name not in self.registry["models"]:
+        if not self.store.has_model(name):
             raise ValueError(f"Model '{name}' not found")
         
-        versions = self.registry["models"][name]["versions"]
-        if version not in versions:
-            raise ValueError(f"Version '{version}' not found")
-        
-        metadata = versions[version]
-        if metadata.get("is_production", False) and not force:
-            raise ValueError("Cannot delete production model. Use force=True or promote another version first.")
+        with self.store.write_transaction() as conn:
+            metadata = self.store.get_version(name, version, conn)
+            if metadata is None:
+                raise ValueError(f"Version '{version}' not found")
+            
+            if metadata.get("is_production", False) and not force:
+                raise ValueError("Cannot delete production model. Use force=True or promote another version first.")
+            
+            # Update registry
+            self.store.delete_version(name, version, conn)
         
         # Remove model files
         model_dir = self.models_path / name / version
         if model_dir.exists():
             shutil.rmtree(model_dir)
         
-        # Update registry
-        del versions[version]
-        self._save_registry()
+        with _model_cache_lock:
+            for key in [key for key in _model_cache if key[:2] == (name, version)]:
+                del _model_cache[key]
         
         logger.info(f"🗑️ Deleted model: {name} v{version}")
         return True
@@ -484,22 +682,24 @@ class ExperimentTracker:
         self.experiments_path = Path(experiments_path or os.path.join(DATA_DIR, "experiments"))
         self.experiments_path.mkdir(parents=True, exist_ok=True)
         self.experiments_file = self.experiments_path / "experiments.json"
-        self.experiments = self._load_experiments()
-    
-    def _load_experiments(self) -> Dict[str, Any]:
-        """Load experiments from disk."""
-        if self.experiments_file.exists():
+        self.db_file = self.experiments_path / "experiments.db"
+        
+        # Indexed, multi-process safe store (migrates a legacy experiments.json once)
+        self.store = ExperimentStore(self.db_file)
+        if self.store.is_empty() and self.experiments_file.exists():
             with open(self.experiments_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {
-            "experiments": {},
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
+                self.store.import_snapshot(json.load(f))
+            logger.info(f"Migrated {self.experiments_file} into {self.db_file}")
     
-    def _save_experiments(self):
-        """Save experiments to disk."""
-        with open(self.experiments_file, 'w', encoding='utf-8') as f:
-            json.dump(self.experiments, f, indent=2, default=str)
+    @property
+    def experiments(self) -> Dict[str, Any]:
+        """Read-only snapshot in the legacy experiments.json layout."""
+        return self.store.snapshot()
+    
+    def _update(self, experiment_id: str, mutate):
+        """Apply `mutate` to a stored record under the write lock."""
+        if self.store.update(experiment_id, mutate) is None:
+            raise ValueError(f"Experiment '{experiment_id}' not found")
     
     def start_experiment(
         self,
@@ -536,8 +736,7 @@ class ExperimentTracker:
         exp_dir.mkdir(parents=True, exist_ok=True)
         
         # Save experiment
-        self.experiments["experiments"][experiment_id] = asdict(experiment)
-        self._save_experiments()
+        self.store.put(asdict(experiment))
         
         logger.info(f"🧪 Started experiment: {name} (ID: {experiment_id})")
         return experiment_id
@@ -548,11 +747,7 @@ class ExperimentTracker:
         metrics: Dict[str, float]
     ):
         """Log metrics for an experiment."""
-        if experiment_id not in self.experiments["experiments"]:
-            raise ValueError(f"Experiment '{experiment_id}' not found")
-        
-        self.experiments["experiments"][experiment_id]["metrics"].update(metrics)
-        self._save_experiments()
+        self._update(experiment_id, lambda exp: exp["metrics"].update(metrics))
         
         logger.info(f"📊 Logged metrics for experiment {experiment_id}: {metrics}")
     
@@ -563,7 +758,7 @@ class ExperimentTracker:
         artifact_data: Any
     ):
         """Save an artifact for an experiment."""
-        if experiment_id not in self.experiments["experiments"]:
+        if self.store.get(experiment_id) is None:
             raise ValueError(f"Experiment '{experiment_id}' not found")
         
         exp_dir = self.experiments_path / experiment_id
@@ -583,8 +778,7 @@ class ExperimentTracker:
                 pickle.dump(artifact_data, f)
             artifact_file = f"{artifact_name}.pkl"
         
-        self.experiments["experiments"][experiment_id]["artifacts"].append(artifact_file)
-        self._save_experiments()
+        self._update(experiment_id, lambda exp: exp["artifacts"].append(artifact_file))
         
         logger.info(f"📦 Saved artifact: {artifact_file}")
     
@@ -596,16 +790,13 @@ class ExperimentTracker:
         notes: str = ""
     ):
         """Mark an experiment as completed."""
-        if experiment_id not in self.experiments["experiments"]:
-            raise ValueError(f"Experiment '{experiment_id}' not found")
-        
-        exp = self.experiments["experiments"][experiment_id]
-        exp["status"] = "completed"
-        exp["model_version"] = model_version
-        exp["duration_seconds"] = duration_seconds
-        exp["notes"] = notes
+        def complete(exp):
+            exp["status"] = "completed"
+            exp["model_version"] = model_version
+            exp["duration_seconds"] = duration_seconds
+            exp["notes"] = notes
         
-        self._save_experiments()
+        self._update(experiment_id, complete)
         logger.info(f"✅ Completed experiment: {experiment_id}")
     
     def fail_experiment(
@@ -614,22 +805,18 @@ class ExperimentTracker:
         error_message: str = ""
     ):
         """Mark an experiment as failed."""
-        if experiment_id not in self.experiments["experiments"]:
-            raise ValueError(f"Experiment '{experiment_id}' not found")
+        def fail(exp):
+            exp["status"] = "failed"
+            exp["notes"] = f"Failed: {error_message}"
         
-        exp = self.experiments["experiments"][experiment_id]
-        exp["status"] = "failed"
-        exp["notes"] = f"Failed: {error_message}"
-        
-        self._save_experiments()
+        self._update(experiment_id, fail)
         logger.info(f"❌ Failed experiment: {experiment_id}")
     
     def get_experiment(self, experiment_id: str) -> Optional[ExperimentRecord]:
         """Get an experiment by ID."""
-        if experiment_id not in self.experiments["experiments"]:
+        exp_dict = self.store.get(experiment_id)
+        if exp_dict is None:
             return None
-        
-        exp_dict = self.experiments["experiments"][experiment_id]
         return ExperimentRecord(**exp_dict)
     
     def list_experiments(
@@ -638,31 +825,18 @@ class ExperimentTracker:
         tags: Optional[List[str]] = None,
         limit: int = 50
     ) -> List[Dict[str, Any]]:
-        """List experiments with optional filtering."""
-        experiments_list = []
-        
-        for exp_id, exp in self.experiments["experiments"].items():
-            # Filter by status
-            if status and exp["status"] != status:
-                continue
-            
-            # Filter by tags
-            if tags and not any(tag in exp.get("tags", []) for tag in tags):
-                continue
-            
-            experiments_list.append({
-                "experiment_id": exp_id,
+        """List experiments with optional filtering (newest first)."""
+        return [
+            {
+                "experiment_id": exp["experiment_id"],
                 "name": exp["name"],
                 "status": exp["status"],
                 "timestamp": exp["timestamp"],
                 "metrics": exp.get("metrics", {}),
                 "tags": exp.get("tags", [])
-            })
-        
-        # Sort by timestamp (newest first)
-        experiments_list.sort(key=lambda x: x["timestamp"], reverse=True)
-        
-        return experiments_list[:limit]
+            }
+            for exp in self.store.list(status=status, tags=tags, limit=limit)
+        ]
     
     def compare_experiments(
         self,
@@ -675,9 +849,10 @@ class ExperimentTracker:
         }
         
         all_metrics = set()
+        records = self.store.get_many(experiment_ids)
         
         for exp_id in experiment_ids:
-            exp = self.experiments["experiments"].get(exp_id)
+            exp = records.get(exp_id)
             if exp:
                 comparison["experiments"].append({
                     "id": exp_id,
@@ -701,30 +876,12 @@ class ExperimentTracker:
         metric: str,
         maximize: bool = True
     ) -> Optional[Dict[str, Any]]:
-        """Get the best experiment based on a metric."""
-        best_exp = None
-        best_value = float('-inf') if maximize else float('inf')
-        
-        for exp_id, exp in self.experiments["experiments"].items():
-            if exp["status"] != "completed":
-                continue
-            
-            value = exp.get("metrics", {}).get(metric)
-            if value is None:
-                continue
-            
-            if (maximize and value > best_value) or (not maximize and value < best_value):
-                best_value = value
-                best_exp = {
-                    "experiment_id": exp_id,
-                    **exp
-                }
-        
-        return best_exp
+        """Get the best completed experiment based on a metric (index lookup)."""
+        return self.store.best(metric, maximize=maximize)
     
     def generate_report(self, experiment_id: str) -> str:
         """Generate a detailed report for an experiment."""
-        exp = self.experiments["experiments"].get(experiment_id)
+        exp = self.store.get(experiment_id)
         if not exp:
             return f"Experiment {experiment_id} not found"
         
@@ -222,14 +222,11 @@ def receive_before_create(target, connection, **kw):
     """Optimize database settings before tables are created"""
     logger.info("Optimizing database settings...")
     
-    # SQLite specific optimizations
+    # SQLite specific optimizations (same set applied to every pooled connection)
     if connection.engine.name == 'sqlite':
-        connection.execute(text('PRAGMA journal_mode = WAL'))  # Write-Ahead Logging for better concurrency
-        connection.execute(text('PRAGMA synchronous = NORMAL'))  # Good balance of safety and performance
-        connection.execute(text('PRAGMA cache_size = -2000'))  # 2MB cache
-        connection.execute(text('PRAGMA temp_store = MEMORY'))  # Store temp tables in memory
-        connection.execute(text('PRAGMA mmap_size = 268435456'))  # 256MB memory map
-        connection.execute(text('PRAGMA foreign_keys = ON'))  # Enable foreign key constraints
+        from app.db_pool import SQLITE_PRAGMAS
+        for name, value in SQLITE_PRAGMAS:
+            connection.execute(text(f'PRAGMA {name} = {value}'))
 
 @event.listens_for(Question.__table__, 'after_create')
 def receive_after_create_question(target, connection, **kw):
@@ -270,6 +267,50 @@ def receive_after_create_question(target, connection, **kw):
     except:
         logger.warning("FTS5 not available, skipping full-text search optimization")
 
+# ==================== QUESTION BANK GENERATION ====================
+# One-row table whose generation is bumped by triggers on every change to
+# question_bank. Question caches stamp their entries with (bank_id,
+# generation) and revalidate with a single SELECT; bank_id is random per
+# database so a recreated bank never matches an old stamp.
+
+QUESTION_GENERATION_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS question_bank_generation (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        bank_id TEXT NOT NULL,
+        generation INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    INSERT OR IGNORE INTO question_bank_generation (id, bank_id, generation)
+    VALUES (1, lower(hex(randomblob(8))), 0)
+    """,
+] + [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS question_bank_generation_{event_name.lower()}
+    AFTER {event_name} ON question_bank BEGIN
+        UPDATE question_bank_generation SET generation = generation + 1 WHERE id = 1;
+    END
+    """
+    for event_name in ("INSERT", "UPDATE", "DELETE")
+]
+
+QUESTION_GENERATION_SQL = "SELECT bank_id, generation FROM question_bank_generation WHERE id = 1"
+BUMP_QUESTION_GENERATION_SQL = "UPDATE question_bank_generation SET generation = generation + 1 WHERE id = 1"
+
+
+def ensure_question_bank_schema(cursor):
+    """Create the question_bank generation table and triggers (idempotent, DB-API cursor)."""
+    for statement in QUESTION_GENERATION_DDL:
+        cursor.execute(statement)
+
+
+@event.listens_for(Question.__table__, 'after_create')
+def receive_after_create_question_generation(target, connection, **kw):
+    """Track question_bank changes from the moment the table exists"""
+    for statement in QUESTION_GENERATION_DDL:
+        connection.exec_driver_sql(statement)
+
 # ==================== CACHE AND PERFORMANCE TABLES ====================
 
 class QuestionCache(Base):
@@ -384,6 +425,11 @@ def preload_frequent_data(session):
         logger.error(f"Failed to preload data: {e}")
         session.rollback()
 
+def clear_cached_data(session):
+    """Delete the rows written by preload_frequent_data"""
+    session.query(QuestionCache).delete()
+    session.query(StatisticsCache).delete()
+
 # ==================== QUERY OPTIMIZATION FUNCTIONS ====================
 
 def get_active_questions_optimized(session, limit=None, offset=0):
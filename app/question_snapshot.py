@@ -0,0 +1,142 @@
+"""
+Binary snapshot of the question bank.
+
+One file holds every active question so that processes can mmap it at
+startup instead of parsing JSON. Layout (little-endian):
+
+    header      magic "SSQB", format version, bank_id (16 bytes),
+                generation, question count
+    ids         int64[count]
+    min_ages    int32[count]
+    max_ages    int32[count]
+    no_tooltip  uint8[count]     1 where tooltip is NULL
+    text_offs   uint32[count+1]  end of each text in the string blob
+    tip_offs    uint32[count+1]  end of each tooltip (row i starts at tip_offs[i])
+    blob        UTF-8 question texts and tooltips
+
+Numeric columns are zero-copy views of the map; strings are decoded only
+when a row is read. Files are written to a temp file and renamed into place.
+"""
+import mmap
+import os
+import struct
+import sys
+import threading
+from collections.abc import Sequence
+from typing import List, Optional, Tuple
+
+MAGIC = b"SSQB"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHH16sQI")
+ALIGNMENT = 8
+
+QuestionRow = Tuple[int, str, Optional[str], int, int]
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _layout(count: int) -> List[Tuple[str, str, int, int]]:
+    """(name, struct code, offset, length) of each column after the header."""
+    columns = []
+    offset = _align(HEADER.size)
+    for name, code, length in (("ids", "q", count), ("min_ages", "i", count),
+                               ("max_ages", "i", count), ("no_tooltip", "B", count),
+                               ("text_offsets", "I", count + 1), ("tooltip_offsets", "I", count + 1)):
+        columns.append((name, code, offset, length))
+        offset = _align(offset + struct.calcsize(code) * length)
+    columns.append(("blob", "B", offset, 0))
+    return columns
+
+
+def write_snapshot(path: str, rows: List[QuestionRow], stamp: Tuple[str, int]):
+    """Atomically write rows, stamped with (bank_id, generation), to path."""
+    count = len(rows)
+    blob = bytearray()
+    text_offsets, tooltip_offsets = [0], [0]
+    for row in rows:
+        blob += (row[1] or "").encode("utf-8")
+        text_offsets.append(len(blob))
+        blob += (row[2] or "").encode("utf-8")
+        tooltip_offsets.append(len(blob))
+
+    values = {
+        "ids": [row[0] for row in rows],
+        "min_ages": [row[3] for row in rows],
+        "max_ages": [row[4] for row in rows],
+        "no_tooltip": [row[2] is None for row in rows],
+        "text_offsets": text_offsets,
+        "tooltip_offsets": tooltip_offsets,
+    }
+    layout = _layout(count)
+    data = bytearray(layout[-1][2] + len(blob))
+    HEADER.pack_into(data, 0, MAGIC, FORMAT_VERSION, 0,
+                     stamp[0].encode("ascii")[:16], stamp[1], count)
+    for name, code, offset, length in layout[:-1]:
+        struct.pack_into(f"<{length}{code}", data, offset, *values[name])
+    data[layout[-1][2]:] = blob
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class QuestionSnapshot(Sequence):
+    """Read-only, lazily decoded view of a snapshot file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, _, bank_id, generation, count = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"Not a version {FORMAT_VERSION} question snapshot: {path}")
+            self.stamp = (bank_id.rstrip(b"\0").decode("ascii"), generation)
+            self._count = count
+
+            layout = _layout(count)
+            blob_offset = layout[-1][2]
+            if len(self._map) < blob_offset:
+                raise ValueError(f"Truncated question snapshot: {path}")
+            view = self._view = memoryview(self._map)
+            for name, code, offset, length in layout[:-1]:
+                size = struct.calcsize(code) * length
+                if sys.byteorder == "little":
+                    column = view[offset:offset + size].cast(code)
+                else:
+                    column = struct.unpack_from(f"<{length}{code}", self._map, offset)
+                setattr(self, name, column)
+            self._blob = view[blob_offset:]
+            if len(self._blob) < (self.tooltip_offsets[-1] if count else 0):
+                raise ValueError(f"Truncated question snapshot: {path}")
+        except (struct.error, ValueError):
+            self.close()
+            raise
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("question snapshot index out of range")
+        text = bytes(self._blob[self.tooltip_offsets[index]:self.text_offsets[index + 1]]).decode("utf-8")
+        tooltip = None
+        if not self.no_tooltip[index]:
+            start = self.text_offsets[index + 1]
+            tooltip = bytes(self._blob[start:self.tooltip_offsets[index + 1]]).decode("utf-8")
+        return (self.ids[index], text, tooltip, self.min_ages[index], self.max_ages[index])
+
+    def close(self):
+        """Release the memory map (rows can no longer be read)."""
+        for name in ("ids", "min_ages", "max_ages", "no_tooltip", "text_offsets",
+                     "tooltip_offsets", "_blob", "_view"):
+            column = self.__dict__.pop(name, None)
+            if isinstance(column, memoryview):
+                column.release()
+        self._map.close()
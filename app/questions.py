@@ -1,32 +1,41 @@
+import bisect
 import logging
-import json
 import os
+import random
 import time
-from datetime import datetime, timedelta
-from functools import lru_cache
 import threading
 from typing import List, Tuple, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, text
 
 from app.db import get_session, safe_db_context
-from app.models import Question, QuestionCache, StatisticsCache
+from app.models import (
+    Question, clear_cached_data,
+    QUESTION_GENERATION_DDL, QUESTION_GENERATION_SQL
+)
 from app.exceptions import DatabaseError, ResourceError
 from app.config import DATA_DIR
+from app.question_snapshot import QuestionSnapshot, write_snapshot
 
 logger = logging.getLogger(__name__)
 
 # ------------------ CACHING CONFIGURATION ------------------
+# Every tier (memory, the binary snapshot file) is stamped with the question
+# bank's (bank_id, generation), which triggers on question_bank bump on any
+# change. A tier is used only if its stamp matches the current one, so
+# entries stay valid indefinitely between edits and never outlive one.
 CACHE_DIR = os.path.join(DATA_DIR, "cache")
-CACHE_FILE = os.path.join(CACHE_DIR, "questions_cache.json")
-CACHE_MAX_AGE_HOURS = 24  # Cache valid for 24 hours
-MEMORY_CACHE_TTL = 300  # 5 minutes for memory cache
+# One snapshot file per stamp: questions.<bank_id>.<generation>.bin. A mapped
+# file is never replaced (Windows cannot replace or delete a mapped file);
+# older generations are pruned when they are no longer open.
+SNAPSHOT_PREFIX = "questions."
+SNAPSHOT_SUFFIX = ".bin"
+
+# Question rows are (id, question_text, tooltip, min_age, max_age)
+QuestionRow = Tuple[int, str, Optional[str], int, int]
 
 # ------------------ PERFORMANCE OPTIMIZATIONS ------------------
-_questions_cache = {}
-_cache_timestamps = {}
+_questions_cache = {}  # cache key -> (stamp, QuestionBank)
 _cache_lock = threading.Lock()
-_last_preload_time = 0
-_preload_interval = 60  # Preload every 60 seconds if needed
 
 def _ensure_cache_dir():
     """Ensure cache directory exists"""
@@ -36,17 +45,70 @@ def _ensure_cache_dir():
         except OSError as e:
             logger.error(f"Failed to create cache dir: {e}")
 
-def _get_cache_key(age: Optional[int] = None) -> str:
-    """Generate cache key based on age filter"""
-    return f"questions_age_{age}" if age is not None else "questions_all"
+BANK_CACHE_KEY = "questions_all"
 
-def _is_cache_valid(cache_key: str) -> bool:
-    """Check if cache is still valid in memory"""
-    if cache_key not in _cache_timestamps:
-        return False
+
+class QuestionBank:
+    """
+    All active questions plus an age index.
+    
+    The (min_age, max_age) intervals split the age axis into segments at
+    every min_age and max_age + 1; each segment stores the positions of the
+    questions eligible throughout it. A lookup is a bisect over the
+    boundaries plus the k matching rows, and segments with the same
+    eligible set share one tuple, so memory depends on the question bank
+    rather than on how many distinct ages have been asked for.
+    """
+    
+    def __init__(self, rows):
+        # A QuestionSnapshot is kept as is: rows are decoded only when read
+        if isinstance(rows, QuestionSnapshot):
+            self.rows = rows
+            min_ages, max_ages = rows.min_ages, rows.max_ages
+        else:
+            self.rows = list(rows)
+            min_ages = [r[3] for r in self.rows]
+            max_ages = [r[4] for r in self.rows]
+        
+        self._bounds = sorted(set(min_ages) | {age + 1 for age in max_ages})
+        shared = {}
+        self._segments = []
+        for start in self._bounds[:-1]:
+            positions = tuple(
+                i for i, (low, high) in enumerate(zip(min_ages, max_ages)) if low <= start <= high
+            )
+            self._segments.append(shared.setdefault(positions, positions))
+    
+    def __len__(self) -> int:
+        return len(self.rows)
+    
+    def _positions(self, age: int) -> Tuple[int, ...]:
+        segment = bisect.bisect_right(self._bounds, age) - 1
+        if segment < 0 or segment >= len(self._segments):
+            return ()
+        return self._segments[segment]
+    
+    def eligible(self, age: Optional[int] = None) -> List[QuestionRow]:
+        """Questions valid for age (all questions for None), in id order."""
+        if age is None:
+            return list(self.rows)
+        return [self.rows[i] for i in self._positions(age)]
     
-    cache_time = _cache_timestamps[cache_key]
-    return (time.time() - cache_time) < MEMORY_CACHE_TTL
+    def close(self):
+        """Release the snapshot map behind the rows, if any."""
+        if isinstance(self.rows, QuestionSnapshot):
+            self.rows.close()
+    
+    def count(self, age: Optional[int] = None) -> int:
+        """Number of questions valid for age."""
+        return len(self.rows) if age is None else len(self._positions(age))
+    
+    def sample(self, age: int, num_questions: int, rng=random) -> List[QuestionRow]:
+        """Random, non-repeating questions valid for age."""
+        positions = self._positions(age)
+        if len(positions) < num_questions:
+            raise ValueError("Not enough questions for this age")
+        return [self.rows[i] for i in rng.sample(positions, num_questions)]
 
 def safe_thread_run(func, *args, **kwargs):
     """Wrapper to run a function safely in a thread with exception logging."""
@@ -59,71 +121,95 @@ def safe_thread_run(func, *args, **kwargs):
     thread = threading.Thread(target=wrapper, daemon=True)
     thread.start()
 
-def _save_to_disk_cache(questions: List[Tuple[int, str, Optional[str]]], age: Optional[int] = None):
-    """Save questions to disk cache file"""
+def get_question_generation(session=None) -> Optional[Tuple[str, int]]:
+    """
+    Current (bank_id, generation) stamp of the question bank.
+    
+    Creates the generation table and triggers on databases that predate
+    them. Returns None if the stamp cannot be read, which disables caching.
+    """
+    own_session = session is None
+    session = session or get_session()
+    try:
+        try:
+            row = session.execute(text(QUESTION_GENERATION_SQL)).first()
+        except Exception:
+            session.rollback()
+            for statement in QUESTION_GENERATION_DDL:
+                session.execute(text(statement))
+            session.commit()
+            row = session.execute(text(QUESTION_GENERATION_SQL)).first()
+        return (row[0], int(row[1])) if row else None
+    except Exception as e:
+        logger.warning(f"Question bank generation unavailable, caching disabled: {e}")
+        return None
+    finally:
+        if own_session:
+            session.close()
+
+def _snapshot_path(stamp: Tuple[str, int]) -> str:
+    """Snapshot file for one (bank_id, generation) stamp"""
+    return os.path.join(CACHE_DIR, f"{SNAPSHOT_PREFIX}{stamp[0]}.{stamp[1]}{SNAPSHOT_SUFFIX}")
+
+def _prune_disk_cache(keep: str):
+    """Best-effort removal of other snapshot files (skips ones still mapped)"""
+    for file in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, file)
+        if file.startswith(SNAPSHOT_PREFIX) and file.endswith(SNAPSHOT_SUFFIX) and path != keep:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.debug(f"Could not remove old snapshot {file}: {e}")
+
+def _save_to_disk_cache(questions: List[QuestionRow], stamp: Tuple[str, int]):
+    """Save the question bank to the binary snapshot file for its stamp"""
     try:
         _ensure_cache_dir()
-        cache_data = {
-            "timestamp": datetime.now().isoformat(),
-            "questions": questions,
-            "age_filter": age,
-            "count": len(questions)
-        }
-        cache_key = "questions" if age is None else f"questions_age_{age}"
-        cache_file = os.path.join(CACHE_DIR, f"{cache_key}.json")
-        
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
-        logger.debug(f"Cached {len(questions)} questions to disk (age filter: {age})")
+        cache_file = _snapshot_path(stamp)
+        # Same stamp, same rows: an existing file (possibly mapped) is kept
+        if not os.path.exists(cache_file):
+            write_snapshot(cache_file, questions, stamp)
+            logger.debug(f"Cached {len(questions)} questions to disk")
+        _prune_disk_cache(keep=cache_file)
         return True
     except Exception as e:
         logger.error(f"Failed to save disk cache: {e}")
         return False
 
-def _load_from_disk_cache(age: Optional[int] = None):
-    """Load questions from disk cache if valid"""
+def _load_from_disk_cache(stamp: Tuple[str, int]) -> Optional[QuestionSnapshot]:
+    """Map the snapshot file if it was written for this stamp"""
+    cache_file = _snapshot_path(stamp)
+    if not os.path.exists(cache_file):
+        return None
     try:
-        cache_key = "questions" if age is None else f"questions_age_{age}"
-        cache_file = os.path.join(CACHE_DIR, f"{cache_key}.json")
-        
-        if not os.path.exists(cache_file):
-            return None
-        
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cache_data = json.load(f)
-        
-        # Check cache age
-        cache_time = datetime.fromisoformat(cache_data.get("timestamp", ""))
-        if datetime.now() - cache_time > timedelta(hours=CACHE_MAX_AGE_HOURS):
-            logger.debug("Disk cache expired")
-            return None
-        
-        # Validate age filter matches
-        if cache_data.get("age_filter") != age:
-            return None
-        
-        questions = [(int(q[0]), q[1], q[2], int(q[3]), int(q[4])) for q in cache_data["questions"]]
-        logger.debug(f"Loaded {len(questions)} questions from disk cache (age filter: {age})")
-        return questions
+        snapshot = QuestionSnapshot(cache_file)
     except Exception as e:
         logger.error(f"Failed to load disk cache: {e}")
         return None
-
-@lru_cache(maxsize=8)  # Cache for different age filters
-def _get_cached_questions_from_db(age: Optional[int] = None) -> List[Tuple[int, str, Optional[str]]]:
-    """Get questions from database with LRU caching"""
-    # Using safe_db_context would be good, but LRU cache expects a return, 
-    # and context manager yields. We can use get_session() but wrap in try..finally properly 
-    # or rely on safe_db_context just for the query.
     
-    # Since this function returns data and shouldn't commit, get_session is fine if we close it.
+    if snapshot.stamp != tuple(stamp):
+        logger.debug("Disk cache is from another question bank generation")
+        snapshot.close()
+        return None
+    
+    logger.debug(f"Mapped {len(snapshot)} questions from disk cache")
+    return snapshot
+
+def _query_questions() -> List[QuestionRow]:
+    """Get all active questions from the question bank"""
     session = get_session()
     try:
         query = session.query(Question).filter(Question.is_active == 1)
         
-        if age is not None:
-            query = query.filter(Question.min_age <= age, Question.max_age >= age)
-            
+        # Rows without an age range never matched an age filter and cannot be
+        # indexed by QuestionBank, so they are left out of the bank
+        unbounded = query.filter(
+            or_(Question.min_age.is_(None), Question.max_age.is_(None))
+        ).count()
+        if unbounded:
+            logger.warning(f"Skipping {unbounded} active questions with no min_age/max_age")
+        query = query.filter(Question.min_age.isnot(None), Question.max_age.isnot(None))
+        
         # Use optimized query with only needed columns
         questions = query.with_entities(
             Question.id, 
@@ -140,7 +226,7 @@ def _get_cached_questions_from_db(age: Optional[int] = None) -> List[Tuple[int,
             # We raise ResourceError here instead of Runtime for better classification
             raise ResourceError("No questions found in database.")
             
-        logger.info(f"Loaded {len(rows)} questions from DB (age filter: {age})")
+        logger.info(f"Loaded {len(rows)} questions from DB")
         return rows
     except ResourceError:
         raise
@@ -149,140 +235,68 @@ def _get_cached_questions_from_db(age: Optional[int] = None) -> List[Tuple[int,
     finally:
         session.close()
 
-def _try_database_cache(session: Session, age: Optional[int] = None) -> List[Tuple[int, str, Optional[str]]]:
-    """Try to get questions from database cache table first"""
-    try:
-        query = session.query(QuestionCache).filter(QuestionCache.is_active == 1)
-        
-        cached = query.order_by(QuestionCache.question_id).all()
-        
-        if cached:
-            # Update access counts in background
-            def update_access_counts():
-                try:
-                    with safe_db_context() as update_session:
-                        # Need to re-query objects in new session or just execute update
-                        # safe_db_context yields a session
-                        # We can't use 'cached' objects directly easily as they are detached or from other session?
-                        # Actually 'cached' are from 'session' passed in arg. 
-                        # Background thread needs its own session.
-                        # Simplest is:
-                         for c in cached:
-                             # Just execute a raw update or fetch by ID
-                             pass 
-                             # This logic was a bit loose in original code. 
-                             # Let's keep it simple and safe.
-                             pass 
-                except Exception as e:
-                    logger.error(f"Failed to update access counts: {e}")
-            
-            # Use safe_thread_run, but we need to define the target func better
-            # For now keeping it simple as logic below is just a stub
-            
-            result = [(c.question_id, c.question_text, None) for c in cached]
-            logger.debug(f"Loaded {len(result)} questions from DB cache")
-            return result
-    except Exception as e:
-        logger.debug(f"Database cache not available: {e}")
-    
-    return None
-
-def _preload_background(age: Optional[int] = None):
-    """Preload questions in background thread"""
+def _preload_background():
+    """Preload the question bank in a background thread"""
     def preload():
-        logger.debug(f"Background preloading questions (age filter: {age})")
-        
-        # Load from database (this might raise, but safe_thread_run will catch it)
-        questions = _get_cached_questions_from_db(age)
-        
-        # Update memory cache
-        cache_key = _get_cache_key(age)
-        with _cache_lock:
-            _questions_cache[cache_key] = questions
-            _cache_timestamps[cache_key] = time.time()
-        
-        # Save to disk cache in background
-        safe_thread_run(_save_to_disk_cache, questions, age)
-        
-        logger.debug(f"Background preload completed: {len(questions)} questions")
+        logger.debug("Background preloading question bank")
+        # Fills the memory and disk tiers (errors are logged by safe_thread_run)
+        bank = get_question_bank()
+        logger.debug(f"Background preload completed: {len(bank)} questions")
             
     safe_thread_run(preload)
 
-def _warmup_cache():
-    """Warm up cache on module import"""
-    global _last_preload_time
-    
-    current_time = time.time()
-    if current_time - _last_preload_time > _preload_interval:
-        _preload_background(None)  # Preload all questions
-        _last_preload_time = current_time
+def _replace_cached_bank(stamp: Tuple[str, int], bank: QuestionBank):
+    """
+    Cache bank for stamp (caller holds _cache_lock). The replaced bank is
+    only dereferenced, not closed: callers may still hold it, and its map
+    is released once the last of them drops it. Its file is pruned by a
+    later save.
+    """
+    _questions_cache[BANK_CACHE_KEY] = (stamp, bank)
 
-def load_questions(
-    age: Optional[int] = None,
-    db_path: Optional[str] = None
-) -> List[Tuple[int, str, Optional[str]]]:
+def get_question_bank() -> QuestionBank:
     """
-    Load questions from DB using ORM with multi-level caching.
-    Returns list of (id, question_text, tooltip) tuples.
+    The active question bank with its age index, cached per generation.
+    Raises ResourceError if there are no active questions.
     """
-    # Backward compatibility
-    if isinstance(age, str) and db_path is None:
-        try:
-            age = int(age) if age else None
-        except ValueError:
-            age = None
-    
-    cache_key = _get_cache_key(age)
+    stamp = get_question_generation()
     
-    # 1. Check memory cache first
-    if _is_cache_valid(cache_key) and cache_key in _questions_cache:
-        logger.debug(f"Memory cache hit for {cache_key}")
-        return _questions_cache[cache_key]
-    
-    # 2. Check disk cache
-    with _cache_lock:
-        if _is_cache_valid(cache_key) and cache_key in _questions_cache:
-            return _questions_cache[cache_key]
+    if stamp is not None:
+        # 1. Memory cache
+        entry = _questions_cache.get(BANK_CACHE_KEY)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
         
-        disk_cache = _load_from_disk_cache(age)
-        if disk_cache is not None:
-            _questions_cache[cache_key] = disk_cache
-            _cache_timestamps[cache_key] = time.time()
-            return disk_cache
-    
-    # 3. Try database cache table
-    session = get_session()
-    try:
-        db_cache = _try_database_cache(session, age)
-        if db_cache is not None:
-            with _cache_lock:
-                _questions_cache[cache_key] = db_cache
-                _cache_timestamps[cache_key] = time.time()
+        # 2. Disk cache
+        with _cache_lock:
+            entry = _questions_cache.get(BANK_CACHE_KEY)
+            if entry is not None and entry[0] == stamp:
+                return entry[1]
             
-            safe_thread_run(_save_to_disk_cache, db_cache, age)
-            return db_cache
-    finally:
-        session.close()
+            disk_cache = _load_from_disk_cache(stamp)
+            if disk_cache is not None:
+                bank = QuestionBank(disk_cache)
+                _replace_cached_bank(stamp, bank)
+                return bank
     
-    # 4. Load from database (slowest)
-    logger.debug(f"Cache miss for {cache_key}, loading from database...")
+    # 3. Load from database. The stamp was read first, so an edit made
+    # meanwhile leaves this entry one generation behind and it is reloaded.
+    logger.debug("Question bank cache miss, loading from database...")
     start_time = time.time()
     
     try:
-        # Use LRU cached database function
-        questions = _get_cached_questions_from_db(age)
+        questions = _query_questions()
+        bank = QuestionBank(questions)
         
-        # Update caches
-        with _cache_lock:
-            _questions_cache[cache_key] = questions
-            _cache_timestamps[cache_key] = time.time()
-        
-        safe_thread_run(_save_to_disk_cache, questions, age)
+        if stamp is not None:
+            with _cache_lock:
+                _replace_cached_bank(stamp, bank)
+            safe_thread_run(_save_to_disk_cache, questions, stamp)
         
         load_time = time.time() - start_time
-        logger.info(f"Loaded {len(questions)} questions from DB in {load_time:.3f}s (age filter: {age})")
+        logger.info(f"Loaded {len(questions)} questions from DB in {load_time:.3f}s")
         
-        return questions
+        return bank
         
     except Exception as e:
         logger.error(f"Failed to load questions: {e}")
@@ -291,6 +305,26 @@ def load_questions(
             raise
         raise DatabaseError("Critical error loading questions.", original_exception=e)
 
+def load_questions(
+    age: Optional[int] = None,
+    db_path: Optional[str] = None
+) -> List[QuestionRow]:
+    """
+    Load questions from DB using ORM with generation-stamped caching.
+    Returns list of (id, question_text, tooltip, min_age, max_age) tuples.
+    """
+    # Backward compatibility
+    if isinstance(age, str) and db_path is None:
+        try:
+            age = int(age) if age else None
+        except ValueError:
+            age = None
+    
+    questions = get_question_bank().eligible(age)
+    if not questions:
+        raise ResourceError("No questions found in database.")
+    return questions
+
 
 SATISFACTION_QUESTIONS = {
     # Core satisfaction question
@@ -507,82 +541,29 @@ SATISFACTION_OPTIONS = {
 # ------------------ ADDITIONAL OPTIMIZATION FUNCTIONS ------------------
 
 def get_question_count(age: Optional[int] = None) -> int:
-    """Get count of active questions (optimized)"""
-    cache_key = f"count_age_{age}" if age is not None else "count_all"
-    
-    # Check statistics cache first
-    session = get_session()
-    try:
-        stat = session.query(StatisticsCache).filter(
-            StatisticsCache.stat_name == cache_key,
-            StatisticsCache.valid_until > datetime.now().isoformat()
-        ).first()
-        
-        if stat:
-            return int(stat.stat_value)
-    except Exception:
-        pass # Fallback to DB count
-    finally:
-        session.close()
-    
-    # Count from database
-    session = get_session()
+    """Get count of active questions (served from the question cache)"""
     try:
-        query = session.query(Question).filter(Question.is_active == 1)
-        
-        if age is not None:
-            query = query.filter(Question.min_age <= age, Question.max_age >= age)
-            
-        count = query.count()
-        
-        # Update cache in background
-        def update_cache():
-            try:
-                with safe_db_context() as update_session:
-                    cache_entry = StatisticsCache(
-                        stat_name=cache_key,
-                        stat_value=float(count),
-                        calculated_at=datetime.now().isoformat(),
-                        valid_until=(datetime.now() + timedelta(hours=1)).isoformat()
-                    )
-                    update_session.merge(cache_entry)
-            except Exception as e:
-                logger.error(f"Failed to update count cache: {e}")
-        
-        safe_thread_run(update_cache)
-        
-        return count
+        return len(load_questions(age))
+    except ResourceError:
+        return 0
     except Exception as e:
         logger.error(f"Failed to count questions: {e}")
         return 0
-    finally:
-        session.close()
 
 def preload_all_question_sets():
-    """Preload common question sets in background"""
-    common_ages = [None, 18, 25, 35, 50, 65]  # Common age filters
-    
-    for age in common_ages:
-        _preload_background(age)
+    """Preload the question bank in background (one copy serves every age)"""
+    _preload_background()
 
 def clear_all_caches():
     """Clear all caches"""
-    # Globals modified in this scope via clear/methods, but declaring them global 
-    # isn't strictly necessary if we are mutating the objects in place.
-    # However, flake8 complains they are unused in this function scope.
-    # We just access them.
-    
     with _cache_lock:
+        # Banks already handed out stay usable; see _replace_cached_bank
         _questions_cache.clear()
-        _cache_timestamps.clear()
-        
-    # Clear LRU cache
-    _get_cached_questions_from_db.cache_clear()
     
     try:
         if os.path.exists(CACHE_DIR):
             for file in os.listdir(CACHE_DIR):
-                if file.endswith('.json'):
+                if file.endswith(('.json', '.bin')):
                     os.remove(os.path.join(CACHE_DIR, file))
     except Exception as e:
         logger.error(f"Failed to clear disk cache: {e}")
@@ -590,8 +571,7 @@ def clear_all_caches():
     # Clear database caches
     try:
         with safe_db_context() as session:
-            session.query(QuestionCache).delete()
-            session.query(StatisticsCache).delete()
+            clear_cached_data(session)
             logger.info("All caches cleared")
     except Exception as e:
         logger.error(f"Failed to clear database caches: {e}")
@@ -599,13 +579,17 @@ def clear_all_caches():
     
     return True
 
-import random
-
 def get_random_questions_by_age(all_questions, user_age, num_questions):
     """
-    Filters questions by min_age and max_age, returns randomized,
-    non-repeating set of questions for one attempt.
+    Returns a randomized, non-repeating set of questions valid for
+    user_age (min_age <= age <= max_age) for one attempt.
+    
+    all_questions may be a QuestionBank (indexed lookup, no filtered copy)
+    or a list of question rows.
     """
+    if isinstance(all_questions, QuestionBank):
+        return all_questions.sample(user_age, num_questions)
+    
     filtered_questions = [
         q for q in all_questions if q[3] <= user_age <= q[4]
     ]
@@ -615,11 +599,3 @@ def get_random_questions_by_age(all_questions, user_age, num_questions):
 
     selected_questions = random.sample(filtered_questions, num_questions)
     return selected_questions
-
-
-# ------------------ INITIALIZATION ------------------
-_ensure_cache_dir()
-safe_thread_run(_warmup_cache)
-safe_thread_run(preload_all_question_sets)
-
-
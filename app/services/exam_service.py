@@ -1,20 +1,51 @@
+import os
+import json
 import time
+import hashlib
 import statistics
 import logging
 from datetime import datetime
 from typing import List, Tuple, Optional, Any
-from app.db import get_connection
+from app.db import pooled_connection
+from app.config import EXAM_CONFIG
 from app.models import Score
 from app.exceptions import DatabaseError
-
-# Try importing NLTK sentiment analyzer
-try:
-    from nltk.sentiment import SentimentIntensityAnalyzer
-except ImportError:
-    SentimentIntensityAnalyzer = None
+from app.services import sentiment_service
 
 logger = logging.getLogger(__name__)
 
+# Rows are (username, question_id, response_value, age_group, timestamp);
+# user_id is resolved in the same statement so no extra round-trip is needed.
+RESPONSE_INSERT_SQL = """
+    INSERT INTO responses
+    (username, question_id, response_value, age_group, timestamp, user_id)
+    VALUES (?1, ?2, ?3, ?4, ?5, (SELECT id FROM users WHERE username = ?1))
+"""
+
+SCORE_INSERT_SQL = """
+    INSERT INTO scores
+    (username, age, total_score, sentiment_score, reflection_text,
+     is_rushed, is_inconsistent, timestamp, detailed_age_group, user_id)
+    VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, (SELECT id FROM users WHERE username = ?1))
+"""
+
+# Links one of this session's answers written before the user row existed
+RESPONSE_LINK_SQL = """
+    UPDATE responses SET user_id = (SELECT id FROM users WHERE username = ?1)
+    WHERE id = ?2 AND username = ?1 AND user_id IS NULL
+"""
+
+# Journal appends reach the OS on every answer but are fsynced at most this
+# often (seconds); a crash loses at most this much of the journal
+JOURNAL_FSYNC_INTERVAL = 1.0
+
+
+def _journal_file_name(username: str, session_key: int) -> str:
+    """Journal file name; the username is hashed so it never forms a path"""
+    digest = hashlib.sha256(username.encode("utf-8")).hexdigest()[:16]
+    return f"responses_{digest}_{os.getpid()}_{session_key}.jsonl"
+
+
 class ExamSession:
     """
     Core engine for the Exam functionality.
@@ -22,7 +53,11 @@ class ExamSession:
     Decoupled from any specific UI (Tkinter/CLI).
     """
 
-    def __init__(self, username: str, age: int, age_group: str, questions: List[Tuple]):
+    def __init__(self, username: str, age: int, age_group: str, questions: List[Tuple],
+                 buffer_responses: Optional[bool] = None,
+                 buffer_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None,
+                 journal_path: Optional[str] = None):
         self.username = username
         self.age = age
         self.age_group = age_group
@@ -42,6 +77,24 @@ class ExamSession:
         self.reflection_text = ""
         self.is_rushed = False
         self.is_inconsistent = False
+        self.score_id: Optional[int] = None
+        self.started_at = datetime.utcnow().isoformat()
+
+        # Persistence mode: write-through (one INSERT per answer) or
+        # write-behind (rows held here and flushed in one executemany).
+        # Unset arguments fall back to the "exam" section of config.json.
+        self.buffer_responses = bool(EXAM_CONFIG.get("buffer_responses", False)) if buffer_responses is None else buffer_responses
+        self.buffer_size = int(buffer_size if buffer_size is not None else EXAM_CONFIG.get("response_buffer_size") or 0)
+        self.flush_interval = float(flush_interval if flush_interval is not None else EXAM_CONFIG.get("response_flush_interval") or 0)
+        if journal_path is None and self.buffer_responses and EXAM_CONFIG.get("response_journal_dir"):
+            journal_dir = EXAM_CONFIG["response_journal_dir"]
+            os.makedirs(journal_dir, exist_ok=True)
+            journal_path = os.path.join(journal_dir, _journal_file_name(username, id(self)))
+        self.journal_path = journal_path
+        self._pending_responses: List[Tuple] = []
+        self._response_ids: List[int] = []  # Committed responses rows of this session
+        self._last_flush = time.time()
+        self._last_journal_sync = 0.0
 
     def start_exam(self):
         """Initialize or reset exam state"""
@@ -51,6 +104,9 @@ class ExamSession:
         self.score = 0
         self.sentiment_score = 0.0
         self.reflection_text = ""
+        self.score_id = None
+        self.started_at = datetime.utcnow().isoformat()
+        self._response_ids = []
         self.start_question_timer()
         logger.info(f"Exam session started for user: {self.username}")
 
@@ -131,7 +187,8 @@ class ExamSession:
     def submit_reflection(self, text: str, analyzer: Any = None):
         """
         Analyze reflection text sentiment.
-        Accepts an external analyzer instance (dependency injection) or tries to load default.
+        Accepts an external analyzer instance (dependency injection), otherwise
+        uses the shared, cached sentiment service.
         """
         self.reflection_text = text.strip()
         
@@ -140,22 +197,20 @@ class ExamSession:
             return
 
         try:
-            # Use provided analyzer or default
-            sia = analyzer
-            if not sia and SentimentIntensityAnalyzer:
-                sia = SentimentIntensityAnalyzer()
-            
-            if sia:
-                scores = sia.polarity_scores(self.reflection_text)
+            if analyzer:
+                scores = analyzer.polarity_scores(self.reflection_text)
                 self.sentiment_score = scores['compound'] * 100
             else:
-                self.sentiment_score = 0.0
+                self.sentiment_score = sentiment_service.score(self.reflection_text)
         except Exception as e:
             logger.error(f"Sentiment analysis failed: {e}")
             self.sentiment_score = 0.0
 
-    def calculate_metrics(self):
-        """Calculate score and quality metrics (rushed, inconsistent)"""
+    def calculate_metrics(self, conn=None):
+        """
+        Calculate score and quality metrics (rushed, inconsistent).
+        Pass an open connection to reuse it for the historical lookup.
+        """
         self.score = sum(self.responses)
         self.is_rushed = False
         self.is_inconsistent = False
@@ -176,13 +231,11 @@ class ExamSession:
         # For pure service, we might skip this or inject DB dependency.
         # We'll implement a simple DB check here using our existing db module.
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT total_score FROM scores WHERE username = ? ORDER BY timestamp DESC LIMIT 10", 
-                (self.username,)
-            )
-            past_scores = [row[0] for row in cursor.fetchall()]
+            if conn is not None:
+                past_scores = self._fetch_past_scores(conn)
+            else:
+                with pooled_connection() as pooled:
+                    past_scores = self._fetch_past_scores(pooled)
             if past_scores:
                 avg_past = statistics.mean(past_scores)
                 if avg_past > 0 and abs(self.score - avg_past) / avg_past > 0.2:
@@ -190,52 +243,182 @@ class ExamSession:
         except Exception as e:
             logger.warning(f"Could not check historical consistency: {e}")
 
+    def _fetch_past_scores(self, conn) -> List[int]:
+        cursor = conn.execute(
+            "SELECT total_score FROM scores WHERE username = ? ORDER BY timestamp DESC LIMIT 10", 
+            (self.username,)
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def persist(self, conn, timestamp: Optional[str] = None) -> int:
+        """
+        Write this exam on an open connection without committing:
+        metrics, buffered responses, user linking and the score row.
+        Lets callers batch many sessions into one transaction.
+        An explicit timestamp (a recorded session) is also given to the
+        responses not yet written, so score and responses agree.
+        Returns the new score id.
+        """
+        if timestamp is None:
+            timestamp = datetime.utcnow().isoformat()
+        else:
+            self._pending_responses[:] = [row[:4] + (timestamp,) for row in self._pending_responses]
+
+        self.calculate_metrics(conn)
+        response_ids = self._response_ids + self._write_pending(conn)
+        # Only this session's rows: other sessions' unlinked answers are left alone
+        conn.executemany(RESPONSE_LINK_SQL, [(self.username, row_id) for row_id in response_ids])
+        cursor = conn.execute(
+            SCORE_INSERT_SQL,
+            (self.username, self.age, self.score, self.sentiment_score, 
+             self.reflection_text, self.is_rushed, self.is_inconsistent, 
+             timestamp, self.age_group)
+        )
+        return cursor.lastrowid
+
+    def finalize(self) -> int:
+        """
+        Atomically finalize the exam on a single connection/transaction:
+        compute metrics, write buffered responses, link this session's
+        responses to the user, and insert the score.
+        Returns the new score id. Raises DatabaseError on failure.
+        """
+        with pooled_connection() as conn:
+            score_id = self.persist(conn)
+
+        self._mark_flushed()
+        self.score_id = score_id
+        return score_id
+
     def finish_exam(self) -> bool:
         """Finalize exam, calculate scores, and save to DB."""
-        self.calculate_metrics()
-        
-        timestamp = datetime.utcnow().isoformat()
-        
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                """
-                INSERT INTO scores 
-                (username, age, total_score, sentiment_score, reflection_text, 
-                 is_rushed, is_inconsistent, timestamp, detailed_age_group) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (self.username, self.age, self.score, self.sentiment_score, 
-                 self.reflection_text, self.is_rushed, self.is_inconsistent, 
-                 timestamp, self.age_group)
-            )
-            conn.commit()
+            self.finalize()
             logger.info(f"Exam saved. Score: {self.score}, Sentiment: {self.sentiment_score}")
             return True
         except Exception as e:
             logger.error(f"Failed to save exam results: {e}", exc_info=True)
             return False
 
+    def _build_response_row(self, answer_value: int) -> Tuple:
+        """Build the responses row for the current question"""
+        # Map index to correct ID if possible
+        q_data = self.questions[self.current_question_index]
+        q_id = q_data[0] if (isinstance(q_data, tuple) and isinstance(q_data[0], int)) else (self.current_question_index + 1)
+        return (self.username, q_id, answer_value, self.age_group, datetime.utcnow().isoformat())
+
     def _save_response_to_db(self, answer_value: int):
-        """Helper to save single response"""
+        """Helper to save single response (or buffer it in write-behind mode)"""
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            # Map index to correct ID if possible
-            q_data = self.questions[self.current_question_index]
-            q_id = q_data[0] if (isinstance(q_data, tuple) and isinstance(q_data[0], int)) else (self.current_question_index + 1)
-            
-            cursor.execute(
-                """
-                INSERT INTO responses
-                (username, question_id, response_value, age_group, timestamp)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (self.username, q_id, answer_value, self.age_group, datetime.utcnow().isoformat())
-            )
-            conn.commit()
+            row = self._build_response_row(answer_value)
+
+            if self.buffer_responses:
+                self._pending_responses.append(row)
+                self._append_to_journal(row)
+                if self._should_flush():
+                    self.flush_responses()
+                return
+
+            with pooled_connection() as conn:
+                row_id = conn.execute(RESPONSE_INSERT_SQL, row).lastrowid
+            self._response_ids.append(row_id)
         except Exception as e:
             logger.error(f"Failed to save response: {e}")
+
+    # ---------------- WRITE-BEHIND BUFFER ----------------
+
+    @property
+    def pending_response_count(self) -> int:
+        return len(self._pending_responses)
+
+    def _should_flush(self) -> bool:
+        if self.buffer_size and len(self._pending_responses) >= self.buffer_size:
+            return True
+        if self.flush_interval and (time.time() - self._last_flush) >= self.flush_interval:
+            return True
+        return False
+
+    def _append_to_journal(self, row: Tuple):
+        """Append a buffered row to the crash-safe local journal (if enabled)"""
+        if not self.journal_path:
+            return
+        try:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(list(row)) + "\n")
+                f.flush()
+                now = time.time()
+                if now - self._last_journal_sync >= JOURNAL_FSYNC_INTERVAL:
+                    os.fsync(f.fileno())
+                    self._last_journal_sync = now
+        except OSError as e:
+            logger.warning(f"Could not write response journal {self.journal_path}: {e}")
+
+    def _clear_journal(self):
+        if self.journal_path and os.path.exists(self.journal_path):
+            try:
+                os.remove(self.journal_path)
+            except OSError as e:
+                logger.warning(f"Could not remove response journal {self.journal_path}: {e}")
+
+    def _write_pending(self, conn) -> List[int]:
+        """
+        executemany the buffered rows on conn (caller owns the transaction).
+        Returns their row ids: rows inserted in one write transaction get
+        consecutive ids ending at last_insert_rowid().
+        """
+        if not self._pending_responses:
+            return []
+        conn.executemany(RESPONSE_INSERT_SQL, self._pending_responses)
+        last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        return list(range(last_id - len(self._pending_responses) + 1, last_id + 1))
+
+    def _mark_flushed(self):
+        """Drop buffered rows (and the journal) once their transaction committed"""
+        self._pending_responses.clear()
+        self._last_flush = time.time()
+        self._clear_journal()
+
+    def flush_responses(self) -> int:
+        """
+        Write all buffered responses in a single executemany transaction.
+        Returns the number of rows written. On failure the rows stay buffered.
+        """
+        if not self._pending_responses:
+            self._last_flush = time.time()
+            return 0
+
+        with pooled_connection() as conn:
+            response_ids = self._write_pending(conn)
+        self._response_ids.extend(response_ids)
+        count = len(response_ids)
+        self._mark_flushed()
+        logger.debug(f"Flushed {count} buffered responses for {self.username}")
+        return count
+
+    @staticmethod
+    def replay_journal(journal_path: str) -> int:
+        """
+        Persist rows left in a response journal by a crashed session,
+        then delete the journal. Returns the number of rows recovered.
+        """
+        if not os.path.exists(journal_path):
+            return 0
+
+        rows = []
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(tuple(json.loads(line)))
+                except json.JSONDecodeError:
+                    # Torn final write during the crash; everything before it is intact
+                    logger.warning(f"Skipping corrupt journal line in {journal_path}")
+
+        if rows:
+            with pooled_connection() as conn:
+                conn.executemany(RESPONSE_INSERT_SQL, rows)
+        os.remove(journal_path)
+        logger.info(f"Recovered {len(rows)} responses from {journal_path}")
+        return len(rows)
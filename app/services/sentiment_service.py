@@ -0,0 +1,255 @@
+"""
+Process-wide sentiment scoring service.
+
+Loads the NLTK VADER analyzer (and lexicon) once per process on first use
+and caches scores keyed on a hash of the normalized text. When VADER is
+unavailable, falls back to the keyword scorer the journal has always used.
+
+Scores are on the app's -100..100 scale (VADER compound * 100).
+"""
+
+import re
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 4096
+# Below this many uncached texts a process pool costs more than it saves
+MIN_TEXTS_FOR_POOL = 256
+
+POSITIVE_WORDS = ['happy', 'joy', 'excited', 'grateful', 'peaceful', 'confident']
+NEGATIVE_WORDS = ['sad', 'angry', 'frustrated', 'anxious', 'worried', 'stressed']
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_analyzer = None
+_analyzer_loaded = False
+_analyzer_lock = threading.Lock()
+
+_cache: "OrderedDict[str, float]" = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_size = DEFAULT_CACHE_SIZE
+_cache_hits = 0
+_cache_misses = 0
+
+
+def get_analyzer():
+    """
+    Return the shared SentimentIntensityAnalyzer, or None if NLTK/VADER
+    is unavailable. The lexicon is located (or downloaded) only once.
+    """
+    global _analyzer, _analyzer_loaded
+    if _analyzer_loaded:
+        return _analyzer
+
+    with _analyzer_lock:
+        if _analyzer_loaded:
+            return _analyzer
+        try:
+            import nltk
+            from nltk.sentiment import SentimentIntensityAnalyzer
+            try:
+                nltk.data.find('sentiment/vader_lexicon.zip')
+            except LookupError:
+                nltk.download('vader_lexicon', quiet=True)
+            _analyzer = SentimentIntensityAnalyzer()
+            logger.info("SentimentIntensityAnalyzer initialized successfully")
+        except Exception as e:
+            logger.warning(f"VADER unavailable, using keyword sentiment fallback: {e}")
+            _analyzer = None
+        _analyzer_loaded = True
+    return _analyzer
+
+
+def set_analyzer(analyzer):
+    """Install a specific analyzer (e.g. a stub in tests) and clear the cache."""
+    global _analyzer, _analyzer_loaded
+    with _analyzer_lock:
+        _analyzer = analyzer
+        _analyzer_loaded = True
+    clear_cache()
+
+
+def keyword_score(text: str) -> float:
+    """Simple keyword matching, used when VADER is unavailable."""
+    text_lower = text.lower()
+    positive_count = sum(1 for word in POSITIVE_WORDS if word in text_lower)
+    negative_count = sum(1 for word in NEGATIVE_WORDS if word in text_lower)
+
+    total_words = len(text.split())
+    if total_words == 0:
+        return 0.0
+
+    score = (positive_count - negative_count) / max(total_words, 1) * 100
+    return max(-100, min(100, score))
+
+
+# Emotional pattern keyword groups -> i18n keys (shared with the journal UI)
+EMOTIONAL_PATTERN_RULES = (
+    (['stress', 'pressure', 'overwhelm', 'burden', 'exhausted'], "patterns.stress_indicators"),
+    (['friend', 'family', 'colleague', 'partner', 'relationship'], "patterns.social_focus"),
+    (['learn', 'grow', 'improve', 'better', 'progress', 'develop'], "patterns.growth_oriented"),
+    (['realize', 'understand', 'reflect', 'think', 'feel', 'notice'], "patterns.self_reflective"),
+)
+
+
+def extract_emotional_patterns(text: str, translate=None) -> str:
+    """
+    Extract emotional patterns from text as a "; "-joined string of labels.
+    `translate` maps an i18n key to a label (defaults to the app's i18n manager).
+    """
+    if translate is None:
+        from app.i18n_manager import get_i18n
+        translate = get_i18n().get
+
+    text_lower = text.lower()
+    patterns = [translate(key) for words, key in EMOTIONAL_PATTERN_RULES
+                if any(word in text_lower for word in words)]
+    return "; ".join(patterns) if patterns else translate("patterns.general_expression")
+
+
+def normalize(text: str) -> str:
+    """
+    Normalize text for caching. VADER is case- and punctuation-sensitive
+    ("GREAT!!" scores higher than "great"), so only whitespace is collapsed.
+    """
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def _cache_key(normalized: str) -> str:
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _score_uncached(normalized: str, analyzer) -> float:
+    if analyzer is None:
+        return keyword_score(normalized)
+    try:
+        # Convert compound (-1 to 1) to -100 to 100
+        return analyzer.polarity_scores(normalized)['compound'] * 100
+    except Exception as e:
+        logger.error(f"Sentiment analysis error: {e}")
+        return 0.0
+
+
+def _cache_get(key: str) -> Optional[float]:
+    global _cache_hits
+    with _cache_lock:
+        value = _cache.get(key)
+        if value is not None:
+            _cache.move_to_end(key)
+            _cache_hits += 1
+        return value
+
+
+def _cache_put(key: str, value: float):
+    global _cache_misses
+    with _cache_lock:
+        _cache_misses += 1
+        _cache[key] = value
+        _cache.move_to_end(key)
+        while len(_cache) > _cache_size:
+            _cache.popitem(last=False)
+
+
+def score(text: Optional[str]) -> float:
+    """Sentiment of a single text on the -100..100 scale (0.0 for empty text)."""
+    if not text or not text.strip():
+        return 0.0
+
+    normalized = normalize(text)
+    key = _cache_key(normalized)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
+    value = _score_uncached(normalized, get_analyzer())
+    _cache_put(key, value)
+    return value
+
+
+def _score_chunk(texts: List[str]) -> List[float]:
+    """Worker entry point: score already-normalized texts with this process's analyzer."""
+    analyzer = get_analyzer()
+    return [_score_uncached(t, analyzer) for t in texts]
+
+
+def score_many(texts: Iterable[Optional[str]], processes: Optional[int] = None,
+               chunk_size: int = 512) -> List[float]:
+    """
+    Score a batch of texts, returning scores in input order.
+
+    Duplicate and previously seen texts are scored once. When `processes`
+    is given (> 1) and enough texts miss the cache, misses are scored in
+    a process pool where each worker loads the lexicon once.
+    """
+    texts = list(texts)
+    results: List[Optional[float]] = [None] * len(texts)
+    pending = OrderedDict()  # key -> (normalized text, [result indices])
+
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            results[i] = 0.0
+            continue
+        normalized = normalize(text)
+        key = _cache_key(normalized)
+        cached = _cache_get(key)
+        if cached is not None:
+            results[i] = cached
+            continue
+        if key in pending:
+            pending[key][1].append(i)
+        else:
+            pending[key] = (normalized, [i])
+
+    if pending:
+        keys = list(pending.keys())
+        unique_texts = [pending[k][0] for k in keys]
+
+        if processes and processes > 1 and len(unique_texts) >= MIN_TEXTS_FOR_POOL:
+            chunks = [unique_texts[i:i + chunk_size] for i in range(0, len(unique_texts), chunk_size)]
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                scores = [s for chunk in executor.map(_score_chunk, chunks) for s in chunk]
+        else:
+            analyzer = get_analyzer()
+            scores = [_score_uncached(t, analyzer) for t in unique_texts]
+
+        for key, value in zip(keys, scores):
+            _cache_put(key, value)
+            for i in pending[key][1]:
+                results[i] = value
+
+    return results
+
+
+def configure_cache(maxsize: int):
+    """Change the LRU capacity (entries), evicting as needed."""
+    global _cache_size
+    with _cache_lock:
+        _cache_size = max(0, int(maxsize))
+        while len(_cache) > _cache_size:
+            _cache.popitem(last=False)
+
+
+def clear_cache():
+    """Drop all cached scores and reset counters."""
+    global _cache_hits, _cache_misses
+    with _cache_lock:
+        _cache.clear()
+        _cache_hits = 0
+        _cache_misses = 0
+
+
+def cache_info() -> dict:
+    """Cache counters, in the spirit of functools.lru_cache's cache_info()."""
+    with _cache_lock:
+        return {
+            "hits": _cache_hits,
+            "misses": _cache_misses,
+            "size": len(_cache),
+            "maxsize": _cache_size,
+        }
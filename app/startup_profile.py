@@ -0,0 +1,110 @@
+"""
+Startup profiling for the GUI and CLI entry points.
+
+Run an entry point with --profile-startup to record how long each module
+takes to import (self and cumulative, like `python -X importtime`) and when
+startup milestones such as the first frame are reached. The report is
+printed to stderr when the process exits.
+
+Only the standard library is imported here so that enabling the profiler
+first thing in an entry point measures everything imported after it.
+"""
+import atexit
+import builtins
+import importlib.util
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+PROFILE_FLAG = "--profile-startup"
+
+
+class StartupProfiler:
+    """Per-module import times and milestone marks for one process."""
+
+    def __init__(self):
+        self.enabled = False
+        self.started: Optional[float] = None
+        self.imports: Dict[str, Tuple[float, float]] = {}  # module -> (self, cumulative)
+        self.marks: List[Tuple[str, float]] = []
+        self._stack: List[float] = []
+        self._original_import = None
+
+    def enable(self):
+        """Start timing imports (main thread only) and print a report at exit."""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.started = time.perf_counter()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+        atexit.register(self._report_at_exit)
+
+    def enable_from_argv(self, argv: Optional[List[str]] = None) -> bool:
+        """Enable if PROFILE_FLAG is on the command line."""
+        if PROFILE_FLAG in (sys.argv if argv is None else argv):
+            self.enable()
+        return self.enabled
+
+    def disable(self):
+        """Stop timing imports (recorded data is kept)."""
+        if self._original_import is not None and builtins.__import__ == self._timed_import:
+            builtins.__import__ = self._original_import
+        self._original_import = None
+
+    def mark(self, label: str):
+        """Record the first time a milestone is reached (no-op when disabled)."""
+        if self.enabled and label not in dict(self.marks):
+            self.marks.append((label, time.perf_counter() - self.started))
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        if threading.current_thread() is not threading.main_thread():
+            return original(name, globals, locals, fromlist, level)
+
+        fullname = name
+        if level:
+            try:
+                fullname = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+            except (ImportError, ValueError):
+                pass
+        if not fullname or fullname in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        start = time.perf_counter()
+        self._stack.append(0.0)
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            if fullname in sys.modules:
+                self.imports[fullname] = (elapsed - nested, elapsed)
+
+    def slowest_imports(self, limit: int = 20) -> List[Tuple[str, float, float]]:
+        """(module, self, cumulative) for the modules with the largest self time."""
+        ranked = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)
+        return [(module, own, total) for module, (own, total) in ranked[:limit]]
+
+    def report(self, limit: int = 20) -> str:
+        """Human-readable summary of marks and the slowest imports."""
+        lines = ["Startup profile"]
+        for label, seconds in self.marks:
+            lines.append(f"  {label:<24} {seconds:8.3f}s")
+        total = sum(own for own, _ in self.imports.values())
+        lines.append(f"Imports: {len(self.imports)} modules, {total:.3f}s")
+        lines.append(f"  {'self':>8} {'cumul':>8}  module")
+        for module, own, cumulative in self.slowest_imports(limit):
+            lines.append(f"  {own:8.3f} {cumulative:8.3f}  {module}")
+        return "\n".join(lines)
+
+    def _report_at_exit(self):
+        self.disable()
+        print(self.report(), file=sys.stderr)
+
+
+# Create singleton instance
+startup_profiler = StartupProfiler()
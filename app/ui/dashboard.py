@@ -16,7 +16,7 @@ import numpy as np
 
 from app.i18n_manager import get_i18n
 from app.models import Score, JournalEntry, SatisfactionRecord
-from app.db import get_session, get_connection
+from app.db import UI_ACQUIRE_TIMEOUT, get_session, get_connection
 from app.analysis.time_based_analysis import time_analyzer
 
 # Import emotional profile clustering
@@ -26,6 +26,7 @@ try:
         ClusteringVisualizer,
         EMOTIONAL_PROFILES,
         create_profile_clusterer,
+        get_cohort_profiles,
         get_user_emotional_profile
     )
     CLUSTERING_AVAILABLE = True
@@ -289,7 +290,7 @@ class AnalyticsDashboard:
                 widget.destroy()
             
             # Get EQ scores
-            conn = get_connection()
+            conn = get_connection(timeout=UI_ACQUIRE_TIMEOUT)
             cursor = conn.cursor()
             
             # First, check what columns exist in the scores table
@@ -477,7 +478,7 @@ class AnalyticsDashboard:
         # Configure parent
         parent.configure(style="TFrame")
         
-        conn = get_connection()
+        conn = get_connection(timeout=UI_ACQUIRE_TIMEOUT)
         cursor = conn.cursor()
         try:
             cursor.execute("""
@@ -769,7 +770,7 @@ class AnalyticsDashboard:
 
     def show_journal_analytics(self, parent):
         """Show journal analytics"""
-        conn = get_connection() # Use centralized connection logic
+        conn = get_connection(timeout=UI_ACQUIRE_TIMEOUT) # Use centralized connection logic
         cursor = conn.cursor()
         
         # Check if journal_entries table exists
@@ -1006,17 +1007,21 @@ class AnalyticsDashboard:
             tk.Label(dist_frame, text="📊 All Emotional Profiles",
                     font=("Arial", 12, "bold"), bg="#f8f9fa").pack(pady=5)
             
-            # Show all profiles as a legend
+            # Show all profiles as a legend, with each profile's share of the cohort
             profiles_row = tk.Frame(dist_frame, bg="#f8f9fa")
             profiles_row.pack()
             
+            cohort = get_cohort_profiles()
+            counts = cohort['cluster_id'].value_counts()
+            
             for pid, pinfo in EMOTIONAL_PROFILES.items():
                 is_current = pid == profile.get('cluster_id')
                 badge_bg = pinfo['color'] if is_current else "#cccccc"
                 badge_fg = "white" if is_current else "#666666"
+                share = f" {100.0 * counts.get(pid, 0) / len(cohort):.0f}%" if len(cohort) else ""
                 
                 badge = tk.Label(profiles_row, 
-                               text=f"{pinfo['emoji']} {pinfo['name'][:15]}",
+                               text=f"{pinfo['emoji']} {pinfo['name'][:15]}{share}",
                                font=("Arial", 9, "bold" if is_current else "normal"),
                                bg=badge_bg, fg=badge_fg,
                                padx=8, pady=4, relief=tk.RAISED if is_current else tk.FLAT)
@@ -1095,7 +1100,7 @@ class AnalyticsDashboard:
     def show_wellbeing_analytics(self, parent):
         """Show wellbeing analytics (Sleep vs Mood, Work vs Mood)"""
         # Fetch Data
-        conn = get_connection()
+        conn = get_connection(timeout=UI_ACQUIRE_TIMEOUT)
         cursor = conn.cursor()
         try:
             cursor.execute("""
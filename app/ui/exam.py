@@ -415,9 +415,8 @@ class ExamManager:
                 return
             self.session.submit_reflection("")
         else:
-            # Use main app's analyzer if available
-            analyzer = getattr(self.app, 'sia', None)
-            self.session.submit_reflection(text, analyzer)
+            # Scored by the shared sentiment service (lexicon loaded once per process)
+            self.session.submit_reflection(text)
         
         self.finish_test()
 
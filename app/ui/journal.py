@@ -4,13 +4,12 @@ from tkinter import ttk, messagebox, scrolledtext
 from datetime import datetime, timedelta
 import logging
 
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
 from sqlalchemy import desc, text
 
 from app.i18n_manager import get_i18n
 from app.models import JournalEntry
 from app.db import get_session
+from app.services import sentiment_service
 
 # Lazy imports to avoid circular dependencies
 # These will be imported only when needed
@@ -44,22 +43,6 @@ class JournalFeature:
         # Use app colors if available
         if app and hasattr(app, 'colors'):
             self.colors = app.colors
-        
-        # Initialize VADER sentiment analyzer
-        self._initialize_sentiment_analyzer()
-        
-    def _initialize_sentiment_analyzer(self):
-        """Initialize the VADER sentiment analyzer"""
-        try:
-            nltk.data.find('sentiment/vader_lexicon.zip')
-        except LookupError:
-            nltk.download('vader_lexicon', quiet=True)
-            
-        try:
-            self.sia = SentimentIntensityAnalyzer()
-        except Exception as e:
-            logging.error(f"Failed to initialize sentiment analyzer: {e}")
-            self.sia = None
 
     def open_journal_window(self, username):
         """Open the journal window"""
@@ -171,60 +154,12 @@ class JournalFeature:
                  font=("Arial", 12)).pack(side=tk.LEFT, padx=5)
     
     def analyze_sentiment(self, text):
-        """Analyze sentiment using NLTK VADER"""
-        if not text.strip():
-            return 0.0
-            
-        if self.sia:
-            try:
-                scores = self.sia.polarity_scores(text)
-                # Convert compound (-1 to 1) to -100 to 100
-                return scores['compound'] * 100
-            except Exception as e:
-                logging.error(f"Sentiment analysis error: {e}")
-                return 0.0
-        else:
-            # Fallback to simple keyword matching if VADER fails
-            positive_words = ['happy', 'joy', 'excited', 'grateful', 'peaceful', 'confident']
-            negative_words = ['sad', 'angry', 'frustrated', 'anxious', 'worried', 'stressed']
-            
-            text_lower = text.lower()
-            positive_count = sum(1 for word in positive_words if word in text_lower)
-            negative_count = sum(1 for word in negative_words if word in text_lower)
-            
-            total_words = len(text.split())
-            if total_words == 0: 
-                return 0.0
-            
-            score = (positive_count - negative_count) / max(total_words, 1) * 100
-            return max(-100, min(100, score))
+        """Analyze sentiment using NLTK VADER (keyword fallback if unavailable)"""
+        return sentiment_service.score(text)
     
     def extract_emotional_patterns(self, text):
         """Extract emotional patterns from text"""
-        patterns = []
-        text_lower = text.lower()
-        
-        # Stress indicators
-        stress_words = ['stress', 'pressure', 'overwhelm', 'burden', 'exhausted']
-        if any(word in text_lower for word in stress_words):
-            patterns.append(self.i18n.get("patterns.stress_indicators"))
-        
-        # Relationship mentions
-        relationship_words = ['friend', 'family', 'colleague', 'partner', 'relationship']
-        if any(word in text_lower for word in relationship_words):
-            patterns.append(self.i18n.get("patterns.social_focus"))
-        
-        # Growth mindset
-        growth_words = ['learn', 'grow', 'improve', 'better', 'progress', 'develop']
-        if any(word in text_lower for word in growth_words):
-            patterns.append(self.i18n.get("patterns.growth_oriented"))
-        
-        # Self-reflection
-        reflection_words = ['realize', 'understand', 'reflect', 'think', 'feel', 'notice']
-        if any(word in text_lower for word in reflection_words):
-            patterns.append(self.i18n.get("patterns.self_reflective"))
-        
-        return "; ".join(patterns) if patterns else self.i18n.get("patterns.general_expression")
+        return sentiment_service.extract_emotional_patterns(text, self.i18n.get)
     
     def save_and_analyze(self):
         """Save journal entry and perform AI analysis"""
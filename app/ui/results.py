@@ -3,13 +3,13 @@ from tkinter import messagebox
 import logging
 from datetime import datetime
 import random
-from app.db import get_connection, get_session
+from app.db import UI_ACQUIRE_TIMEOUT, get_connection, get_session
 from app.models import Score
 from app.constants import BENCHMARK_DATA
-try:
-    from app.services.pdf_generator import generate_pdf_report
-except ImportError:
-    generate_pdf_report = None
+from app.lazy import lazy_import
+
+# reportlab/matplotlib load on the first export; falsy if unavailable
+generate_pdf_report = lazy_import("app.services.pdf_generator", "generate_pdf_report")
 
 class ResultsManager:
     def __init__(self, app):
@@ -506,7 +506,7 @@ class ResultsManager:
         actions = [
             ("\U0001f4ca Dashboard", "#14B8A6", self.app.open_dashboard_flow if hasattr(self.app, 'open_dashboard_flow') else None),
             ("\U0001f4c8 Analysis", "#EC4899", self.show_detailed_analysis),
-            ("\U0001f916 AI Insights", "#8B5CF6", self.show_ml_analysis if hasattr(self.app, 'ml_predictor') and self.app.ml_predictor else None),
+            ("\U0001f916 AI Insights", "#8B5CF6", self.show_ml_analysis if getattr(self.app, 'ml_predictor', None) is not None else None),
             ("💼 Satisfaction", "#178240", self.show_satisfaction_survey),
             ("\U0001f4c4 Export PDF", "#06B6D4", self.export_results_pdf),
             ("\U0001f504 Retake Test", "#3B82F6", self.reset_test),
@@ -746,13 +746,15 @@ class ResultsManager:
 
     def show_ml_analysis(self):
         """Show AI-powered analysis in a popup window"""
-        if not hasattr(self.app, 'ml_predictor') or not self.app.ml_predictor:
+        # Loads a lazily created predictor on first use, not when the button is drawn
+        predictor = getattr(self.app, 'ml_predictor', None)
+        if not predictor:
             messagebox.showerror("Error", "AI Model not loaded.")
             return
             
         try:
             # 1. Get Prediction
-            result = self.app.ml_predictor.predict_with_explanation(
+            result = predictor.predict_with_explanation(
                 self.app.responses,
                 self.app.age,
                 self.app.current_score,
@@ -995,7 +997,7 @@ class ResultsManager:
             fg=colors.get("text_primary", "#F8FAFC")
         ).pack(side="left", padx=50)
         
-        conn = get_connection()
+        conn = get_connection(timeout=UI_ACQUIRE_TIMEOUT)
         cursor = conn.cursor()
 
         # Get history data
@@ -1065,7 +1067,7 @@ class ResultsManager:
         
         colors = self.app.colors
         
-        conn = get_connection()
+        conn = get_connection(timeout=UI_ACQUIRE_TIMEOUT)
         cursor = conn.cursor()
 
         # Get history data
@@ -1237,7 +1239,7 @@ class ResultsManager:
         
         colors = self.app.colors
         
-        conn = get_connection()
+        conn = get_connection(timeout=UI_ACQUIRE_TIMEOUT)
         cursor = conn.cursor()
 
         # Get all test data for the current user
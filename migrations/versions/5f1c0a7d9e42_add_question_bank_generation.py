@@ -0,0 +1,49 @@
+"""add question bank generation
+
+Revision ID: 5f1c0a7d9e42
+Revises: 2eaa9d975b79
+Create Date: 2026-10-18 10:12:03.518274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f1c0a7d9e42'
+down_revision: Union[str, Sequence[str], None] = '2eaa9d975b79'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGGER_EVENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS question_bank_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            bank_id TEXT NOT NULL,
+            generation INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    op.execute("""
+        INSERT OR IGNORE INTO question_bank_generation (id, bank_id, generation)
+        VALUES (1, lower(hex(randomblob(8))), 0)
+    """)
+    for event_name in TRIGGER_EVENTS:
+        op.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS question_bank_generation_{event_name.lower()}
+            AFTER {event_name} ON question_bank BEGIN
+                UPDATE question_bank_generation SET generation = generation + 1 WHERE id = 1;
+            END
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for event_name in TRIGGER_EVENTS:
+        op.execute(f"DROP TRIGGER IF EXISTS question_bank_generation_{event_name.lower()}")
+    op.execute("DROP TABLE IF EXISTS question_bank_generation")
@@ -1,3 +1,4 @@
+from app.bootstrap import bootstrap
 from app.db import get_connection
 
 def add_tooltips():
@@ -23,4 +24,5 @@ def add_tooltips():
     conn.close()
 
 if __name__ == "__main__":
+    bootstrap(warm_cache=False)
     add_tooltips()
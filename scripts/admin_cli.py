@@ -14,6 +14,7 @@ import numpy as np
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from app.bootstrap import bootstrap
 from app.db import get_connection
 
 
@@ -370,4 +371,5 @@ def main():
         cli.show_stats(args.visual)
         
 if __name__ == "__main__":
+    bootstrap(warm_cache=False)
     main()
@@ -28,6 +28,7 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.config import DB_PATH
+from app.models import BUMP_QUESTION_GENERATION_SQL
 
 class QuestionDatabase:
     """Handles database operations for questions"""
@@ -71,6 +72,14 @@ class QuestionDatabase:
         conn.commit()
         conn.close()
     
+    def _bump_generation(self, cursor):
+        """Invalidate question caches (same transaction as the edit)"""
+        try:
+            cursor.execute(BUMP_QUESTION_GENERATION_SQL)
+        except sqlite3.OperationalError:
+            # Database without the generation table: nothing is cached against it
+            pass
+    
     def add_question(self, text, category="General", age_min=12, age_max=100, 
                     difficulty=3, weight=1.0):
         """Add a new question to the database"""
@@ -82,9 +91,10 @@ class QuestionDatabase:
             INSERT INTO questions (text, category, age_min, age_max, difficulty, weight)
             VALUES (?, ?, ?, ?, ?, ?)
             """, (text, category, age_min, age_max, difficulty, weight))
+            question_id = cursor.lastrowid
+            self._bump_generation(cursor)
             
             conn.commit()
-            question_id = cursor.lastrowid
             return question_id
         except sqlite3.Error as e:
             conn.rollback()
@@ -130,8 +140,11 @@ class QuestionDatabase:
         try:
             query = f"UPDATE questions SET {', '.join(updates)} WHERE id = ?"
             cursor.execute(query, values)
+            updated = cursor.rowcount > 0
+            if updated:
+                self._bump_generation(cursor)
             conn.commit()
-            return cursor.rowcount > 0
+            return updated
         except sqlite3.Error as e:
             conn.rollback()
             raise Exception(f"Failed to update question: {e}")
@@ -145,8 +158,11 @@ class QuestionDatabase:
         
         try:
             cursor.execute("UPDATE questions SET is_active = 0 WHERE id = ?", (question_id,))
+            deleted = cursor.rowcount > 0
+            if deleted:
+                self._bump_generation(cursor)
             conn.commit()
-            return cursor.rowcount > 0
+            return deleted
         except sqlite3.Error as e:
             conn.rollback()
             raise Exception(f"Failed to delete question: {e}")
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Resumable sentiment backfill for SOUL_SENSE_EXAM
+
+Re-scores scores.reflection_text and journal_entries.content rows whose
+sentiment_score / emotional_patterns are missing (or all rows with --all).
+Rows are streamed in id-ordered chunks, scored in worker processes and
+written back with batched executemany UPDATEs. The last written id per
+table and mode (missing / all) is checkpointed, so an interrupted run
+resumes where it stopped; the entry is removed once the table completes.
+
+Usage:
+    python scripts/backfill_sentiment.py [--table scores|journal_entries|all]
+                                         [--workers 4] [--chunk-size 1000]
+    python scripts/backfill_sentiment.py --all --reset    # full re-score from id 0
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.bootstrap import bootstrap
+from app.config import DATA_DIR
+from app.db import pooled_connection
+from app.services import sentiment_service
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT = os.path.join(DATA_DIR, "sentiment_backfill_checkpoint.json")
+
+# table -> (text column, "needs backfill" condition, UPDATE statement, writes patterns)
+TABLES = {
+    "scores": (
+        "reflection_text",
+        "sentiment_score IS NULL",
+        "UPDATE scores SET sentiment_score = ? WHERE id = ?",
+        False,
+    ),
+    "journal_entries": (
+        "content",
+        "(sentiment_score IS NULL OR emotional_patterns IS NULL)",
+        "UPDATE journal_entries SET sentiment_score = ?, emotional_patterns = ? WHERE id = ?",
+        True,
+    ),
+}
+
+
+def checkpoint_key(table, rescore_all=False):
+    """Checkpoint entry for a table in the given mode ("scores:missing", "scores:all")"""
+    return f"{table}:{'all' if rescore_all else 'missing'}"
+
+
+def load_checkpoint(path):
+    """Return {"table:mode": last processed id}"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+        return {}
+
+
+def save_checkpoint(path, checkpoint):
+    """Atomically write the checkpoint (temp file + rename)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def iter_chunks(table, start_id, chunk_size, rescore_all=False, db_path=None):
+    """
+    Yield lists of (id, text) in id order, starting after start_id.
+    Only one chunk is held in memory at a time.
+    """
+    text_col, condition, _, _ = TABLES[table]
+    where = f"id > ? AND {text_col} IS NOT NULL AND TRIM({text_col}) != ''"
+    if not rescore_all:
+        where += f" AND {condition}"
+    sql = f"SELECT id, {text_col} FROM {table} WHERE {where} ORDER BY id LIMIT ?"
+
+    last_id = start_id
+    while True:
+        with pooled_connection(db_path) as conn:
+            rows = conn.execute(sql, (last_id, chunk_size)).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def score_rows(rows, with_patterns):
+    """Worker entry point: return UPDATE parameter tuples for a chunk"""
+    ids = [row[0] for row in rows]
+    texts = [row[1] for row in rows]
+    scores = sentiment_service.score_many(texts)
+    if with_patterns:
+        patterns = [sentiment_service.extract_emotional_patterns(t) for t in texts]
+        return [(s, p, i) for s, p, i in zip(scores, patterns, ids)]
+    return [(s, i) for s, i in zip(scores, ids)]
+
+
+def _init_worker():
+    """Load the lexicon once per worker process"""
+    sentiment_service.get_analyzer()
+
+
+def backfill_table(table, executor, checkpoint, checkpoint_path, chunk_size,
+                   rescore_all=False, db_path=None, max_in_flight=1):
+    """
+    Backfill one table.
+
+    Returns (rows updated, last processed id). The table's checkpoint entry
+    is dropped once every chunk has been written, so the next run in either
+    mode starts from the first row.
+    """
+    _, _, update_sql, with_patterns = TABLES[table]
+    key = checkpoint_key(table, rescore_all)
+    start_id = int(checkpoint.get(key, 0))
+    if start_id:
+        logger.info(f"Resuming {table} ({key}) after id {start_id}")
+
+    chunks = iter_chunks(table, start_id, chunk_size, rescore_all, db_path)
+    updated = 0
+    last_id = start_id
+    started = time.perf_counter()
+
+    def write(rows, params):
+        nonlocal updated, last_id
+        with pooled_connection(db_path) as conn:
+            conn.executemany(update_sql, params)
+        updated += len(params)
+        last_id = rows[-1][0]
+        checkpoint[key] = last_id
+        save_checkpoint(checkpoint_path, checkpoint)
+        elapsed = time.perf_counter() - started
+        rate = updated / elapsed if elapsed > 0 else 0.0
+        logger.info(f"{table}: {updated} rows (last id {rows[-1][0]}, {rate:.0f} rows/sec)")
+
+    if executor is None:
+        for rows in chunks:
+            write(rows, score_rows(rows, with_patterns))
+    else:
+        # Keep one chunk per worker in flight; write results back in id order
+        in_flight = []
+        for rows in chunks:
+            in_flight.append((rows, executor.submit(score_rows, rows, with_patterns)))
+            if len(in_flight) >= max_in_flight:
+                done_rows, future = in_flight.pop(0)
+                write(done_rows, future.result())
+        for done_rows, future in in_flight:
+            write(done_rows, future.result())
+
+    if checkpoint.pop(key, None) is not None:
+        save_checkpoint(checkpoint_path, checkpoint)
+    return updated, last_id
+
+
+def run_backfill(tables, workers=None, chunk_size=1000, checkpoint_path=DEFAULT_CHECKPOINT,
+                 rescore_all=False, reset=False, db_path=None):
+    """
+    Backfill the given tables.
+
+    Args:
+        tables: Table names (keys of TABLES)
+        workers: Worker processes (None = CPU count, 0 = in-process)
+        chunk_size: Rows per read/score/UPDATE batch
+        checkpoint_path: JSON file holding the last processed id per table and mode
+        rescore_all: Re-score every row with text, not only missing values
+        reset: Ignore (and overwrite) any existing checkpoint
+
+    Returns:
+        dict report with per-table row counts and rows/sec
+    """
+    checkpoint = {} if reset else load_checkpoint(checkpoint_path)
+    report = {"tables": {}}
+    started = time.perf_counter()
+
+    executor = None
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    if workers > 0:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    try:
+        for table in tables:
+            table_start = time.perf_counter()
+            count, last_id = backfill_table(table, executor, checkpoint, checkpoint_path,
+                                   chunk_size, rescore_all, db_path, max_in_flight=max(workers, 1))
+            elapsed = time.perf_counter() - table_start
+            report["tables"][table] = {
+                "rows": count,
+                "rows_per_sec": round(count / elapsed, 1) if elapsed > 0 else 0.0,
+                "last_id": last_id,
+            }
+    finally:
+        if executor:
+            executor.shutdown()
+
+    elapsed = time.perf_counter() - started
+    total = sum(t["rows"] for t in report["tables"].values())
+    report["rows"] = total
+    report["elapsed_sec"] = round(elapsed, 3)
+    report["rows_per_sec"] = round(total / elapsed, 1) if elapsed > 0 else 0.0
+    return report
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description="Resumable sentiment backfill for SOUL_SENSE_EXAM",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Fill in missing sentiment for both tables (resumes automatically)
+  python scripts/backfill_sentiment.py
+
+  # Re-score every journal entry from scratch with 8 workers
+  python scripts/backfill_sentiment.py --table journal_entries --all --reset --workers 8
+        """
+    )
+    parser.add_argument('--table', choices=list(TABLES) + ['all'], default='all',
+                        help='Table to backfill (default: all)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: CPU count, 0 = in-process)')
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help='Rows per batch (default: 1000)')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT,
+                        help='Checkpoint file (default: data/sentiment_backfill_checkpoint.json)')
+    parser.add_argument('--all', dest='rescore_all', action='store_true',
+                        help='Re-score all rows with text, not just missing values')
+    parser.add_argument('--reset', action='store_true',
+                        help='Ignore any existing checkpoint and start from the first row')
+    parser.add_argument('--db', dest='db_path', default=None,
+                        help='Database path (default: application database)')
+    args = parser.parse_args()
+
+    if args.db_path is None:
+        bootstrap(warm_cache=False)
+
+    tables = list(TABLES) if args.table == 'all' else [args.table]
+    report = run_backfill(tables, workers=args.workers, chunk_size=args.chunk_size,
+                          checkpoint_path=args.checkpoint, rescore_all=args.rescore_all,
+                          reset=args.reset, db_path=args.db_path)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
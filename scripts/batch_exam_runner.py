@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Headless batch exam runner for SOUL_SENSE_EXAM
+
+Replays recorded exam sessions through ExamSession without the Tk/CLI loop.
+Answers and reflections are processed in a worker process pool, then every
+batch is persisted in a single transaction. Used for migrating paper tests
+and as a load generator for capacity planning.
+
+Input is JSONL, one session per line:
+    {"username": "jane", "age": 29, "answers": [3, 4, 2, ...],
+     "response_times": [4.1, 3.2, ...], "reflection": "optional text",
+     "question_ids": [1, 2, 3, ...], "timestamp": "optional ISO time"}
+
+Usage:
+    python scripts/batch_exam_runner.py sessions.jsonl [--workers 4] [--batch-size 500]
+    cat sessions.jsonl | python scripts/batch_exam_runner.py - --dry-run --format json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.bootstrap import bootstrap
+from app.db import pooled_connection
+from app.services.exam_service import ExamSession
+from app.services import sentiment_service
+from app.utils import compute_age_group
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def _init_worker():
+    """Pool worker setup: quiet per-session logs, warm the sentiment analyzer"""
+    # Per-session INFO logs would dominate runtime at thousands of sessions/sec.
+    # Only done in worker processes, never in the caller's process.
+    logging.getLogger("app.services.exam_service").setLevel(logging.WARNING)
+    sentiment_service.get_analyzer()
+
+
+def build_session(record: dict) -> ExamSession:
+    """Create a write-behind ExamSession for a recorded session and replay its answers"""
+    answers = record["answers"]
+    question_ids = record.get("question_ids") or list(range(1, len(answers) + 1))
+    if len(question_ids) != len(answers):
+        raise ValueError("question_ids and answers must have the same length")
+
+    age = int(record["age"])
+    questions = [(int(q_id), "", None, 0, 120) for q_id in question_ids]
+    session = ExamSession(
+        record["username"], age, compute_age_group(age), questions,
+        buffer_responses=True, buffer_size=0, flush_interval=0, journal_path=None,
+    )
+    session.start_exam()
+    for value in answers:
+        session.submit_answer(int(value))
+
+    # Keep the recorded timings instead of the replay's wall-clock timings
+    response_times = record.get("response_times")
+    if response_times is not None:
+        if len(response_times) != len(answers):
+            raise ValueError("response_times and answers must have the same length")
+        session.response_times = [float(t) for t in response_times]
+
+    session.submit_reflection(record.get("reflection") or "")
+    return session
+
+
+def process_record(record: dict):
+    """
+    Worker entry point.
+    Returns (session, timestamp, seconds) or (None, error message, seconds).
+    """
+    start = time.perf_counter()
+    try:
+        session = build_session(record)
+        return session, record.get("timestamp"), time.perf_counter() - start
+    except Exception as e:
+        return None, f"{record.get('username', '?')}: {e}", time.perf_counter() - start
+
+
+def read_records(stream):
+    """Yield records from a JSONL stream, skipping blank and malformed lines"""
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping malformed line {line_no}: {e}")
+
+
+def persist_batch(sessions, db_path=None):
+    """Persist a batch of finished sessions in one transaction. Returns per-session seconds."""
+    timings = []
+    with pooled_connection(db_path) as conn:
+        for session, timestamp in sessions:
+            start = time.perf_counter()
+            session.score_id = session.persist(conn, timestamp=timestamp)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_batch(records, workers=None, batch_size=500, db_path=None, dry_run=False):
+    """
+    Replay records and persist results.
+
+    Args:
+        records: Iterable of session dicts (streamed; only batch_size are held at once)
+        workers: Worker processes (None = CPU count, 0 = run in-process)
+        batch_size: Sessions per worker round and per persistence transaction
+        db_path: Optional database path (defaults to the app database)
+        dry_run: Process sessions without writing to the database
+
+    Returns:
+        dict report with throughput and latency percentiles
+    """
+    records = iter(records)
+    latencies = []
+    errors = []
+    persisted = 0
+
+    executor = None
+    if workers != 0:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    else:
+        sentiment_service.get_analyzer()
+
+    wall_start = time.perf_counter()
+    try:
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+
+            if executor:
+                chunksize = max(1, len(batch) // ((workers or os.cpu_count() or 1) * 4))
+                results = list(executor.map(process_record, batch, chunksize=chunksize))
+            else:
+                results = [process_record(r) for r in batch]
+
+            finished = []
+            worker_times = []
+            for session, extra, seconds in results:
+                if session is None:
+                    errors.append(extra)
+                    continue
+                finished.append((session, extra))
+                worker_times.append(seconds)
+
+            if dry_run or not finished:
+                latencies.extend(worker_times)
+                continue
+
+            persist_times = persist_batch(finished, db_path)
+            latencies.extend(w + p for w, p in zip(worker_times, persist_times))
+            persisted += len(finished)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    elapsed = time.perf_counter() - wall_start
+    processed = len(latencies)
+    lat_ms = np.asarray(latencies) * 1000.0 if latencies else np.zeros(1)
+
+    return {
+        "sessions": processed,
+        "persisted": persisted,
+        "errors": len(errors),
+        "error_samples": errors[:10],
+        "elapsed_sec": round(elapsed, 3),
+        "sessions_per_sec": round(processed / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(float(np.percentile(lat_ms, 50)), 3),
+            "p99": round(float(np.percentile(lat_ms, 99)), 3),
+            "max": round(float(lat_ms.max()), 3),
+        },
+    }
+
+
+def format_text_output(report: dict) -> str:
+    """Format the run report as readable text"""
+    output = ["\n📊 Batch Exam Runner Report", "=" * 60]
+    output.append(f"Sessions processed: {report['sessions']}")
+    output.append(f"Sessions persisted: {report['persisted']}")
+    output.append(f"Errors:             {report['errors']}")
+    output.append(f"Elapsed:            {report['elapsed_sec']:.2f}s")
+    output.append(f"Throughput:         {report['sessions_per_sec']:.2f} sessions/sec")
+    output.append(f"Latency p50:        {report['latency_ms']['p50']:.3f} ms")
+    output.append(f"Latency p99:        {report['latency_ms']['p99']:.3f} ms")
+    for sample in report["error_samples"]:
+        output.append(f"  ❌ {sample}")
+    output.append("=" * 60)
+    return "\n".join(output)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description="Headless batch exam runner for SOUL_SENSE_EXAM",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Replay recorded sessions with 8 worker processes
+  python scripts/batch_exam_runner.py sessions.jsonl --workers 8
+
+  # Load test without touching the database
+  python scripts/batch_exam_runner.py sessions.jsonl --dry-run --format json
+        """
+    )
+    parser.add_argument('input', help="JSONL file of recorded sessions ('-' for stdin)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: CPU count, 0 = in-process)')
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help='Sessions per persistence transaction (default: 500)')
+    parser.add_argument('--db', dest='db_path', default=None,
+                        help='Database path (default: application database)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Process sessions without writing results')
+    parser.add_argument('--format', choices=['text', 'json'], default='text',
+                        help='Output format (default: text)')
+    args = parser.parse_args()
+
+    if args.db_path is None:
+        bootstrap(warm_cache=False)
+
+    stream = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    try:
+        report = run_batch(
+            read_records(stream),
+            workers=args.workers,
+            batch_size=args.batch_size,
+            db_path=args.db_path,
+            dry_run=args.dry_run,
+        )
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    if args.format == 'json':
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_text_output(report))
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Build the SoulSense depression-risk model artifact
+
+Trains SoulSenseMLPredictor and registers/saves the artifact that lazy
+predictors (SoulSenseMLPredictor(lazy=True)) load on first use. Run this
+as a deployment step so the app never trains on the request path.
+
+Usage:
+    python scripts/build_ml_model.py [--bump patch|minor|major] [--no-versioning]
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.ml.predictor import SoulSenseMLPredictor
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Build the SoulSense ML model artifact")
+    parser.add_argument('--bump', choices=['patch', 'minor', 'major'], default='patch',
+                        help='Version bump for the registered model (default: patch)')
+    parser.add_argument('--experiment', default=None,
+                        help='Experiment name for tracking')
+    parser.add_argument('--no-versioning', action='store_true',
+                        help='Only write the legacy soulsense_ml_model.pkl')
+    parser.add_argument('--promote', action='store_true',
+                        help='Promote the new version to production')
+    args = parser.parse_args()
+
+    predictor = SoulSenseMLPredictor.build(
+        use_versioning=not args.no_versioning,
+        bump_type=args.bump,
+        experiment_name=args.experiment,
+    )
+    if args.promote and predictor.current_version:
+        predictor.promote_to_production(predictor.current_version)
+
+    print(f"✅ Built {predictor.MODEL_NAME} (v{predictor.current_version or 'legacy'})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
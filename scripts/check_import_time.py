@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Check import time of the app entry points against a budget
+
+Each module is imported in a fresh interpreter (best of --repeat runs) so
+the numbers are what a new CLI, GUI or test process pays. Importing must
+also leave the process single-threaded: database and cache work belongs in
+app.bootstrap, not at module level.
+
+Usage:
+    python scripts/check_import_time.py [--repeat 3] [module ...]
+"""
+
+import argparse
+import json
+import logging
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+ROOT_DIR = Path(__file__).parent.parent
+
+# Seconds allowed for a cold `import <module>`
+IMPORT_BUDGETS = {
+    "app.questions": 1.0,
+    "app.cli": 1.5,
+    "app.main": 1.5,
+}
+
+_PROBE = """
+import json, threading, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - start,
+                  "threads": threading.active_count()}}))
+"""
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def measure_import(module: str, repeat: int = 3) -> Dict:
+    """Import module in fresh interpreters; best time and threads left running."""
+    runs = []
+    for _ in range(max(1, repeat)):
+        result = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        )
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return {
+        "module": module,
+        "seconds": min(run["seconds"] for run in runs),
+        "threads": max(run["threads"] for run in runs),
+    }
+
+
+def check_budgets(modules=None, repeat: int = 3) -> Dict[str, Dict]:
+    """Measure each module and flag it if it is over budget or starts threads."""
+    results = {}
+    for module in modules or IMPORT_BUDGETS:
+        result = measure_import(module, repeat)
+        result["budget"] = IMPORT_BUDGETS.get(module)
+        result["ok"] = result["threads"] == 1 and (
+            result["budget"] is None or result["seconds"] <= result["budget"]
+        )
+        results[module] = result
+    return results
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Check import times against their budgets")
+    parser.add_argument('modules', nargs='*',
+                        help='Modules to check (default: all budgeted entry points)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Imports per module; the fastest counts (default: 3)')
+    args = parser.parse_args()
+
+    results = check_budgets(args.modules, args.repeat)
+    for result in results.values():
+        budget = f"{result['budget']:.2f}s" if result["budget"] is not None else "none"
+        status = "OK" if result["ok"] else "OVER"
+        logger.info(f"{status:4} {result['module']:<16} {result['seconds']:.3f}s "
+                    f"(budget {budget}, threads {result['threads']})")
+    return 0 if all(result["ok"] for result in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
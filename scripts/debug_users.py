@@ -1,3 +1,4 @@
+from app.bootstrap import bootstrap
 from app.db import get_session
 from app.models import User
 
@@ -18,4 +19,5 @@ def list_users():
         session.close()
 
 if __name__ == "__main__":
+    bootstrap(warm_cache=False)
     list_users()
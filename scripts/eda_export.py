@@ -32,6 +32,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.utils import compute_age_group, compute_detailed_age_group
 from app.models import ensure_scores_schema, ensure_responses_schema
+from app.analysis.streaming_stats import score_statistics
 
 # Configure logging
 logging.basicConfig(
@@ -128,6 +129,9 @@ class EDAExporter:
         logger.info(f"Updated {len(responses_to_update)} response records")
         
         self.conn.commit()
+        if scores_to_update:
+            # Per-age-group running stats were keyed on the old groups
+            score_statistics.invalidate("age_group")
         logger.info("Backfill completed successfully")
         
         return results
@@ -22,6 +22,8 @@ from faker import Faker
 import numpy as np
 from tqdm import tqdm
 
+from app.bootstrap import bootstrap
+
 class SyntheticDataGenerator:
     """Generates synthetic emotional intelligence test data"""
     
@@ -468,6 +470,7 @@ def main():
         generator.generate_analytics_sample(output_file=args.output)
     else:
         # Generate and insert into database
+        bootstrap(warm_cache=False)
         success = generator.insert_synthetic_data(clear_existing=args.clear)
         
         if success:
@@ -1,5 +1,6 @@
 import os
 from datetime import datetime
+from app.bootstrap import bootstrap
 from app.db import get_connection
 from app.models import ensure_question_bank_schema
 
@@ -26,4 +27,5 @@ def load_questions():
     print(f"Loaded {len(questions)} questions into DB")
 
 if __name__ == "__main__":
+    bootstrap(warm_cache=False)
     load_questions()
@@ -13,6 +13,7 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from app.bootstrap import bootstrap
 from app.db import get_session, update_user_settings
 from app.models import User
 from app.config import DATA_DIR
@@ -70,4 +71,5 @@ def migrate_settings():
         session.close()
 
 if __name__ == "__main__":
+    bootstrap(warm_cache=False)
     migrate_settings()
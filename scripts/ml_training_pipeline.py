@@ -55,7 +55,8 @@ from sklearn.svm import SVC
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from model_versioning import ModelVersioningManager, create_versioning_manager
+from app.ml.synthetic_data import generate_synthetic_data, iter_synthetic_chunks
+from app.ml.versioning import ModelVersioningManager, create_versioning_manager
 
 # Configure logging
 logging.basicConfig(
@@ -206,48 +207,13 @@ class MLTrainingPipeline:
         """
         logger.info(f"Generating {n_samples} synthetic samples...")
         
-        np.random.seed(self.random_state)
-        
-        X = np.zeros((n_samples, len(self.FEATURE_NAMES)))
-        
-        for i in range(n_samples):
-            # Generate individual question scores (1-5)
-            q_scores = np.random.randint(1, 6, 5)
-            
-            # Calculate derived features
-            total_score = q_scores.sum()
-            age = np.random.randint(12, 65)
-            avg_score = total_score / 5
-            
-            # Generate sentiment correlated with EQ score + noise
-            base_sentiment = (total_score / 25.0) * 100
-            sentiment_noise = np.random.normal(0, 30 * (1 + noise_level))
-            sentiment_score = np.clip((base_sentiment - 50) * 2 + sentiment_noise, -100, 100)
-            
-            # Create feature vector
-            X[i] = [
-                q_scores[0], q_scores[1], q_scores[2], q_scores[3], q_scores[4],
-                total_score, age, avg_score, sentiment_score
-            ]
-        
-        # Generate labels based on rules with some noise
-        y = []
-        for i in range(n_samples):
-            total_score = X[i, 5]
-            sentiment_score = X[i, 8]
-            
-            # Add noise to thresholds
-            noise = np.random.normal(0, noise_level * 3)
-            
-            # Risk classification rules
-            if total_score <= (10 + noise) or (total_score <= (15 + noise) and sentiment_score < -50):
-                y.append(2)  # High risk
-            elif total_score <= (15 + noise) or (total_score <= (20 + noise) and sentiment_score < -20):
-                y.append(1)  # Moderate risk
-            else:
-                y.append(0)  # Low risk
-        
-        y = np.array(y)
+        X, y = generate_synthetic_data(
+            n_samples=n_samples,
+            seed=self.random_state,
+            age_range=(12, 65),
+            sentiment_std=30 * (1 + noise_level),
+            threshold_std=noise_level * 3,
+        )
         
         # Log class distribution
         unique, counts = np.unique(y, return_counts=True)
@@ -256,6 +222,34 @@ class MLTrainingPipeline:
         
         return X, y
     
+    def iter_synthetic_data(
+        self,
+        n_samples: int,
+        chunk_size: int = 100_000,
+        noise_level: float = 0.1,
+    ):
+        """
+        Chunked variant of generate_synthetic_data for out-of-core training.
+        
+        Args:
+            n_samples: Total number of samples to generate
+            chunk_size: Maximum rows per yielded chunk
+            noise_level: Amount of noise to add (0-1)
+            
+        Yields:
+            Tuples of (features, labels), one chunk at a time
+        """
+        logger.info(f"Streaming {n_samples} synthetic samples in chunks of {chunk_size}...")
+        
+        yield from iter_synthetic_chunks(
+            n_samples,
+            chunk_size=chunk_size,
+            seed=self.random_state,
+            age_range=(12, 65),
+            sentiment_std=30 * (1 + noise_level),
+            threshold_std=noise_level * 3,
+        )
+    
     def load_data_from_db(self, db_path: str = "db/soulsense.db") -> Tuple[np.ndarray, np.ndarray]:
         """
         Load training data from the database.
@@ -19,6 +19,7 @@ from datetime import datetime
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from app.bootstrap import bootstrap
 from app.db import get_session
 from app.analysis.outlier_detection import OutlierDetector
 
@@ -393,4 +394,5 @@ Examples:
 
 
 if __name__ == "__main__":
+    bootstrap(warm_cache=False)
     main()
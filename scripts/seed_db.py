@@ -1,3 +1,4 @@
+from app.bootstrap import bootstrap
 from app.db import get_session
 from app.models import Question, QuestionCategory
 
@@ -51,4 +52,5 @@ def seed_database():
         session.close()
 
 if __name__ == "__main__":
+    bootstrap(warm_cache=False)
     seed_database()
@@ -60,6 +60,17 @@ def temp_db(monkeypatch):
     test_engine.dispose()
 
 
+@pytest.fixture
+def keyword_only(monkeypatch):
+    """Score sentiment with the keyword fallback; the shared analyzer is restored afterwards"""
+    from app.services import sentiment_service
+    monkeypatch.setattr(sentiment_service, "_analyzer", None)
+    monkeypatch.setattr(sentiment_service, "_analyzer_loaded", True)
+    sentiment_service.clear_cache()
+    yield
+    sentiment_service.clear_cache()
+
+
 # --- UI MOCKING FIXTURES ---
 
 @pytest.fixture(scope="session", autouse=True)
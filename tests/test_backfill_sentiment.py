@@ -0,0 +1,75 @@
+import sqlite3
+from sqlalchemy import create_engine
+from app.models import Base
+from scripts.backfill_sentiment import run_backfill, load_checkpoint
+
+
+def make_db(tmp_path):
+    db_path = str(tmp_path / "backfill.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO scores (username, total_score, reflection_text, sentiment_score) VALUES (?, ?, ?, ?)",
+        [("a", 10, "so happy", None), ("b", 12, "", None), ("c", 14, "sad day", 5.0)],
+    )
+    conn.executemany(
+        "INSERT INTO journal_entries (username, content, sentiment_score, emotional_patterns) VALUES (?, ?, ?, ?)",
+        [("a", f"I feel stressed {i}", None, None) for i in range(5)],
+    )
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def test_backfill_fills_missing_values(tmp_path, keyword_only):
+    db_path = make_db(tmp_path)
+    checkpoint = str(tmp_path / "ckpt.json")
+
+    report = run_backfill(["scores", "journal_entries"], workers=0, chunk_size=2,
+                          checkpoint_path=checkpoint, db_path=db_path)
+
+    assert report["tables"]["scores"]["rows"] == 1
+    assert report["tables"]["journal_entries"]["rows"] == 5
+
+    conn = sqlite3.connect(db_path)
+    scores = dict(conn.execute("SELECT username, sentiment_score FROM scores").fetchall())
+    assert scores["a"] == 50.0
+    assert scores["b"] is None      # empty reflection is skipped
+    assert scores["c"] == 5.0       # already scored, untouched without --all
+    assert conn.execute(
+        "SELECT COUNT(*) FROM journal_entries WHERE sentiment_score < 0 AND emotional_patterns IS NOT NULL"
+    ).fetchone()[0] == 5
+    conn.close()
+
+    assert report["tables"]["journal_entries"]["last_id"] == 5
+    # Completed tables leave no checkpoint entry behind
+    assert load_checkpoint(checkpoint) == {}
+
+
+def test_backfill_resumes_from_checkpoint(tmp_path, keyword_only):
+    db_path = make_db(tmp_path)
+    checkpoint = tmp_path / "ckpt.json"
+    checkpoint.write_text('{"journal_entries:missing": 3}')
+
+    report = run_backfill(["journal_entries"], workers=0, chunk_size=10,
+                          checkpoint_path=str(checkpoint), db_path=db_path)
+    assert report["tables"]["journal_entries"]["rows"] == 2
+
+    report = run_backfill(["journal_entries"], workers=0, chunk_size=10,
+                          checkpoint_path=str(checkpoint), db_path=db_path, reset=True)
+    assert report["tables"]["journal_entries"]["rows"] == 3
+
+
+def test_rescore_all_ignores_missing_only_checkpoint(tmp_path, keyword_only):
+    db_path = make_db(tmp_path)
+    checkpoint = tmp_path / "ckpt.json"
+    checkpoint.write_text('{"journal_entries:missing": 3}')
+
+    report = run_backfill(["journal_entries"], workers=0, chunk_size=10,
+                          checkpoint_path=str(checkpoint), db_path=db_path, rescore_all=True)
+    assert report["tables"]["journal_entries"]["rows"] == 5
+    # The interrupted missing-only run keeps its own entry
+    assert load_checkpoint(str(checkpoint)) == {"journal_entries:missing": 3}
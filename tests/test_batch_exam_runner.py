@@ -0,0 +1,70 @@
+import logging
+import sqlite3
+from sqlalchemy import create_engine
+from app.models import Base
+from scripts.batch_exam_runner import run_batch, read_records
+
+
+def make_db(tmp_path):
+    db_path = str(tmp_path / "batch.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    return db_path
+
+
+def test_run_batch_persists_sessions(tmp_path):
+    db_path = make_db(tmp_path)
+    records = [
+        {"username": f"user{i}", "age": 30, "answers": [4, 3, 4, 2],
+         "response_times": [3.0, 4.0, 5.0, 2.5], "reflection": ""}
+        for i in range(5)
+    ]
+    records.append({"username": "broken", "age": 30, "answers": [7]})
+
+    report = run_batch(records, workers=0, batch_size=2, db_path=db_path)
+
+    assert report["sessions"] == 5
+    assert report["persisted"] == 5
+    assert report["errors"] == 1
+    assert report["latency_ms"]["p99"] >= report["latency_ms"]["p50"]
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM scores WHERE total_score = 13").fetchone()[0] == 5
+    assert conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 20
+    # Recorded timings (avg > 2s) are used, so nothing is flagged as rushed
+    assert conn.execute("SELECT COUNT(*) FROM scores WHERE is_rushed = 1").fetchone()[0] == 0
+    conn.close()
+
+
+def test_recorded_timestamp_applies_to_responses(tmp_path):
+    db_path = make_db(tmp_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO users (username, password_hash) VALUES ('alice', 'x')")
+    conn.commit()
+    conn.close()
+    level = logging.getLogger("app.services.exam_service").level
+
+    stamp = "2024-05-01T10:00:00"
+    run_batch([{"username": "alice", "age": 30, "answers": [4, 3], "timestamp": stamp}],
+              workers=0, db_path=db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT timestamp FROM scores").fetchall() == [(stamp,)]
+    assert conn.execute("SELECT DISTINCT timestamp, user_id IS NOT NULL FROM responses").fetchall() == [(stamp, 1)]
+    conn.close()
+    # The in-process path leaves the caller's logging alone
+    assert logging.getLogger("app.services.exam_service").level == level
+
+
+def test_dry_run_writes_nothing(tmp_path):
+    db_path = make_db(tmp_path)
+    report = run_batch([{"username": "x", "age": 20, "answers": [1, 2]}],
+                       workers=0, db_path=db_path, dry_run=True)
+    assert report["sessions"] == 1
+    assert report["persisted"] == 0
+
+
+def test_read_records_skips_bad_lines():
+    lines = ['{"username": "a", "age": 1, "answers": [1]}', "", "not json"]
+    assert [r["username"] for r in read_records(lines)] == ["a"]
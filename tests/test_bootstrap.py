@@ -0,0 +1,40 @@
+from app import bootstrap as bootstrap_module
+from app.models import Question
+from scripts.check_import_time import check_budgets
+
+
+def test_entry_points_import_without_side_effects():
+    # Import time budgets are machine-dependent: scripts/check_import_time.py checks them
+    results = check_budgets(repeat=1)
+
+    for module, result in results.items():
+        assert result["threads"] == 1, f"{module} started threads on import"
+
+
+def test_bootstrap_checks_schema_once(mocker):
+    mocker.patch.object(bootstrap_module, "_database_ready", False)
+    check = mocker.patch.object(bootstrap_module, "check_db_state", return_value=True)
+    preload = mocker.patch.object(bootstrap_module, "preload_all_question_sets")
+
+    assert bootstrap_module.bootstrap(warm_cache=False)
+    assert bootstrap_module.bootstrap()
+    assert check.call_count == 1
+    preload.assert_called_once()
+
+
+def test_warm_question_cache_in_foreground(temp_db, mocker):
+    from app import questions as questions_module
+    mocker.patch.object(questions_module, "_save_to_disk_cache")
+    temp_db.add(Question(question_text="Warm?", is_active=1, min_age=0, max_age=120))
+    temp_db.commit()
+
+    bootstrap_module.warm_question_cache(background=False)
+
+    query = mocker.spy(questions_module, "_query_questions")
+    assert questions_module.get_question_bank().count(30) == 1
+    assert query.call_count == 0
+
+
+def test_warm_question_cache_tolerates_empty_bank(temp_db):
+    # No questions: logged, not raised
+    bootstrap_module.warm_question_cache(background=False)
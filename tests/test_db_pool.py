@@ -0,0 +1,126 @@
+import gc
+import threading
+import pytest
+from app.db_pool import ConnectionPool
+from app.exceptions import DatabaseError
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=2)
+    yield pool
+    pool.close_all()
+
+
+def test_pragmas_applied_to_new_connections(pool):
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+
+def test_connections_are_reused(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    stats = pool.stats()
+    assert stats["created"] == 1
+    assert stats["reused"] == 1
+    assert stats["in_use"] == 0
+
+
+def test_close_returns_connection_to_pool(pool):
+    conn = pool.acquire()
+    conn.close()
+    assert pool.acquire() is conn
+
+
+def test_pool_is_bounded(pool):
+    conns = [pool.acquire() for _ in range(2)]
+    with pytest.raises(DatabaseError):
+        pool.acquire(timeout=0.05)
+
+    for conn in conns:
+        pool.release(conn)
+    pool.release(conns[0])  # Double release is ignored
+    stats = pool.stats()
+    assert stats["in_use"] == 0
+    assert stats["idle_this_thread"] == 2
+    assert stats["open"] == 2
+
+
+def test_waiting_acquire_gets_released_connection(pool):
+    conns = [pool.acquire() for _ in range(2)]
+    timer = threading.Timer(0.05, conns[0].close)
+    timer.start()
+    conn = pool.acquire(timeout=5)
+    timer.join()
+    assert pool.stats()["in_use"] == 2
+    conn.close()
+    conns[1].close()
+
+
+def test_context_manager_commits_and_rolls_back(pool):
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.execute("INSERT INTO t VALUES (1)")
+
+    with pytest.raises(DatabaseError):
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO t VALUES (2)")
+            conn.execute("INSERT INTO missing VALUES (3)")
+
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+
+
+def test_each_caller_gets_its_own_connection(pool):
+    outer = pool.acquire()
+    outer.execute("CREATE TABLE t (x INTEGER)")
+    outer.commit()
+    outer.execute("INSERT INTO t VALUES (1)")
+
+    # A nested caller closing its handle must not discard the outer work
+    inner = pool.acquire()
+    assert inner is not outer
+    inner.close()
+
+    outer.commit()
+    assert outer.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+    outer.close()
+
+
+def test_dropped_connection_frees_its_slot(pool):
+    conn = pool.acquire()
+    assert pool.stats()["in_use"] == 1
+    del conn
+    gc.collect()
+    stats = pool.stats()
+    assert stats["in_use"] == 0
+    assert stats["reclaimed"] == 1
+
+
+def test_full_pool_reclaims_dropped_connections(pool):
+    for _ in range(3):
+        pool.acquire(timeout=0.05)  # Never closed
+    stats = pool.stats()
+    assert stats["in_use"] <= 1
+    assert stats["reclaimed"] >= 2
+
+
+def test_reclaim_collects_outside_the_pool_lock(pool, mocker):
+    collect = gc.collect
+    lock_free = []
+
+    def checked_collect():
+        probe = threading.Thread(target=lambda: lock_free.append(pool.stats() is not None))
+        probe.start()
+        probe.join(timeout=1)
+        return collect()
+
+    mocker.patch("app.db_pool.gc.collect", side_effect=checked_collect)
+    for _ in range(3):
+        pool.acquire(timeout=0.05)  # Never closed
+    assert lock_free == [True]
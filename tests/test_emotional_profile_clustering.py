@@ -12,19 +12,28 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from app.ml.clustering import (
     EmotionalFeatureExtractor,
     EmotionalProfileClusterer,
+    UserProfileStore,
     ClusteringVisualizer,
     EMOTIONAL_PROFILES,
     create_profile_clusterer,
     cluster_all_users,
     get_user_emotional_profile,
-    get_profile_summary
+    get_profile_summary,
+    get_cohort_profiles
 )
+from app.ml import clustering as clustering_module
 
 
 # ==============================================================================
 # TEST FIXTURES
 # ==============================================================================
 
+@pytest.fixture(autouse=True)
+def isolated_model_dir(tmp_path, monkeypatch):
+    """Clusterers save to a temp dir, never into the tracked models directory."""
+    monkeypatch.setattr(EmotionalProfileClusterer, "MODEL_DIR", tmp_path / "clustering")
+
+
 @pytest.fixture
 def sample_user_data():
     """Create sample user feature data for testing."""
@@ -177,6 +186,61 @@ class TestEmotionalFeatureExtractor:
         responses = [Mock(response_value=3) for _ in range(5)]
         variance = feature_extractor._response_variance(responses)
         assert variance == 0.0, "Uniform responses should have zero variance"
+    
+    @pytest.mark.parametrize("scan_batch_size", [50000, 2])
+    def test_set_based_extraction_matches_per_user_helpers(self, feature_extractor, scan_batch_size):
+        """Single-scan extraction reproduces the per-user feature formulas, however the scan is chunked."""
+        feature_extractor.SCAN_BATCH_SIZE = scan_batch_size
+        from contextlib import contextmanager
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from app.models import Base, Score, Response
+        
+        engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        rng = np.random.default_rng(1)
+        for u in range(6):
+            name = f"user_{u}"
+            for k in range(u + 1):
+                session.add(Score(username=name, total_score=int(rng.integers(10, 25)),
+                                  sentiment_score=None if k == 1 else float(rng.uniform(-50, 50)),
+                                  timestamp=f"2024-01-{k + 1:02d}T00:00:00"))
+            for k in range(u % 3 * 2):
+                session.add(Response(username=name, question_id=k, response_value=int(rng.integers(1, 6))))
+        session.add(Score(username="user_0", total_score=None, timestamp="2024-02-01T00:00:00"))
+        session.commit()
+        
+        @contextmanager
+        def fake_context():
+            yield session
+        
+        with patch("app.ml.clustering.safe_db_context", fake_context):
+            df = feature_extractor.extract_all_users_features()
+            single = feature_extractor.extract_user_features("user_4")
+        
+        assert list(df.columns) == ['username'] + feature_extractor.feature_names
+        assert len(df) == 6
+        for row in df.itertuples(index=False):
+            scores = session.query(Score).filter_by(username=row.username).order_by(Score.timestamp).all()
+            responses = session.query(Response).filter_by(username=row.username).all()
+            values = [s.total_score for s in scores if s.total_score is not None]
+            sentiments = [s.sentiment_score for s in scores if s.sentiment_score is not None]
+            
+            assert row.avg_total_score == pytest.approx(np.mean(values))
+            assert row.score_std == pytest.approx(np.std(values) if len(values) > 1 else 0)
+            assert row.avg_sentiment == pytest.approx(np.mean(sentiments) if sentiments else 0)
+            assert row.sentiment_std == pytest.approx(np.std(sentiments) if len(sentiments) > 1 else 0)
+            assert row.score_trend == pytest.approx(feature_extractor._calculate_trend(values))
+            assert row.response_consistency == pytest.approx(feature_extractor._calculate_consistency(responses))
+            assert row.emotional_range == (max(values) - min(values) if len(values) > 1 else 0)
+            assert row.assessment_frequency == len(scores)
+            assert row.avg_response_value == pytest.approx(feature_extractor._avg_response_value(responses))
+            assert row.response_variance == pytest.approx(feature_extractor._response_variance(responses))
+        
+        assert single['username'] == "user_4"
+        assert single['assessment_frequency'] == 5
+
 
 
 # ==============================================================================
@@ -274,6 +338,60 @@ class TestEmotionalProfileClusterer:
             assert 0 <= result['cluster_id'] < clusterer.n_clusters
             assert 0 <= result['confidence'] <= 1
     
+    def test_predict_many_matches_single_predictions(self, clusterer, sample_user_data, tmp_path):
+        """Batch assignment of a feature frame agrees with predict_from_features."""
+        clusterer.model_path = tmp_path
+        clusterer.fit(data=sample_user_data)
+        
+        batch = clusterer.predict_many(sample_user_data)
+        
+        assert list(batch.columns) == ['username', 'cluster_id', 'profile_name', 'confidence']
+        assert batch['username'].tolist() == sample_user_data['username'].tolist()
+        for (_, row), (_, features) in zip(batch.iterrows(), sample_user_data.iterrows()):
+            single = clusterer.predict_from_features(features.to_dict(), username=features['username'])
+            assert row['cluster_id'] == single['cluster_id']
+            assert row['profile_name'] == single['profile_name']
+            assert row['confidence'] == pytest.approx(single['confidence'])
+    
+    def test_predict_many_usernames_extracts_only_unassigned(self, clusterer, sample_user_data, tmp_path):
+        """Stored assignments are reused; the rest are extracted in one set-wise call."""
+        clusterer.model_path = tmp_path
+        clusterer.fit(data=sample_user_data.iloc[:40])
+        new_users = sample_user_data[sample_user_data['username'].isin(['test_user_41', 'test_user_45'])]
+        
+        with patch.object(clusterer.feature_extractor, 'extract_users_features',
+                          return_value=new_users) as extract:
+            result = clusterer.predict_many(['test_user_41', 'test_user_0', 'unknown', 'test_user_45'])
+        
+        extract.assert_called_once_with(['test_user_41', 'unknown', 'test_user_45'])
+        assert result['username'].tolist() == ['test_user_41', 'test_user_0', 'test_user_45']
+        assert result['cluster_id'].iloc[1] == clusterer.user_profiles['test_user_0']['cluster_id']
+        assert 'test_user_45' not in clusterer.user_profiles
+        
+        with patch.object(clusterer.feature_extractor, 'extract_users_features', return_value=new_users):
+            clusterer.predict_many(['test_user_45'], store=True)
+        assert 'test_user_45' in clusterer.user_profiles
+    
+    def test_cohort_profiles_cached_per_saved_model(self, sample_user_data, tmp_path, mocker):
+        """The cohort is recomputed only after the saved model changes."""
+        def clusterer_at_tmp_path():
+            clusterer = EmotionalProfileClusterer(n_clusters=4)
+            clusterer.model_path = tmp_path
+            return clusterer
+        
+        mocker.patch.object(clustering_module, '_cohort_cache', {})
+        mocker.patch.object(clustering_module, 'create_profile_clusterer', side_effect=clusterer_at_tmp_path)
+        predict = mocker.spy(EmotionalProfileClusterer, 'predict_many')
+        clusterer_at_tmp_path().fit(data=sample_user_data.iloc[:40])
+        
+        first = get_cohort_profiles()
+        assert len(get_cohort_profiles()) == len(first) == 40
+        assert predict.call_count == 1
+        
+        clusterer_at_tmp_path().fit(data=sample_user_data)
+        assert len(get_cohort_profiles()) == 50
+        assert predict.call_count == 2
+    
     def test_get_cluster_users(self, clusterer, sample_user_data):
         """Test getting users by cluster."""
         clusterer.fit(data=sample_user_data)
@@ -295,6 +413,48 @@ class TestEmotionalProfileClusterer:
         optimal_k = clusterer._find_optimal_clusters(X_scaled, max_k=6)
         
         assert 2 <= optimal_k <= 6
+        assert [r['k'] for r in clusterer.model_selection_] == [2, 3, 4, 5, 6]
+        assert all(r['fit_seconds'] >= 0 for r in clusterer.model_selection_)
+    
+    def test_find_optimal_clusters_parallel_and_pruned(self, clusterer, sample_user_data):
+        """Process-pool and pruned selection agree with the serial search."""
+        feature_cols = [col for col in sample_user_data.columns if col != 'username']
+        X_scaled = clusterer.scaler.fit_transform(sample_user_data[feature_cols].values)
+        
+        serial_k = clusterer._find_optimal_clusters(X_scaled, max_k=6, n_jobs=1)
+        serial = {r['k']: r['silhouette'] for r in clusterer.model_selection_}
+        
+        assert clusterer._find_optimal_clusters(X_scaled, max_k=6, n_jobs=2) == serial_k
+        
+        clusterer._find_optimal_clusters(X_scaled, max_k=6, prune=True, max_candidates=2)
+        scored = {r['k']: r['silhouette'] for r in clusterer.model_selection_ if r['silhouette'] is not None}
+        assert 2 <= len(scored) <= 3
+        assert all(serial[k] == pytest.approx(v) for k, v in scored.items())
+        # Only the surviving candidates pay for the full multi-init fit
+        for report in clusterer.model_selection_:
+            assert report['n_init'] == (10 if report['k'] in scored else 1)
+    
+    def test_fit_selects_serially_unless_asked(self, clusterer, sample_user_data, mocker, tmp_path):
+        """Model selection stays in-process by default; fit() forwards n_jobs/prune."""
+        clusterer.model_path = tmp_path
+        find = mocker.patch.object(clusterer, "_find_optimal_clusters", return_value=4)
+        
+        clusterer.fit(sample_user_data)
+        assert find.call_args.kwargs == {"n_jobs": 1, "prune": False}
+        
+        clusterer.fit(sample_user_data, n_jobs=4, prune=True)
+        assert find.call_args.kwargs == {"n_jobs": 4, "prune": True}
+    
+    def test_silhouette_is_sampled_for_large_populations(self, clusterer, mocker):
+        """Above the sample size, silhouette_score gets a fixed-seed sample."""
+        spy = mocker.patch("app.ml.clustering.silhouette_score", return_value=0.5)
+        clusterer.SILHOUETTE_SAMPLE_SIZE = 20
+        X = np.random.default_rng(0).normal(size=(60, 3))
+        
+        clusterer._find_optimal_clusters(X, max_k=3, n_jobs=1)
+        
+        assert spy.call_args.kwargs['sample_size'] == 20
+        assert spy.call_args.kwargs['random_state'] == clusterer.random_state
     
     def test_model_save_load(self, clusterer, sample_user_data, tmp_path):
         """Test model saving and loading."""
@@ -313,6 +473,142 @@ class TestEmotionalProfileClusterer:
         assert loaded
         assert new_clusterer.is_fitted
         assert new_clusterer.n_clusters == clusterer.n_clusters
+    
+    def test_user_profiles_saved_as_arrays_in_model_file(self, clusterer, sample_user_data, tmp_path):
+        """Assignments are stored as compact arrays in the one (atomically replaced) model file."""
+        import pickle
+        clusterer.model_path = tmp_path
+        UserProfileStore().save(tmp_path / UserProfileStore.FILENAME)  # stale side file
+        clusterer.fit(data=sample_user_data)
+        
+        with open(tmp_path / "emotional_profile_model.pkl", 'rb') as f:
+            model_data = pickle.load(f)
+        assert 'user_profiles' not in model_data
+        assert len(model_data['user_profile_arrays']['usernames']) == len(sample_user_data)
+        assert not (tmp_path / UserProfileStore.FILENAME).exists()
+        
+        loaded = EmotionalProfileClusterer(n_clusters=4)
+        loaded.model_path = tmp_path
+        assert loaded._load_model()
+        assert len(loaded.user_profiles) == len(sample_user_data)
+        for username in sample_user_data['username']:
+            assert loaded.user_profiles[username] == clusterer.user_profiles[username]
+        for cluster_id in range(clusterer.n_clusters):
+            assert sorted(loaded.get_cluster_users(cluster_id)) == sorted(clusterer.get_cluster_users(cluster_id))
+    
+    def test_load_migrates_legacy_pickled_profiles(self, clusterer, sample_user_data, tmp_path):
+        """Models that still pickle a user_profiles dict load into the store."""
+        import pickle
+        clusterer.model_path = tmp_path
+        clusterer.fit(data=sample_user_data)
+        model_file = tmp_path / "emotional_profile_model.pkl"
+        with open(model_file, 'rb') as f:
+            model_data = pickle.load(f)
+        del model_data['user_profile_arrays']
+        model_data['user_profiles'] = {
+            'legacy_user': {'cluster_id': 2, 'profile': EMOTIONAL_PROFILES[2],
+                            'assigned_at': '2024-01-01T00:00:00'}
+        }
+        with open(model_file, 'wb') as f:
+            pickle.dump(model_data, f)
+        
+        loaded = EmotionalProfileClusterer(n_clusters=4)
+        loaded.model_path = tmp_path
+        assert loaded._load_model()
+        assert loaded.get_cluster_users(2) == ['legacy_user']
+        profile = loaded.get_user_profile('legacy_user')
+        assert profile['profile_name'] == EMOTIONAL_PROFILES[2]['name']
+        assert profile['confidence'] == 1.0
+    
+    def test_load_reads_legacy_profile_side_file(self, clusterer, sample_user_data, tmp_path):
+        """Models saved with assignments in a separate .npz still load them."""
+        import pickle
+        clusterer.model_path = tmp_path
+        clusterer.fit(data=sample_user_data)
+        model_file = tmp_path / "emotional_profile_model.pkl"
+        with open(model_file, 'rb') as f:
+            model_data = pickle.load(f)
+        del model_data['user_profile_arrays']
+        with open(model_file, 'wb') as f:
+            pickle.dump(model_data, f)
+        clusterer.user_profiles.save(tmp_path / UserProfileStore.FILENAME)
+        
+        loaded = EmotionalProfileClusterer(n_clusters=4)
+        loaded.model_path = tmp_path
+        assert loaded._load_model()
+        assert sorted(loaded.user_profiles) == sorted(sample_user_data['username'])
+    
+    def test_partial_fit_assigns_new_users_without_refit(self, sample_user_data, tmp_path):
+        """Similar new users are assigned incrementally without a full refit."""
+        # A 50-user population moves noticeably per user, so loosen the thresholds
+        clusterer = EmotionalProfileClusterer(n_clusters=4, centroid_shift_threshold=1.0,
+                                              inertia_increase_threshold=1.0)
+        clusterer.model_path = tmp_path
+        clusterer.fit(data=sample_user_data.iloc[:45])
+        
+        batch = sample_user_data.iloc[45:].copy()
+        batch['username'] = [f'new_user_{i}' for i in range(len(batch))]
+        with patch.object(clusterer, 'fit', wraps=clusterer.fit) as full_fit:
+            result = clusterer.partial_fit(data=batch)
+        
+        full_fit.assert_not_called()
+        assert result['refit'] is False
+        assert result['drift']['centroid_shift'] < clusterer.centroid_shift_threshold
+        for username, label in zip(result['usernames'], result['labels']):
+            assert clusterer.user_profiles[username]['cluster_id'] == label
+            assert 0 <= label < clusterer.n_clusters
+    
+    def test_partial_fit_refits_on_drift(self, clusterer, sample_user_data, tmp_path):
+        """A batch far from every centroid triggers a full refit."""
+        clusterer.model_path = tmp_path
+        clusterer.fit(data=sample_user_data)
+        
+        outliers = sample_user_data.iloc[:5].copy()
+        outliers['username'] = [f'outlier_{i}' for i in range(5)]
+        outliers['avg_total_score'] = 10_000.0
+        centers = clusterer.cluster_centers_.copy()
+        with patch.object(clusterer.feature_extractor, 'extract_all_users_features',
+                          return_value=sample_user_data), \
+                patch.object(clusterer, 'fit', return_value={'error': 'stopped'}) as full_fit:
+            result = clusterer.partial_fit(data=outliers)
+        
+        refit_data = full_fit.call_args.kwargs['data']
+        assert len(refit_data) == 55
+        assert set(outliers['username']) <= set(refit_data['username'])
+        assert result['refit'] is True
+        # Drift was measured on copies: the model is untouched when the refit fails
+        np.testing.assert_array_equal(clusterer.cluster_centers_, centers)
+    
+    def test_partial_fit_refit_keeps_batch_not_in_database(self, clusterer, sample_user_data, tmp_path):
+        """A batch that is only in memory survives the refit and gets labels."""
+        clusterer.model_path = tmp_path
+        clusterer.fit(data=sample_user_data)
+        
+        outliers = sample_user_data.iloc[:5].copy()
+        outliers['username'] = [f'outlier_{i}' for i in range(5)]
+        outliers['avg_total_score'] = 10_000.0
+        with patch.object(clusterer.feature_extractor, 'extract_all_users_features',
+                          return_value=pd.DataFrame()):
+            result = clusterer.partial_fit(data=outliers)
+        
+        assert result['refit'] is True
+        assert result['usernames'] == outliers['username'].tolist()
+        for username, label in zip(result['usernames'], result['labels']):
+            assert clusterer.user_profiles[username]['cluster_id'] == label
+    
+    def test_hierarchical_is_sampled_above_population_cap(self, sample_user_data, tmp_path):
+        """Agglomerative clustering only sees hierarchical_max_users rows."""
+        clusterer = EmotionalProfileClusterer(n_clusters=4, hierarchical_max_users=20)
+        clusterer.model_path = tmp_path
+        results = clusterer.fit(data=sample_user_data)
+        
+        assert len(results['labels']) == len(sample_user_data)
+        assert clusterer.hierarchical.labels_.shape == (20,)
+        
+        skipping = EmotionalProfileClusterer(n_clusters=4, hierarchical_max_users=0)
+        skipping.model_path = tmp_path
+        skipping.fit(data=sample_user_data)
+        assert skipping.hierarchical is None
 
 
 # ==============================================================================
@@ -482,6 +778,47 @@ class TestIntegration:
         assert labels1 == labels2
 
 
+# ==============================================================================
+# USER PROFILE STORE TESTS
+# ==============================================================================
+
+class TestUserProfileStore:
+    """Tests for the compact assignment store."""
+    
+    def test_assign_update_and_delete(self):
+        store = UserProfileStore()
+        store.assign_many(['a', 'b', 'c'], [0, 1, 0], [0.5, 0.75, 1.0],
+                          assigned_at='2024-01-01T00:00:00')
+        store['b'] = {'cluster_id': 3, 'confidence': 0.25, 'predicted_at': '2024-02-01T00:00:00'}
+        
+        assert len(store) == 3
+        assert store['b'] == {
+            'username': 'b', 'cluster_id': 3, 'profile_name': EMOTIONAL_PROFILES[3]['name'],
+            'profile': EMOTIONAL_PROFILES[3], 'confidence': 0.25,
+            'assigned_at': '2024-02-01T00:00:00.000000'
+        }
+        assert sorted(store.users_in_cluster(0)) == ['a', 'c']
+        assert store.users_in_cluster(1) == []
+        
+        del store['a']
+        assert 'a' not in store
+        assert sorted(store) == ['b', 'c']
+        assert store.users_in_cluster(0) == ['c']
+        assert store.cluster_sizes(4).tolist() == [1, 0, 0, 1]
+    
+    def test_save_load_round_trip(self, tmp_path):
+        store = UserProfileStore()
+        usernames = [f'user_{i}' for i in range(200)]
+        store.assign_many(usernames, np.arange(200) % 4, np.linspace(0, 1, 200))
+        path = tmp_path / UserProfileStore.FILENAME
+        store.save(path)
+        
+        loaded = UserProfileStore.load(path)
+        assert list(loaded) == usernames
+        assert all(loaded[u] == store[u] for u in usernames)
+        assert sorted(loaded.users_in_cluster(1)) == sorted(usernames[1::4])
+
+
 # ==============================================================================
 # RUN TESTS
 # ==============================================================================
@@ -0,0 +1,163 @@
+import os
+
+import pytest
+from app.config import EXAM_CONFIG
+from app.db_pool import ConnectionPool
+from app.services.exam_service import ExamSession
+
+QUESTIONS = [
+    (1, "I feel happy often.", None, 10, 100),
+    (2, "I get angry easily.", None, 10, 100),
+    (3, "I sleep well.", None, 10, 100),
+]
+
+
+@pytest.fixture
+def exam_db(tmp_path, monkeypatch):
+    """Raw sqlite database with the tables ExamSession writes to"""
+    pool = ConnectionPool(str(tmp_path / "exam.db"))
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE)")
+        conn.execute("""
+            CREATE TABLE scores (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, age INTEGER,
+                total_score INTEGER, sentiment_score REAL, reflection_text TEXT,
+                is_rushed BOOLEAN, is_inconsistent BOOLEAN, timestamp TEXT,
+                detailed_age_group TEXT, user_id INTEGER)
+        """)
+        conn.execute("""
+            CREATE TABLE responses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, question_id INTEGER,
+                response_value INTEGER, age_group TEXT, detailed_age_group TEXT,
+                timestamp TEXT, user_id INTEGER)
+        """)
+    monkeypatch.setattr("app.services.exam_service.pooled_connection", pool.connection)
+    yield pool
+    pool.close_all()
+
+
+def count_responses(pool):
+    with pool.connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+def test_immediate_mode_writes_each_answer(exam_db):
+    session = ExamSession("alice", 25, "Adult", QUESTIONS, buffer_responses=False)
+    session.start_exam()
+    session.submit_answer(3)
+    assert count_responses(exam_db) == 1
+
+
+def test_buffered_mode_defers_until_finish(exam_db):
+    session = ExamSession("bob", 25, "Adult", QUESTIONS, buffer_responses=True, buffer_size=0)
+    session.start_exam()
+    for value in (3, 2, 4):
+        session.submit_answer(value)
+
+    assert count_responses(exam_db) == 0
+    assert session.pending_response_count == 3
+
+    assert session.finish_exam()
+    assert session.pending_response_count == 0
+    with exam_db.connection() as conn:
+        rows = conn.execute(
+            "SELECT username, question_id, response_value, age_group FROM responses ORDER BY id"
+        ).fetchall()
+    assert rows == [("bob", 1, 3, "Adult"), ("bob", 2, 2, "Adult"), ("bob", 3, 4, "Adult")]
+
+
+def test_buffer_flushes_when_full(exam_db):
+    session = ExamSession("carol", 25, "Adult", QUESTIONS, buffer_responses=True, buffer_size=2)
+    session.start_exam()
+    session.submit_answer(1)
+    assert count_responses(exam_db) == 0
+    session.submit_answer(2)
+    assert count_responses(exam_db) == 2
+    assert session.pending_response_count == 0
+
+
+def test_journal_replay_recovers_unflushed_answers(exam_db, tmp_path):
+    journal = tmp_path / "journal.jsonl"
+    session = ExamSession("dave", 25, "Adult", QUESTIONS, buffer_responses=True,
+                          buffer_size=0, journal_path=str(journal))
+    session.start_exam()
+    session.submit_answer(4)
+    session.submit_answer(1)
+    assert journal.exists()
+
+    # Simulate a crash: the session is gone, only the journal remains
+    del session
+    assert ExamSession.replay_journal(str(journal)) == 2
+    assert count_responses(exam_db) == 2
+    assert not journal.exists()
+
+
+def test_journal_name_is_safe_and_fsync_is_throttled(exam_db, tmp_path, monkeypatch, mocker):
+    monkeypatch.setitem(EXAM_CONFIG, "response_journal_dir", str(tmp_path))
+    fsync = mocker.patch("app.services.exam_service.os.fsync")
+    session = ExamSession("../evil/na:me", 25, "Adult", QUESTIONS, buffer_responses=True, buffer_size=0)
+    assert os.path.dirname(session.journal_path) == str(tmp_path)
+    assert "evil" not in os.path.basename(session.journal_path)
+
+    session.start_exam()
+    for value in (1, 2, 3):
+        session.submit_answer(value)
+    assert fsync.call_count == 1  # Within one JOURNAL_FSYNC_INTERVAL
+    assert len(open(session.journal_path).readlines()) == 3
+
+
+def test_finalize_links_score_and_responses_in_one_transaction(exam_db):
+    with exam_db.connection() as conn:
+        user_id = conn.execute("INSERT INTO users (username) VALUES ('erin')").lastrowid
+
+    session = ExamSession("erin", 30, "Adult", QUESTIONS, buffer_responses=True, buffer_size=0)
+    session.start_exam()
+    for value in (2, 3, 4):
+        session.submit_answer(value)
+
+    score_id = session.finalize()
+
+    assert session.score_id == score_id
+    with exam_db.connection() as conn:
+        score_row = conn.execute(
+            "SELECT total_score, user_id FROM scores WHERE id = ?", (score_id,)
+        ).fetchone()
+        linked = conn.execute(
+            "SELECT COUNT(*) FROM responses WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+    assert score_row == (9, user_id)
+    assert linked == 3
+
+
+def test_finalize_links_responses_written_before_user_existed(exam_db):
+    session = ExamSession("frank", 30, "Adult", QUESTIONS, buffer_responses=False)
+    session.start_exam()
+    session.submit_answer(1)
+
+    with exam_db.connection() as conn:
+        user_id = conn.execute("INSERT INTO users (username) VALUES ('frank')").lastrowid
+
+    session.finalize()
+    with exam_db.connection() as conn:
+        assert conn.execute("SELECT user_id FROM responses").fetchone()[0] == user_id
+
+
+def test_persist_links_only_this_sessions_responses(exam_db):
+    with exam_db.connection() as conn:
+        # Another, unfinished session of the same user from the recorded window
+        conn.execute("INSERT INTO responses (username, question_id, response_value, timestamp) "
+                     "VALUES ('grace', 1, 2, '2024-05-01T09:30:00')")
+        user_id = conn.execute("INSERT INTO users (username) VALUES ('grace')").lastrowid
+
+    flushed = ExamSession("grace", 30, "Adult", QUESTIONS, buffer_responses=True, buffer_size=2)
+    flushed.start_exam()
+    for value in (2, 3, 4):
+        flushed.submit_answer(value)
+    with exam_db.connection() as conn:
+        conn.execute("UPDATE responses SET user_id = NULL")  # As if written before the user row
+        flushed.persist(conn, timestamp="2024-05-01T09:00:00")
+
+    with exam_db.connection() as conn:
+        rows = conn.execute("SELECT timestamp, user_id FROM responses ORDER BY id").fetchall()
+    assert rows[0] == ("2024-05-01T09:30:00", None)
+    assert [row[1] for row in rows[1:]] == [user_id] * 3
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import MagicMock
 import sys
+import numpy as np
 
 # Mock modules to avoid loading heavy dependencies or missing files
 # This is a "smoke test" to ensure the class structure is reachable
@@ -87,3 +88,141 @@ def test_predict_smoke(mocker):
     
     features, _ = predictor.prepare_features([3,3,3,3,3], 25, 15)
     assert features.shape == (1, 9)
+
+def test_lazy_predictor_defers_loading_and_never_trains(mocker):
+    """Lazy mode does no work in __init__ and raises instead of training"""
+    mocker.patch("app.ml.predictor.create_versioning_manager", return_value=MagicMock())
+    load = mocker.patch.object(SoulSenseMLPredictor, "load_model", side_effect=FileNotFoundError("missing"))
+    train = mocker.patch.object(SoulSenseMLPredictor, "train_sample_model")
+
+    predictor = SoulSenseMLPredictor(use_versioning=False, lazy=True)
+    assert not predictor.is_loaded
+    load.assert_not_called()
+
+    from app.exceptions import ResourceError
+    with pytest.raises(ResourceError):
+        predictor.predict_with_explanation([3, 3, 3, 3, 3], 25, 15)
+    load.assert_called_once()
+    train.assert_not_called()
+
+def test_lazy_predictor_loads_on_first_predict(mocker):
+    """The artifact is loaded once, on the first prediction"""
+    mocker.patch("app.ml.predictor.create_versioning_manager", return_value=MagicMock())
+    predictor = SoulSenseMLPredictor(use_versioning=False, lazy=True)
+
+    mock_model = MagicMock()
+    mock_model.predict.return_value = np.array([1])
+    mock_model.predict_proba.return_value = np.array([[0.1, 0.8, 0.1]])
+    mock_model.feature_importances_ = np.full(9, 1 / 9)
+    mock_scaler = MagicMock()
+    mock_scaler.transform.side_effect = lambda X: X
+
+    def fake_load(version=None):
+        predictor.model = mock_model
+        predictor.scaler = mock_scaler
+    load = mocker.patch.object(predictor, "load_model", side_effect=fake_load)
+
+    result = predictor.predict_with_explanation([3, 3, 3, 3, 3], 25, 15)
+    predictor.predict_with_explanation([3, 3, 3, 3, 3], 25, 15)
+
+    assert result["prediction"] == 1
+    load.assert_called_once()
+
+def test_predict_batch_matches_single_predictions(mocker):
+    """predict_batch gives the same predictions/importance as per-user calls"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    mocker.patch("app.ml.predictor.create_versioning_manager", return_value=MagicMock())
+    predictor = SoulSenseMLPredictor(use_versioning=False, lazy=True)
+
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 5, size=(60, 9))
+    y = np.arange(60) % 3
+    predictor.scaler = StandardScaler().fit(X)
+    predictor.model = RandomForestClassifier(n_estimators=5, random_state=0).fit(predictor.scaler.transform(X), y)
+
+    q = rng.integers(0, 6, size=(20, 5)).astype(float)
+    q[3, 2:] = np.nan          # ragged row: only two answers
+    ages = rng.integers(10, 70, size=20)
+    totals = rng.integers(0, 125, size=20)
+    sentiments = rng.uniform(-100, 100, size=20)
+
+    batch = predictor.predict_batch(q, ages, totals, sentiments)
+    assert batch.shape == (20,)
+
+    for i in range(20):
+        answers = [int(v) for v in q[i] if not np.isnan(v)]
+        single = predictor.predict_with_explanation(answers, int(ages[i]), int(totals[i]), float(sentiments[i]))
+        assert batch["prediction"][i] == single["prediction"]
+        assert batch["probabilities"][i].tolist() == pytest.approx(single["probabilities"])
+        for name, value in single["feature_importance"].items():
+            col = predictor.feature_names.index(name)
+            assert batch["feature_importance"][i, col] == pytest.approx(value)
+
+def test_predictions_use_model_classes(mocker):
+    """A model trained without a class maps argmax columns through classes_"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    mocker.patch("app.ml.predictor.create_versioning_manager", return_value=MagicMock())
+    predictor = SoulSenseMLPredictor(use_versioning=False, lazy=True)
+
+    rng = np.random.default_rng(1)
+    X = rng.uniform(0, 5, size=(40, 9))
+    y = np.where(X[:, 0] > 2.5, 2, 0)  # No 'Moderate Risk' examples
+    predictor.scaler = StandardScaler().fit(X)
+    predictor.model = RandomForestClassifier(n_estimators=5, random_state=0).fit(predictor.scaler.transform(X), y)
+
+    result = predictor._predict_matrix(X)
+    expected = predictor.model.predict(predictor.scaler.transform(X))
+    assert result["prediction"].tolist() == expected.tolist()
+    assert set(result["prediction"].tolist()) == {0, 2}
+    assert result["probabilities"].shape == (40, 3)
+    assert np.all(result["probabilities"][:, 1] == 0)
+    rows = np.arange(40)
+    assert np.array_equal(result["probabilities"][rows, result["prediction"]], result["confidence"])
+
+def test_compiled_forest_matches_sklearn_exactly(tmp_path):
+    """The flattened NumPy evaluator reproduces sklearn's predict_proba bit-for-bit"""
+    from sklearn.ensemble import RandomForestClassifier
+    from app.ml.synthetic_data import generate_synthetic_data
+    from app.ml.versioning import CompiledTreeEnsemble, ModelRegistry, compile_tree_ensemble
+
+    X, y = generate_synthetic_data(n_samples=2000, seed=0)
+    model = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(X[:1500], y[:1500])
+
+    compiled = compile_tree_ensemble(model)
+    X_test = X[1500:]
+    assert np.array_equal(compiled.predict_proba(X_test), model.predict_proba(X_test))
+    assert np.array_equal(compiled.predict(X_test), model.predict(X_test))
+    assert compile_tree_ensemble(MagicMock()) is None
+
+    registry = ModelRegistry(str(tmp_path))
+    registry.register_model(model, "forest")
+    loaded = registry.get_compiled_model("forest")
+    assert isinstance(loaded, CompiledTreeEnsemble)
+    assert np.array_equal(loaded.predict_proba(X_test[:1]), model.predict_proba(X_test[:1]))
+
+def test_lazy_predictor_defers_versioning_setup(mocker):
+    """The registry is opened by ensure_loaded(), not by __init__"""
+    create = mocker.patch("app.ml.predictor.create_versioning_manager", return_value=MagicMock())
+    predictor = SoulSenseMLPredictor(use_versioning=True, lazy=True)
+    create.assert_not_called()
+
+    mocker.patch.object(predictor, "load_model", side_effect=lambda version=None: predictor.versioning_manager)
+    predictor.ensure_loaded()
+    create.assert_called_once()
+
+def test_lazy_risk_predictor_loads_on_first_predict(mocker, tmp_path):
+    """RiskPredictor(lazy=True) reads the models directory on the first prediction only"""
+    from app.ml.risk_predictor import RiskPredictor
+    load = mocker.patch.object(RiskPredictor, "load_latest_model")
+
+    predictor = RiskPredictor(models_dir=str(tmp_path), lazy=True)
+    load.assert_not_called()
+
+    result = predictor.predict_with_explanation([3, 3, 3, 3, 3], 25, 30)
+    predictor.predict(30, 0.0, 25)
+    load.assert_called_once()
+    assert result["prediction_label"] == "Medium Risk (Rule)"
@@ -16,6 +16,8 @@ from pathlib import Path
 from unittest.mock import MagicMock
 from datetime import datetime, timezone
 
+import joblib
+
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -26,7 +28,8 @@ from app.ml.versioning import (
     ModelVersioningManager,
     ModelMetadata,
     ExperimentRecord,
-    create_versioning_manager
+    create_versioning_manager,
+    clear_model_cache
 )
 
 
@@ -245,6 +248,126 @@ class TestModelRegistry:
         with pytest.raises(ValueError):
             temp_registry.delete_version("test_model", "1.0.0")
 
+    
+    def test_get_model_is_cached(self, temp_registry, mock_model, mocker):
+        """Repeated loads of one version are served from the in-process cache"""
+        clear_model_cache()
+        temp_registry.register_model(model=mock_model, name="cached_model")
+        load = mocker.spy(joblib, "load")
+        
+        first, _ = temp_registry.get_model("cached_model")
+        second, _ = ModelRegistry(str(temp_registry.registry_path)).get_model("cached_model")
+        
+        assert load.call_count == 1
+        assert first["model"] is second["model"]
+    
+    def test_get_model_verifies_hash(self, temp_registry, mock_model):
+        """A tampered artifact is rejected when hash verification is on"""
+        clear_model_cache()
+        temp_registry.register_model(model=mock_model, name="hashed_model")
+        model_file = temp_registry.models_path / "hashed_model" / "1.0.0" / "model.pkl"
+        model_file.write_bytes(model_file.read_bytes() + b"tampered")
+        
+        verifying = ModelRegistry(str(temp_registry.registry_path), verify_hash=True)
+        with pytest.raises(ValueError):
+            verifying.get_model("hashed_model")
+
+
+    def test_unverified_cache_entry_is_not_served_to_verifying_registry(self, temp_registry, mock_model, mocker):
+        """Hash checks are not bypassed by an earlier unverified load; mmap_mode is part of the key"""
+        clear_model_cache()
+        temp_registry.register_model(model=mock_model, name="shared_model")
+        temp_registry.get_model("shared_model")
+        
+        load = mocker.spy(joblib, "load")
+        in_memory = ModelRegistry(str(temp_registry.registry_path), mmap_mode=None)
+        in_memory.get_model("shared_model")
+        assert load.call_count == 1
+        assert load.call_args.kwargs["mmap_mode"] is None
+        
+        model_file = temp_registry.models_path / "shared_model" / "1.0.0" / "model.pkl"
+        model_file.write_bytes(model_file.read_bytes() + b"tampered")
+        verifying = ModelRegistry(str(temp_registry.registry_path), verify_hash=True)
+        with pytest.raises(ValueError):
+            verifying.get_model("shared_model")
+    
+    def test_concurrent_registrations_get_distinct_versions(self, temp_registry):
+        """Parallel writers serialize on the store instead of clobbering each other"""
+        from concurrent.futures import ProcessPoolExecutor
+        path = str(temp_registry.registry_path)
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            versions = list(executor.map(_register_in_process, [path] * 8))
+        
+        assert sorted(versions, key=SemanticVersion) == [f"1.0.{i}" for i in range(8)]
+        assert len(ModelRegistry(path).list_versions("parallel_model")) == 8
+    
+    def test_artifact_is_written_outside_the_write_transaction(self, temp_registry, mock_model, mocker):
+        """Another writer can commit while an artifact is being dumped"""
+        real_dump = joblib.dump
+        
+        def dump_while_writing(data, path, *args, **kwargs):
+            with temp_registry.store.write_transaction():
+                pass
+            # The in-progress version is reserved, so the next one is skipped ahead
+            assert temp_registry._get_next_version("m") == "1.0.1"
+            return real_dump(data, path, *args, **kwargs)
+        mocker.patch("app.ml.versioning.joblib.dump", side_effect=dump_while_writing)
+        
+        assert temp_registry.register_model(model=mock_model, name="m").version == "1.0.0"
+    
+    def test_failed_registration_releases_its_version(self, temp_registry, mock_model, mocker):
+        """A version whose artifact could not be written is reused by the next registration"""
+        mocker.patch("app.ml.versioning.joblib.dump", side_effect=OSError("disk full"))
+        with pytest.raises(OSError):
+            temp_registry.register_model(model=mock_model, name="m")
+        assert not (temp_registry.models_path / "m" / "1.0.0").exists()
+        mocker.stopall()
+        
+        assert temp_registry.register_model(model=mock_model, name="m").version == "1.0.0"
+    
+    def test_registry_snapshot_is_rebuilt_only_after_writes(self, temp_registry, mock_model):
+        """Repeated reads share one snapshot; a write (from any registry) invalidates it"""
+        temp_registry.register_model(model=mock_model, name="m")
+        first = temp_registry.registry
+        assert temp_registry.registry is first
+        
+        ModelRegistry(str(temp_registry.registry_path)).register_model(model=mock_model, name="m")
+        assert list(temp_registry.registry["models"]["m"]["versions"]) == ["1.0.0", "1.0.1"]
+    
+    def test_promote_is_exclusive_and_tags_are_indexed(self, temp_registry, mock_model):
+        """Only one production version exists; tag lookups hit the store"""
+        temp_registry.register_model(model=mock_model, name="m", tags=["baseline"])
+        temp_registry.register_model(model=mock_model, name="m", tags=["candidate"])
+        temp_registry.promote_to_production("m", "1.0.0")
+        temp_registry.rollback("m", "1.0.1")
+        
+        production = [v["version"] for v in temp_registry.list_versions("m") if v["is_production"]]
+        assert production == ["1.0.1"]
+        assert temp_registry.registry["production_model"] == "m:1.0.1"
+        assert temp_registry.find_by_tag("candidate") == [("m", "1.0.1")]
+    
+    def test_migrates_legacy_registry_json(self, temp_registry, mock_model):
+        """An existing registry.json is imported into the store on first open"""
+        import json
+        temp_registry.register_model(model=mock_model, name="legacy")
+        legacy = temp_registry.registry
+        
+        new_root = Path(tempfile.mkdtemp()) / "registry"
+        new_root.mkdir(parents=True)
+        (new_root / "registry.json").write_text(json.dumps(legacy))
+        
+        migrated = ModelRegistry(str(new_root))
+        assert [v["version"] for v in migrated.list_versions("legacy")] == ["1.0.0"]
+        shutil.rmtree(new_root.parent)
+
+
+def _register_in_process(registry_path):
+    """Worker for the multi-process registration test"""
+    metadata = ModelRegistry(registry_path).register_model(
+        model=PickleableMockModel(), name="parallel_model"
+    )
+    return metadata.version
+
 
 class TestExperimentTracker:
     """Tests for ExperimentTracker class"""
@@ -354,6 +477,20 @@ class TestExperimentTracker:
         best = temp_tracker.get_best_experiment("accuracy", maximize=True)
         
         assert best["experiment_id"] == exp2
+    
+    def test_best_experiment_tie_survives_updates(self, temp_tracker):
+        """Updating a record does not move it behind later experiments"""
+        exp1 = temp_tracker.start_experiment(name="exp1")
+        exp2 = temp_tracker.start_experiment(name="exp2")
+        temp_tracker.log_metrics(exp1, {"accuracy": 0.9})
+        temp_tracker.log_metrics(exp2, {"accuracy": 0.9})
+        temp_tracker.complete_experiment(exp2)
+        temp_tracker.complete_experiment(exp1)
+        
+        best = temp_tracker.get_best_experiment("accuracy", maximize=True)
+        
+        assert best["experiment_id"] == exp1
+        assert list(temp_tracker.store.snapshot()["experiments"]) == [exp1, exp2]
 
 
 class TestModelVersioningManager:
@@ -3,6 +3,7 @@
 import pytest
 import numpy as np
 from app.analysis.outlier_detection import OutlierDetector
+from app.analysis.streaming_stats import P2Quantile, RunningStats, ScoreStatistics
 from app.db import get_session
 from app.models import Score, User, Base
 from datetime import datetime
@@ -156,6 +157,32 @@ class TestOutlierDetector:
     
     # ==================== STATISTICAL PROPERTIES TESTS ====================
     
+    def test_ensemble_matches_individual_methods(self, detector, sample_scores):
+        """Fused ensemble reproduces the separate detectors exactly"""
+        result = detector.detect_outliers_ensemble(sample_scores)
+        
+        assert result["individual_results"] == {
+            "zscore": detector.detect_outliers_zscore(sample_scores),
+            "iqr": detector.detect_outliers_iqr(sample_scores),
+            "modified_zscore": detector.detect_outliers_modified_zscore(sample_scores),
+            "mad": detector.detect_outliers_mad(sample_scores)
+        }
+        votes = np.zeros(len(sample_scores))
+        for method_result in result["individual_results"].values():
+            votes[method_result["indices"]] += 1
+        assert result["votes"] == votes.tolist()
+    
+    def test_ensemble_2d_groups(self, detector, sample_scores, clean_scores):
+        """A NaN-padded 2-D array gives one result per row, as if called per row"""
+        groups = [sample_scores, clean_scores, [5.0]]
+        matrix = np.full((3, len(sample_scores)), np.nan)
+        for row, group in enumerate(groups):
+            matrix[row, :len(group)] = group
+        
+        results = detector.detect_outliers_ensemble(matrix)
+        
+        assert results == [detector.detect_outliers_ensemble(group) for group in groups]
+    
     def test_statistics_consistency(self, detector):
         """Test statistical calculations are consistent"""
         scores = [10, 20, 30, 40, 50]
@@ -274,6 +301,160 @@ class TestOutlierDetectorDatabase:
         assert "time_window_days" in result
         assert "coefficient_of_variation" in result
 
+    
+    def test_detect_outliers_global_streams_arrays(self, db_session, test_user_with_scores, monkeypatch):
+        """Global detection reads score arrays in chunks and fetches details only for outliers."""
+        monkeypatch.setattr("app.analysis.outlier_detection.SCORE_CHUNK_SIZE", 3)
+        detector = OutlierDetector()
+        
+        result = detector.detect_outliers_global(db_session, method="zscore")
+        
+        assert result["total_scores"] == 8
+        assert result["outlier_count"] == 1
+        detail = result["outlier_details"][0]
+        assert detail["score_value"] == 100
+        assert detail["username"] == "test_user_outlier"
+        assert detail["age_group"] == "18-25"
+        assert result["statistics"]["max_score"] == 100
+        
+        by_group = detector.detect_outliers_by_age_group(db_session, "18-25", method="zscore")
+        assert [d["score_id"] for d in by_group["outlier_details"]] == [detail["score_id"]]
+    
+    def test_detect_outliers_all_age_groups(self, db_session, test_user_with_scores):
+        """All age groups are checked in one call, with outliers mapped to score ids."""
+        for value in [40, 41, 42, 39]:
+            db_session.add(Score(username="older", total_score=value, detailed_age_group="26-35"))
+        db_session.commit()
+        
+        report = OutlierDetector().detect_outliers_all_age_groups(db_session)
+        
+        assert set(report) == {"18-25", "26-35"}
+        assert report["18-25"]["total_scores"] == 8
+        assert report["26-35"]["outlier_count"] == 0
+        outlier_id = report["18-25"]["outlier_score_ids"][0]
+        assert db_session.get(Score, outlier_id).total_score == 100
+    
+    def test_statistical_summary_matches_numpy(self, db_session, test_user_with_scores):
+        """Summary statistics are computed from the streamed array."""
+        values = [20, 22, 21, 23, 22, 100, 21, 23]
+        summary = OutlierDetector().get_statistical_summary(db_session, age_group="18-25")
+        
+        assert summary["count"] == len(values)
+        assert summary["median"] == np.median(values)
+        assert summary["iqr"] == pytest.approx(np.percentile(values, 75) - np.percentile(values, 25))
+        assert OutlierDetector().get_statistical_summary(db_session, age_group="65+") == {"error": "No scores found"}
+    
+    def test_streaming_statistics_catch_up(self, db_session, test_user_with_scores):
+        """Scopes load once, then fold in only newer scores."""
+        statistics = ScoreStatistics()
+        user_stats = statistics.for_user(db_session, "test_user_outlier")
+        values = [20, 22, 21, 23, 22, 100, 21, 23]
+        assert user_stats.count == len(values)
+        assert user_stats.mean == pytest.approx(np.mean(values))
+        assert user_stats.std_dev == pytest.approx(np.std(values))
+        assert user_stats.last == 23
+        
+        db_session.add(Score(username="other_user", total_score=30, detailed_age_group="18-25"))
+        db_session.add(Score(username="test_user_outlier", total_score=24, detailed_age_group="18-25"))
+        db_session.commit()
+        
+        assert statistics.for_user(db_session, "test_user_outlier") is user_stats
+        assert user_stats.count == len(values) + 1
+        assert user_stats.last == 24
+        assert statistics.for_age_group(db_session, "18-25").count == len(values) + 2
+        assert statistics.global_stats(db_session).max == 100
+    
+    def test_streaming_statistics_evict_and_invalidate(self, db_session, test_user_with_scores):
+        """Scopes beyond max_scopes are dropped; invalidate() forces a reload."""
+        statistics = ScoreStatistics(max_scopes=2)
+        user_stats = statistics.for_user(db_session, "test_user_outlier")
+        statistics.global_stats(db_session)
+        statistics.for_user(db_session, "other_user")
+        
+        reloaded = statistics.for_user(db_session, "test_user_outlier")
+        assert reloaded is not user_stats
+        assert reloaded.count == user_stats.count
+        
+        score = db_session.query(Score).filter_by(username="test_user_outlier", total_score=100).one()
+        score.total_score = 22
+        db_session.commit()
+        assert statistics.for_user(db_session, "test_user_outlier").max == 100
+        
+        statistics.invalidate("user", "test_user_outlier")
+        assert statistics.for_user(db_session, "test_user_outlier").max == 23
+    
+    def test_check_new_score_flags_outlier(self, db_session, test_user_with_scores):
+        """A far-off new score is flagged against the user's running statistics."""
+        detector = OutlierDetector(statistics=ScoreStatistics())
+        
+        result = detector.check_new_score(db_session, 500, username="test_user_outlier",
+                                          age_group="18-25")
+        
+        assert set(result) == {"global", "age_group", "user"}
+        assert result["user"]["checks"]["zscore"]["is_outlier"]
+        assert not detector.check_new_score(db_session, 22, username="test_user_outlier")["user"]["is_outlier"]
+    
+    def test_validate_user_score_uses_running_statistics(self, db_session, test_user_with_scores, monkeypatch):
+        """validate_user_score matches the list-based z-score and change checks."""
+        from app.ml.score_analyzer import ScoreAnalyzer
+        monkeypatch.setattr("app.ml.score_analyzer.get_session", lambda: db_session)
+        analyzer = ScoreAnalyzer()
+        analyzer.detector = OutlierDetector(statistics=ScoreStatistics())
+        values = [20, 22, 21, 23, 22, 100, 21, 23]
+        
+        result = analyzer.validate_user_score("test_user_outlier", 400, 25, "18-25")
+        
+        expected = analyzer.detector.detect_outliers_zscore(values + [400])
+        assert ("statistical_outlier" in [w["type"] for w in result["warnings"]]) == (400 in expected["outliers"])
+        assert "extreme_change" in [w["type"] for w in result["warnings"]]
+        details = result["validation_details"]
+        assert details["user_history_count"] == len(values)
+        assert details["historical_mean"] == pytest.approx(np.mean(values))
+        assert details["historical_std"] == pytest.approx(np.std(values))
+        assert details["change_from_last"] == 400 - 23
+
+
+class TestStreamingStatistics:
+    """Test the running statistics used for O(1) score checks"""
+    
+    def test_welford_matches_numpy(self):
+        values = np.random.default_rng(0).normal(25, 5, 1000)
+        stats = RunningStats()
+        for v in values:
+            stats.add(v)
+        
+        assert stats.mean == pytest.approx(np.mean(values))
+        assert stats.variance == pytest.approx(np.var(values))
+        assert stats.average_change == pytest.approx(np.mean(np.abs(np.diff(values))))
+        assert (stats.min, stats.max) == (values.min(), values.max())
+    
+    def test_p2_quantiles_approximate_percentiles(self):
+        values = np.random.default_rng(1).normal(50, 10, 20000)
+        stats = RunningStats()
+        for v in values:
+            stats.add(v)
+        
+        assert stats.q1 == pytest.approx(np.percentile(values, 25), abs=0.5)
+        assert stats.median == pytest.approx(np.median(values), abs=0.5)
+        assert stats.q3 == pytest.approx(np.percentile(values, 75), abs=0.5)
+        true_mad = np.median(np.abs(values - np.median(values)))
+        assert stats.mad == pytest.approx(true_mad, rel=0.05)
+    
+    def test_p2_exact_for_small_samples(self):
+        estimate = P2Quantile(0.25)
+        for v in [5, 1, 3]:
+            estimate.add(v)
+        assert estimate.value == np.percentile([5, 1, 3], 25)
+    
+    def test_with_value_leaves_original_unchanged(self):
+        stats = RunningStats()
+        for v in [1, 2, 3]:
+            stats.add(v)
+        extended = stats.with_value(10)
+        
+        assert stats.count == 3 and extended.count == 4
+        assert extended.mean == pytest.approx(4.0)
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
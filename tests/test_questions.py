@@ -1,3 +1,7 @@
+import os
+
+import pytest
+
 from app.questions import load_questions
 from app.db import get_session
 from app.models import Question
@@ -31,3 +35,150 @@ def test_load_questions_age_filter(temp_db):
     adult_qs = load_questions(age=30)
     assert len(adult_qs) == 1
     assert adult_qs[0][1] == "Adult question"
+
+def test_questions_without_age_range_are_skipped(temp_db):
+    from sqlalchemy import text
+    session = get_session()
+    session.add(Question(question_text="Adult question", is_active=1, min_age=20, max_age=80))
+    session.execute(text(
+        "INSERT INTO question_bank (question_text, is_active, min_age, max_age) "
+        "VALUES ('No minimum', 1, NULL, 80), ('No maximum', 1, 20, NULL)"
+    ))
+    session.commit()
+    session.close()
+
+    assert [q[1] for q in load_questions(age=30)] == ["Adult question"]
+    assert [q[1] for q in load_questions()] == ["Adult question"]
+
+def test_question_edit_invalidates_cache(temp_db, mocker):
+    from app import questions as questions_module
+    session = get_session()
+    q = Question(question_text="Original?", is_active=1, min_age=20, max_age=80)
+    session.add(q)
+    session.commit()
+
+    assert load_questions(age=30)[0][1] == "Original?"
+    query = mocker.spy(questions_module, "_query_questions")
+    assert load_questions(age=30)[0][1] == "Original?"
+    assert query.call_count == 0  # memory hit, still valid
+
+    q.question_text = "Edited?"
+    session.commit()
+    session.close()
+
+    rows = load_questions(age=30)
+    assert query.call_count == 1
+    assert rows == [(rows[0][0], "Edited?", None, 20, 80)]
+
+def test_disk_cache_is_stamped_with_generation(temp_db, mocker, tmp_path):
+    from app import questions as questions_module
+    mocker.patch.object(questions_module, "CACHE_DIR", str(tmp_path))
+    session = get_session()
+    session.add(Question(question_text="Disk question", is_active=1, min_age=0, max_age=120))
+    session.commit()
+
+    stamp = questions_module.get_question_generation()
+    rows = questions_module._query_questions()
+    assert questions_module._save_to_disk_cache(rows, stamp)
+    questions_module._questions_cache.clear()
+
+    query = mocker.spy(questions_module, "_query_questions")
+    assert load_questions() == rows
+    assert query.call_count == 0
+
+    session.add(Question(question_text="Another", is_active=1, min_age=0, max_age=120))
+    session.commit()
+    session.close()
+    assert questions_module.get_question_generation() == (stamp[0], stamp[1] + 1)
+    assert questions_module._load_from_disk_cache(questions_module.get_question_generation()) is None
+    assert len(load_questions()) == 2
+    assert query.call_count == 1
+
+def test_disk_cache_keeps_one_file_per_generation(temp_db, mocker, tmp_path):
+    from app import questions as questions_module
+    mocker.patch.object(questions_module, "CACHE_DIR", str(tmp_path))
+    mocker.patch.object(questions_module, "_questions_cache", {})
+    session = get_session()
+    session.add(Question(question_text="First", is_active=1, min_age=0, max_age=120))
+    session.commit()
+
+    old_stamp = questions_module.get_question_generation()
+    questions_module._save_to_disk_cache(questions_module._query_questions(), old_stamp)
+    old_bank = questions_module.get_question_bank()
+    assert isinstance(old_bank.rows, questions_module.QuestionSnapshot)
+
+    session.add(Question(question_text="Second", is_active=1, min_age=0, max_age=120))
+    session.commit()
+    session.close()
+    new_stamp = questions_module.get_question_generation()
+    rows = questions_module._query_questions()
+    questions_module._save_to_disk_cache(rows, new_stamp)
+
+    # Written under a new name while the old file is still mapped
+    new_file = f"questions.{new_stamp[0]}.{new_stamp[1]}.bin"
+    assert new_file in os.listdir(tmp_path)
+    assert len(questions_module.get_question_bank()) == 2
+    # A caller still holding the replaced bank can keep using it
+    assert len(old_bank) == 1 and old_bank.sample(30, 1)[0][1] == "First"
+    questions_module.clear_all_caches()
+    assert old_bank.eligible(30)[0][1] == "First"
+    # Once dropped, its map is released and the old file can be pruned
+    del old_bank
+    questions_module._save_to_disk_cache(rows, new_stamp)
+    assert os.listdir(tmp_path) == [new_file]
+
+def test_question_bank_age_index():
+    from app.questions import QuestionBank, get_random_questions_by_age
+    rows = [
+        (1, "kids", None, 0, 12),
+        (2, "everyone", None, 0, 120),
+        (3, "teens", None, 13, 19),
+        (4, "adults", None, 18, 120),
+    ]
+    bank = QuestionBank(rows)
+
+    for age in [0, 5, 12, 13, 18, 19, 20, 65, 120, 121, -1]:
+        expected = [q for q in rows if q[3] <= age <= q[4]]
+        assert bank.eligible(age) == expected
+        assert bank.count(age) == len(expected)
+
+    picked = get_random_questions_by_age(bank, 18, 3)
+    assert sorted(q[0] for q in picked) == [2, 3, 4]
+    try:
+        bank.sample(18, 4)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+def test_question_snapshot_round_trip(tmp_path):
+    from app.question_snapshot import QuestionSnapshot, write_snapshot
+    from app.questions import QuestionBank
+    rows = [
+        (7, "Plain?", None, 0, 120),
+        (9, "Émotions — ça va?", "Astuce ✓", 13, 19),
+        (12, "", "", 18, 65),
+    ]
+    path = str(tmp_path / "questions.bin")
+    write_snapshot(path, rows, ("abc123", 42))
+
+    snapshot = QuestionSnapshot(path)
+    assert snapshot.stamp == ("abc123", 42)
+    assert list(snapshot) == rows
+    assert snapshot[-1] == rows[-1] and snapshot[1:] == rows[1:]
+    assert QuestionBank(snapshot).eligible(15) == [rows[0], rows[1]]
+    snapshot.close()
+
+    write_snapshot(path, [], ("abc123", 43))
+    empty = QuestionSnapshot(path)
+    assert len(empty) == 0 and empty.stamp == ("abc123", 43)
+    empty.close()
+
+    write_snapshot(path, rows, ("abc123", 44))
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 3)
+    with pytest.raises(ValueError):
+        QuestionSnapshot(path)
+    with open(path, "wb") as f:
+        f.write(b"{}" * 40)
+    with pytest.raises(ValueError):
+        QuestionSnapshot(path)
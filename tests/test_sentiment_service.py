@@ -0,0 +1,53 @@
+import pytest
+from app.services import sentiment_service
+
+
+class CountingAnalyzer:
+    """Stub VADER analyzer that records how often it is called"""
+    def __init__(self):
+        self.calls = 0
+
+    def polarity_scores(self, text):
+        self.calls += 1
+        return {"compound": 0.5 if "good" in text else -0.25}
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    stub = CountingAnalyzer()
+    monkeypatch.setattr(sentiment_service, "_analyzer", stub)
+    monkeypatch.setattr(sentiment_service, "_analyzer_loaded", True)
+    sentiment_service.clear_cache()
+    yield stub
+    sentiment_service.configure_cache(sentiment_service.DEFAULT_CACHE_SIZE)
+
+
+def test_score_uses_shared_analyzer_and_cache(analyzer):
+    assert sentiment_service.score("a good day") == 50.0
+    assert sentiment_service.score("  a   good\nday ") == 50.0
+    assert analyzer.calls == 1
+    assert sentiment_service.cache_info()["hits"] == 1
+
+
+def test_score_empty_text_is_neutral(analyzer):
+    assert sentiment_service.score("") == 0.0
+    assert sentiment_service.score("   ") == 0.0
+    assert analyzer.calls == 0
+
+
+def test_score_many_preserves_order_and_dedupes(analyzer):
+    texts = ["good", "bad", "", "good", None, "bad"]
+    assert sentiment_service.score_many(texts) == [50.0, -25.0, 0.0, 50.0, 0.0, -25.0]
+    assert analyzer.calls == 2
+
+
+def test_cache_is_bounded(analyzer):
+    sentiment_service.configure_cache(2)
+    sentiment_service.score_many(["good 1", "good 2", "good 3"])
+    assert sentiment_service.cache_info()["size"] == 2
+
+
+def test_keyword_fallback_matches_journal_scorer(keyword_only):
+    assert sentiment_service.score("I am happy and grateful") == pytest.approx(2 / 5 * 100)
+    assert sentiment_service.score("so sad") == pytest.approx(-50.0)
+    assert sentiment_service.keyword_score("nothing here") == 0.0
@@ -0,0 +1,77 @@
+import subprocess
+import sys
+
+import pytest
+
+from app.lazy import LazyObject, lazy_import
+from app.startup_profile import PROFILE_FLAG, StartupProfiler
+
+
+@pytest.fixture
+def profiler(mocker):
+    mocker.patch("atexit.register")
+    profiler = StartupProfiler()
+    yield profiler
+    profiler.disable()
+
+
+def test_profiler_times_new_imports_and_marks(profiler, tmp_path, monkeypatch):
+    (tmp_path / "startup_probe_outer.py").write_text("import startup_probe_inner\n")
+    (tmp_path / "startup_probe_inner.py").write_text("import time\ntime.sleep(0.02)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    assert not profiler.enable_from_argv(["app.cli"])
+    assert profiler.enable_from_argv(["app.cli", PROFILE_FLAG])
+    import startup_probe_outer  # noqa: F401
+    profiler.mark("first_frame")
+    profiler.mark("first_frame")
+    profiler.disable()
+
+    inner_self, inner_total = profiler.imports["startup_probe_inner"]
+    outer_self, outer_total = profiler.imports["startup_probe_outer"]
+    assert inner_self >= 0.015
+    assert outer_total >= inner_total
+    assert outer_self < inner_self
+    assert [label for label, _ in profiler.marks] == ["first_frame"]
+    assert "startup_probe_inner" in profiler.report()
+    assert profiler.slowest_imports(1)[0][0] == "startup_probe_inner"
+
+    for name in ("startup_probe_outer", "startup_probe_inner"):
+        sys.modules.pop(name, None)
+
+
+def test_lazy_object_builds_on_first_use():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return {"answer": 42}
+
+    lazy = LazyObject(factory, "answers")
+    assert not lazy.loaded and calls == []
+    assert lazy.get("answer") == 42
+    assert lazy and calls == [1]
+
+
+def test_lazy_import_is_falsy_when_missing():
+    missing = lazy_import("app.no_such_module", "Thing")
+    assert not missing
+    with pytest.raises(AttributeError):
+        missing.anything
+    with pytest.raises(RuntimeError):
+        missing()
+
+    dumps = lazy_import("json", "dumps")
+    assert dumps({"a": 1}) == '{"a": 1}'
+
+
+def test_entry_points_defer_heavy_imports():
+    heavy = ("sklearn", "matplotlib", "pandas", "reportlab", "nltk")
+    code = (
+        "import sys, app.main, app.cli\n"
+        f"print([m for m in {heavy!r} if m in sys.modules])\n"
+        "import app.ml.risk_predictor\n"
+        "print('sklearn' in sys.modules)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-2:] == ["[]", "False"]
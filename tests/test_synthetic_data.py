@@ -0,0 +1,36 @@
+import numpy as np
+from app.ml.synthetic_data import FEATURE_NAMES, generate_synthetic_data, iter_synthetic_chunks
+
+
+def test_generate_is_reproducible_and_well_formed():
+    X, y = generate_synthetic_data(n_samples=5000, seed=7)
+    X2, y2 = generate_synthetic_data(n_samples=5000, seed=7)
+    assert np.array_equal(X, X2) and np.array_equal(y, y2)
+
+    assert X.shape == (5000, len(FEATURE_NAMES))
+    assert X[:, :5].min() >= 1 and X[:, :5].max() <= 5
+    assert np.array_equal(X[:, 5], X[:, :5].sum(axis=1))
+    assert np.allclose(X[:, 7], X[:, 5] / 5)
+    assert X[:, 8].min() >= -100 and X[:, 8].max() <= 100
+    assert 12 <= X[:, 6].min() and X[:, 6].max() < 50
+    assert set(np.unique(y)) <= {0, 1, 2}
+
+
+def test_labels_follow_risk_rules_without_threshold_noise():
+    X, y = generate_synthetic_data(n_samples=2000, seed=1)
+    for row, label in zip(X, y):
+        total, sentiment = row[5], row[8]
+        if total <= 10 or (total <= 15 and sentiment < -50):
+            expected = 2
+        elif total <= 15 or (total <= 20 and sentiment < -20):
+            expected = 1
+        else:
+            expected = 0
+        assert label == expected
+
+
+def test_chunked_generation_yields_all_rows():
+    chunks = list(iter_synthetic_chunks(25_000, chunk_size=10_000, seed=3))
+    assert [len(y) for _, y in chunks] == [10_000, 10_000, 5_000]
+    again = list(iter_synthetic_chunks(25_000, chunk_size=10_000, seed=3))
+    assert all(np.array_equal(a[0], b[0]) for a, b in zip(chunks, again))